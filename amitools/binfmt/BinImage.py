@@ -1,3 +1,5 @@
+from array import array
+
 SEGMENT_TYPE_CODE = 0
 SEGMENT_TYPE_DATA = 1
 SEGMENT_TYPE_BSS = 2
@@ -39,6 +41,8 @@ class Relocations:
     def __init__(self, to_seg):
         self.to_seg = to_seg
         self.entries = []
+        self.batches = None
+        self.num_batched = 0
 
     def add_reloc(self, reloc):
         self.entries.append(reloc)
@@ -46,6 +50,24 @@ class Relocations:
     def get_relocs(self):
         return self.entries
 
+    def get_batches(self):
+        """return dict of reloc type -> (offsets, addends) arrays.
+
+        The arrays are built once and rebuilt if entries were added.
+        """
+        if self.batches is None or self.num_batched != len(self.entries):
+            batches = {}
+            for r in self.entries:
+                batch = batches.get(r.type)
+                if batch is None:
+                    batch = (array("I"), array("q"))
+                    batches[r.type] = batch
+                batch[0].append(r.offset)
+                batch[1].append(r.addend)
+            self.batches = batches
+            self.num_batched = len(self.entries)
+        return self.batches
+
 
 class Symbol:
     def __init__(self, offset, name, file_name=None):
@@ -1,13 +1,35 @@
 import struct
 from .BinImage import BIN_IMAGE_RELOC_32, BIN_IMAGE_RELOC_PC32
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_long = struct.Struct(">I")
+
 
 class Relocate:
-    """Relocate a BinImage to given addresses"""
+    """Relocate a BinImage to given addresses
+
+    The relocations of a segment are applied in batches per target segment.
+    If numpy is available then large batches are applied with array ops,
+    otherwise a tight loop over the buffer is used. In verbose mode each
+    entry is applied and reported separately.
+    """
 
-    def __init__(self, bin_img, verbose=False):
+    # minimum number of relocs in a batch to use numpy
+    numpy_min_relocs = 64
+
+    def __init__(self, bin_img, verbose=False, use_numpy=None):
         self.bin_img = bin_img
         self.verbose = verbose
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ValueError("numpy is not available")
+        self.use_numpy = use_numpy
 
     def get_sizes(self):
         """return a list of the required sizes for all sections"""
@@ -42,7 +64,7 @@ class Relocate:
         offset = 0
         segs = self.bin_img.get_segments()
         for segment in segs:
-            self._copy_data(data, segment, offset)
+            self._copy_data(data, segment, addrs, offset)
             self._reloc_data(data, segment, addrs, offset)
             offset += segment.size + padding
         return data
@@ -61,6 +83,47 @@ class Relocate:
             datas.append(data)
         return datas
 
+    def relocate_to_mem(self, mem, addrs):
+        """copy and relocate the segments directly into memory.
+
+        'mem' needs the block and long access of the machine memory API.
+        If it also exposes its RAM as a writable buffer with get_buffer()
+        then the relocations are patched in that buffer.
+        """
+        segs = self.bin_img.get_segments()
+        if len(segs) != len(addrs):
+            raise ValueError("addrs != segments")
+        get_buffer = getattr(mem, "get_buffer", None)
+        buf = get_buffer() if get_buffer else None
+        for segment in segs:
+            addr = addrs[segment.id]
+            size = segment.size
+            src_data = segment.data
+            src_len = 0
+            if src_data is not None:
+                src_len = len(src_data)
+                mem.w_block(addr, src_data)
+            if src_len < size:
+                mem.clear_block(addr + src_len, size - src_len, 0)
+            if self.verbose:
+                print("#%02d @%06x +%06x" % (segment.id, addr, size))
+            for batch in self._get_batches(segment, addrs, 0):
+                if buf is not None:
+                    self._apply_batch(buf, *batch, addr)
+                else:
+                    self._reloc_batch_mem(mem, *batch, addr)
+
+    def _reloc_batch_mem(self, mem, offsets, addends, base, pc_rel, addr):
+        """relocate a batch of entries with long accesses to memory"""
+        r32 = mem.r32
+        w32 = mem.w32
+        for off, addend in zip(offsets, addends):
+            pos = addr + off
+            val = r32(pos) + addend + base
+            if pc_rel:
+                val -= off
+            w32(pos, val & 0xFFFFFFFF)
+
     def _copy_data(self, data, segment, addrs, offset=0):
         # allocate segment data
         size = segment.size
@@ -73,17 +136,67 @@ class Relocate:
             print("#%02d @%06x +%06x" % (segment.id, addrs[segment.id], size))
 
     def _reloc_data(self, data, segment, addrs, offset=0):
-        # find relocations
-        to_segs = segment.get_reloc_to_segs()
+        # verbose mode reports each entry
+        if self.verbose:
+            my_addr = addrs[segment.id]
+            for to_seg in segment.get_reloc_to_segs():
+                to_id = to_seg.id
+                to_addr = addrs[to_id]
+                reloc = segment.get_reloc(to_seg)
+                for r in reloc.get_relocs():
+                    self._reloc(segment.id, data, r, my_addr, to_addr, to_id, offset)
+            return
+        for batch in self._get_batches(segment, addrs, offset):
+            self._apply_batch(data, *batch, offset)
+
+    def _get_batches(self, segment, addrs, pc_offset):
+        """yield (offsets, addends, base, pc_rel) for all reloc batches"""
         my_addr = addrs[segment.id]
-        for to_seg in to_segs:
+        for to_seg in segment.get_reloc_to_segs():
             # get target segment's address
-            to_id = to_seg.id
-            to_addr = addrs[to_id]
+            to_addr = addrs[to_seg.id]
             # get relocations
             reloc = segment.get_reloc(to_seg)
-            for r in reloc.get_relocs():
-                self._reloc(segment.id, data, r, my_addr, to_addr, to_id, offset)
+            for reloc_type, (offsets, addends) in reloc.get_batches().items():
+                if reloc_type == BIN_IMAGE_RELOC_32:
+                    yield offsets, addends, to_addr, False
+                elif reloc_type == BIN_IMAGE_RELOC_PC32:
+                    yield offsets, addends, to_addr - my_addr - pc_offset, True
+                else:
+                    raise (Exception("unsupported type %d" % reloc_type))
+
+    def _apply_batch(self, data, offsets, addends, base, pc_rel, extra_offset):
+        if self.use_numpy and len(offsets) >= self.numpy_min_relocs:
+            self._reloc_batch_numpy(data, offsets, addends, base, pc_rel, extra_offset)
+        else:
+            self._reloc_batch(data, offsets, addends, base, pc_rel, extra_offset)
+
+    def _reloc_batch(self, data, offsets, addends, base, pc_rel, extra_offset):
+        """relocate a batch of entries of the same type"""
+        unpack_from = _long.unpack_from
+        pack_into = _long.pack_into
+        for off, addend in zip(offsets, addends):
+            pos = off + extra_offset
+            val = unpack_from(data, pos)[0] + addend + base
+            if pc_rel:
+                val -= off
+            pack_into(data, pos, val & 0xFFFFFFFF)
+
+    def _reloc_batch_numpy(self, data, offsets, addends, base, pc_rel, extra_offset):
+        """relocate a batch of entries of the same type with array ops"""
+        pos = numpy.frombuffer(offsets, dtype=numpy.uint32).astype(numpy.int64)
+        # entries patching the same long have to be applied in order
+        if len(numpy.unique(pos)) != len(pos):
+            return self._reloc_batch(data, offsets, addends, base, pc_rel, extra_offset)
+        buf = numpy.frombuffer(data, dtype=numpy.uint8)
+        idx = (pos + extra_offset)[:, None] + numpy.arange(4)
+        val = buf[idx].astype(numpy.int64) << numpy.array([24, 16, 8, 0])
+        val = val.sum(axis=1)
+        val += numpy.frombuffer(addends, dtype=numpy.int64) + base
+        if pc_rel:
+            val -= pos
+        val &= 0xFFFFFFFF
+        buf[idx] = (val[:, None] >> numpy.array([24, 16, 8, 0])) & 0xFF
 
     def _reloc(self, my_id, data, reloc, my_addr, to_addr, to_id, extra_offset):
         """relocate one entry"""
@@ -95,6 +208,7 @@ class Relocate:
             addr = delta + to_addr - my_addr - offset
         else:
             raise (Exception("unsupported type %d" % reloc.get_type()))
+        addr &= 0xFFFFFFFF
         self._write_long(data, offset, addr)
         if self.verbose:
             print(
@@ -103,12 +217,10 @@ class Relocate:
             )
 
     def _read_long(self, data, offset):
-        d = data[offset : offset + 4]
-        return struct.unpack(">i", d)[0]
+        return _long.unpack_from(data, offset)[0]
 
     def _write_long(self, data, offset, value):
-        d = struct.pack(">i", value)
-        data[offset : offset + 4] = d
+        _long.pack_into(data, offset, value)
 
 
 # mini test
@@ -202,9 +202,14 @@ class ADFSDir(ADFSNode):
             )
 
         # now create the blocks for this node
-        new_blk = node.blocks_create_new(
-            free_blks, name, hash_chain_blk, self.block.blk_num, meta_info
-        )
+        try:
+            new_blk = node.blocks_create_new(
+                free_blks, name, hash_chain_blk, self.block.blk_num, meta_info
+            )
+        except FSError:
+            # e.g. a file stream of wrong size: release the blocks again
+            self.volume.bitmap.dealloc_n(free_blks)
+            raise
 
         # dircache: create record for this node
         if self.volume.is_dircache:
@@ -250,6 +255,16 @@ class ADFSDir(ADFSNode):
         self._create_node(node, name, meta_info, update_ts)
         return node
 
+    def create_file_stream(self, name, stream, size, meta_info=None, update_ts=True):
+        """create a file with 'size' bytes of data read from a file object or
+        an iterator of chunks. The data is not kept in memory."""
+        if not isinstance(name, FSString):
+            raise ValueError("create_file_stream's name must be a FSString")
+        node = ADFSFile(self.volume, self)
+        node.set_file_stream(stream, size)
+        self._create_node(node, name, meta_info, update_ts)
+        return node
+
     def _delete(self, node, wipe, update_ts):
         self.ensure_entries()
 
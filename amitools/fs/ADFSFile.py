@@ -7,6 +7,9 @@ from .FSError import *
 
 
 class ADFSFile(ADFSNode):
+    # max number of contiguous data blocks read at once
+    max_chunk_blks = 128
+
     def __init__(self, volume, parent):
         ADFSNode.__init__(self, volume, parent)
         # state
@@ -16,6 +19,7 @@ class ADFSFile(ADFSNode):
         self.data_blks = []
         self.valid = False
         self.data = None
+        self.data_stream = None
         self.data_size = 0
         self.total_blks = 0
 
@@ -80,54 +84,103 @@ class ADFSFile(ADFSNode):
     def read(self):
         """read data blocks"""
         self.data_blks = []
-        want_seq_num = 1
-        total_size = 0
-        is_ffs = self.volume.is_ffs
-        byte_size = self.block.byte_size
-        data = bytearray()
-        for blk in self.data_blk_nums:
-            if is_ffs:
-                # ffs has raw data blocks
-                dat_blk = self.volume.blkdev.read_block(blk)
-                total_size += len(dat_blk)
-                # shrink last read if necessary
-                if total_size > byte_size:
-                    shrink = total_size - byte_size
-                    dat_blk = dat_blk[:-shrink]
-                    total_size = byte_size
-                data += dat_blk
-            else:
-                # ofs
-                dat_blk = FileDataBlock(self.block.blkdev, blk)
-                dat_blk.read()
-                if not dat_blk.valid:
-                    raise FSError(INVALID_FILE_DATA_BLOCK, block=dat_blk, node=self)
-                # check sequence number
-                if dat_blk.seq_num != want_seq_num:
-                    raise FSError(
-                        INVALID_SEQ_NUM,
-                        block=dat_blk,
-                        node=self,
-                        extra="got=%d wanted=%d" % (dat_blk.seq_num, want_seq_num),
-                    )
-                # store data blocks
-                self.data_blks.append(dat_blk)
-                total_size += dat_blk.data_size
-                data += dat_blk.get_block_data()
-            want_seq_num += 1
+        data = bytearray(self.block.byte_size)
+        pos = 0
+        for chunk in self._iter_data(self.max_chunk_blks, keep_blks=True):
+            end = pos + len(chunk)
+            data[pos:end] = chunk
+            pos = end
         # store full contents of file
         self.data = data
+
+    def iter_chunks(self, max_blks=None):
+        """iterate over the file data in chunks without reading it all.
+
+        FFS files are read in runs of up to 'max_blks' contiguous data blocks
+        and OFS files block by block. The chunks are bytes-like objects.
+        """
+        if self.data is not None:
+            if self.data:
+                yield self.data
+            return
+        if max_blks is None:
+            max_blks = self.max_chunk_blks
+        yield from self._iter_data(max_blks)
+
+    def _iter_data(self, max_blks, keep_blks=False):
+        if self.volume.is_ffs:
+            chunks = self._iter_ffs_data(max_blks)
+        else:
+            chunks = self._iter_ofs_data(keep_blks)
+        total_size = 0
+        for chunk in chunks:
+            total_size += len(chunk)
+            yield chunk
         # make sure all went well
-        got_size = len(data)
         want_size = self.block.byte_size
-        if got_size != want_size:
+        if total_size != want_size:
             raise FSError(
                 INTERNAL_ERROR,
                 block=self.block,
                 node=self,
-                extra="file size mismatch: got=%d want=%d" % (got_size, want_size),
+                extra="file size mismatch: got=%d want=%d" % (total_size, want_size),
             )
 
+    def _iter_ffs_data(self, max_blks):
+        # ffs has raw data blocks
+        blkdev = self.volume.blkdev
+        left = self.block.byte_size
+        for blk_num, num_blks in self._get_data_blk_runs(max_blks):
+            if num_blks > 1:
+                data = blkdev.read_block(blk_num, num_blks=num_blks)
+            else:
+                data = blkdev.read_block(blk_num)
+            # shrink last read if necessary
+            if len(data) > left:
+                data = data[:left]
+            left -= len(data)
+            yield data
+
+    def _get_data_blk_runs(self, max_blks):
+        """return (blk_num, num_blks) runs of contiguous data blocks"""
+        if not self.volume.blkdev.multi_block:
+            max_blks = 1
+        runs = []
+        start = 0
+        num = 0
+        for blk_num in self.data_blk_nums:
+            if 0 < num < max_blks and blk_num == start + num:
+                num += 1
+            else:
+                if num > 0:
+                    runs.append((start, num))
+                start = blk_num
+                num = 1
+        if num > 0:
+            runs.append((start, num))
+        return runs
+
+    def _iter_ofs_data(self, keep_blks):
+        want_seq_num = 1
+        for blk in self.data_blk_nums:
+            dat_blk = FileDataBlock(self.block.blkdev, blk)
+            dat_blk.read()
+            if not dat_blk.valid:
+                raise FSError(INVALID_FILE_DATA_BLOCK, block=dat_blk, node=self)
+            # check sequence number
+            if dat_blk.seq_num != want_seq_num:
+                raise FSError(
+                    INVALID_SEQ_NUM,
+                    block=dat_blk,
+                    node=self,
+                    extra="got=%d wanted=%d" % (dat_blk.seq_num, want_seq_num),
+                )
+            # store data blocks
+            if keep_blks:
+                self.data_blks.append(dat_blk)
+            want_seq_num += 1
+            yield dat_blk.get_block_data()
+
     def get_file_data(self):
         if self.data != None:
             return self.data
@@ -144,10 +197,24 @@ class ADFSFile(ADFSNode):
 
     def set_file_data(self, data):
         self.data = data
+        self.data_stream = None
         self.data_size = len(data)
         self.num_data_blks = self.calc_number_of_data_blks()
         self.num_ext_blks = self.calc_number_of_list_blks()
 
+    def set_file_stream(self, stream, size):
+        """set the file data to be written from a stream.
+
+        The stream is either a file object or an iterator of bytes-like
+        chunks and has to deliver exactly 'size' bytes. The data is consumed
+        block by block while the file is written and is not kept.
+        """
+        self.data = None
+        self.data_stream = stream
+        self.data_size = size
+        self.num_data_blks = self.calc_number_of_data_blks()
+        self.num_ext_blks = self.calc_number_of_list_blks()
+
     def get_data_block_contents_bytes(self):
         """how many bytes of file data can be stored in a block?"""
         bb = self.volume.blkdev.block_bytes
@@ -196,7 +263,7 @@ class ADFSFile(ADFSNode):
 
         # create file header block
         fhb = FileHeaderBlock(self.blkdev, fhb_num, self.volume.is_longname)
-        byte_size = len(self.data)
+        byte_size = self.data_size
         if self.num_data_blks > ppb:
             hdr_blks = self.data_blk_nums[0:ppb]
             hdr_ext = self.ext_blk_nums[0]
@@ -241,27 +308,16 @@ class ADFSFile(ADFSNode):
 
     def write(self):
         self.data_blks = []
-        off = 0
-        left = self.data_size
-        blk_idx = 0
+        # only keep the data blocks if the data is kept, too
+        keep_blks = self.data is not None
         bs = self.get_data_block_contents_bytes()
-        is_ffs = self.volume.is_ffs
-        while off < self.data_size:
-            # number of data block
-            blk_num = self.data_blk_nums[blk_idx]
-            # extract file data
-            size = left
-            if size > bs:
-                size = bs
-            d = self.data[off : off + size]
-            if is_ffs:
-                # pad block
-                if size < bs:
-                    d += b"\0" * (bs - size)
-                # write raw block data in FFS
-                self.blkdev.write_block(blk_num, d)
-            else:
+        chunks = self._iter_write_data(bs)
+        if self.volume.is_ffs:
+            self._write_ffs_data(chunks, bs)
+        else:
+            for blk_idx, d in enumerate(chunks):
                 # old FS: create and write data block
+                blk_num = self.data_blk_nums[blk_idx]
                 fdb = FileDataBlock(self.blkdev, blk_num)
                 if blk_idx == self.num_data_blks - 1:
                     next_data = 0
@@ -269,10 +325,88 @@ class ADFSFile(ADFSNode):
                     next_data = self.data_blk_nums[blk_idx + 1]
                 fdb.create(self.block.blk_num, blk_idx + 1, d, next_data)
                 fdb.write()
-                self.data_blks.append(fdb)
-            blk_idx += 1
-            off += bs
-            left -= bs
+                if keep_blks:
+                    self.data_blks.append(fdb)
+        self.data_stream = None
+
+    def _write_ffs_data(self, chunks, bs):
+        """write raw data blocks in runs of contiguous blocks"""
+        blkdev = self.blkdev
+        if blkdev.multi_block:
+            max_blks = self.max_chunk_blks
+        else:
+            max_blks = 1
+        run_start = 0
+        run = []
+        for blk_idx, d in enumerate(chunks):
+            # pad block
+            if len(d) < bs:
+                d = bytes(d) + b"\0" * (bs - len(d))
+            blk_num = self.data_blk_nums[blk_idx]
+            if run and (blk_num != run_start + len(run) or len(run) == max_blks):
+                self._write_ffs_run(run_start, run)
+                run = []
+            if not run:
+                run_start = blk_num
+            run.append(d)
+        if run:
+            self._write_ffs_run(run_start, run)
+
+    def _write_ffs_run(self, blk_num, run):
+        num_blks = len(run)
+        if num_blks > 1:
+            self.blkdev.write_block(blk_num, b"".join(run), num_blks=num_blks)
+        else:
+            self.blkdev.write_block(blk_num, run[0])
+
+    def _iter_write_data(self, bs):
+        """iterate over the file data in pieces of 'bs' bytes"""
+        size = self.data_size
+        if self.data is not None:
+            data = self.data
+            for off in range(0, size, bs):
+                yield data[off : off + bs]
+            return
+        # stream data with a bounded buffer
+        buf = bytearray()
+        total = 0
+        for chunk in self._iter_stream_chunks(bs * self.max_chunk_blks):
+            total += len(chunk)
+            if total > size:
+                break
+            buf += chunk
+            num = len(buf) - len(buf) % bs
+            for off in range(0, num, bs):
+                yield bytes(buf[off : off + bs])
+            del buf[:num]
+        if total == size:
+            if buf:
+                yield bytes(buf)
+        else:
+            raise FSError(
+                INTERNAL_ERROR,
+                node=self,
+                extra="stream size mismatch: got=%d%s want=%d"
+                % (total, "+" if total > size else "", size),
+            )
+
+    def _iter_stream_chunks(self, chunk_bytes):
+        stream = self.data_stream
+        if not hasattr(stream, "read"):
+            yield from stream
+            return
+        # read exactly the file size from a file object
+        left = self.data_size
+        while left > 0:
+            chunk = stream.read(min(chunk_bytes, left))
+            if not chunk:
+                return
+            left -= len(chunk)
+            yield chunk
+        # more data in the file: report it as too long
+        chunk = stream.read(1)
+        if chunk:
+            yield chunk
 
     def draw_on_bitmap(self, bm, show_all=False, first=False):
         bm[self.block.blk_num] = ord("H")
@@ -364,6 +364,18 @@ class ADFSVolume:
         if not cache:
             node.flush()
 
+    def write_file_stream(self, stream, size, ami_path, suggest_name=None):
+        """Write a file with size bytes read from a file object or an iterator"""
+        # get parent node and file_name
+        parent_node, file_name = self.get_create_path_name(ami_path, suggest_name)
+        if parent_node == None:
+            raise FSError(INVALID_PARENT_DIRECTORY, file_name=ami_path)
+        if file_name == None:
+            raise FSError(INVALID_FILE_NAME, file_name=file_name)
+        # create file
+        node = parent_node.create_file_stream(file_name, stream, size)
+        node.flush()
+
     def read_file(self, ami_path, cache=False):
         """Read a file and return data"""
         # get node of file
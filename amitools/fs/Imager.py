@@ -109,12 +109,11 @@ class Imager:
             node.flush()
         # file
         elif node.is_file():
-            data = node.get_file_data()
+            with open(file_path, "wb") as fh:
+                for chunk in node.iter_chunks():
+                    fh.write(chunk)
+                    self.total_bytes += len(chunk)
             node.flush()
-            fh = open(file_path, "wb")
-            fh.write(data)
-            fh.close()
-            self.total_bytes += len(data)
 
     # ----- pack -----
 
@@ -236,10 +235,11 @@ class Imager:
             node.flush()
         # pack file
         elif os.path.isfile(in_path):
-            # read file
-            fh = open(in_path, "rb")
-            data = fh.read()
-            fh.close()
-            node = parent_node.create_file(FSString(ami_name), data, meta_info, False)
+            # stream file
+            with open(in_path, "rb") as fh:
+                size = os.fstat(fh.fileno()).st_size
+                node = parent_node.create_file_stream(
+                    FSString(ami_name), fh, size, meta_info, False
+                )
             node.flush()
-            self.total_bytes += len(data)
+            self.total_bytes += size
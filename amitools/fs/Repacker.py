@@ -82,7 +82,8 @@ class Repacker:
             sub_dir.flush()
         # file
         elif in_node.is_file():
-            data = in_node.get_file_data()
-            out_file = out_dir.create_file(name, data, meta_info, False)
+            out_file = out_dir.create_file_stream(
+                name, in_node.iter_chunks(), in_node.get_size(), meta_info, False
+            )
             out_file.flush()
         in_node.flush()
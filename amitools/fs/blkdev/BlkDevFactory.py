@@ -5,6 +5,7 @@ import gzip
 from .ADFBlockDevice import ADFBlockDevice
 from .HDFBlockDevice import HDFBlockDevice
 from .RawBlockDevice import RawBlockDevice
+from .CachedBlockDevice import CachedBlockDevice
 from .DiskGeometry import DiskGeometry
 from amitools.fs.rdb.RDisk import RDisk
 import amitools.util.BlkDevTools as BlkDevTools
@@ -26,6 +27,9 @@ class BlkDevFactory:
     TYPE_RDB_GZ = TYPE_RDB | GZIP_MASK
     TYPE_ADF_HD_GZ = TYPE_ADF_HD | GZIP_MASK
 
+    # blocks cached for HDF and RDB images. ADFs are kept in memory anyway
+    DEFAULT_CACHE_BLOCKS = 4096
+
     TYPE_MAP = {
         "adf": TYPE_ADF,
         "hdf": TYPE_HDF,
@@ -107,6 +111,36 @@ class BlkDevFactory:
         else:
             return 512
 
+    def _get_use_mmap(self, options):
+        """mmap option: on/off or auto (default) to map large images only"""
+        if options and "mmap" in options:
+            val = options["mmap"]
+            if val == "auto":
+                return None
+            if val in (True, False, 0, 1):
+                return bool(val)
+            raise ValueError("invalid 'mmap' given: %s" % val)
+        return None
+
+    def _get_cache_blocks(self, options):
+        """cache option: off or number of cached blocks. default is on"""
+        if options and "cache" in options:
+            val = options["cache"]
+            if val is True:
+                return self.DEFAULT_CACHE_BLOCKS
+            if val is False or val == 0:
+                return 0
+            if type(val) is int and val > 0:
+                return val
+            raise ValueError("invalid 'cache' given: %s" % val)
+        return self.DEFAULT_CACHE_BLOCKS
+
+    def _add_cache(self, blkdev, options, read_only=False):
+        num_blocks = self._get_cache_blocks(options)
+        if num_blocks == 0:
+            return blkdev
+        return CachedBlockDevice(blkdev, num_blocks, read_only)
+
     def open(
         self, img_file, read_only=False, options=None, fobj=None, none_if_missing=False
     ):
@@ -159,6 +193,7 @@ class BlkDevFactory:
 
         # get block size
         bs = self._get_block_size(options)
+        use_mmap = self._get_use_mmap(options)
 
         # now create blkdev
         if t in (self.TYPE_ADF, self.TYPE_ADF_HD):
@@ -176,10 +211,15 @@ class BlkDevFactory:
             geo = DiskGeometry(block_bytes=bs)
             if not geo.detect(size, options):
                 raise IOError("can't detect geometry of HDF image file")
-            blkdev = HDFBlockDevice(img_file, read_only, fobj=fobj, block_size=bs)
+            blkdev = HDFBlockDevice(
+                img_file, read_only, fobj=fobj, block_size=bs, use_mmap=use_mmap
+            )
             blkdev.open(geo)
+            blkdev = self._add_cache(blkdev, options, read_only)
         else:
-            rawdev = RawBlockDevice(img_file, read_only, fobj=fobj, block_bytes=bs)
+            rawdev = RawBlockDevice(
+                img_file, read_only, fobj=fobj, block_bytes=bs, use_mmap=use_mmap
+            )
             rawdev.open()
             # check block size stored in rdb
             rdisk = RDisk(rawdev)
@@ -188,7 +228,9 @@ class BlkDevFactory:
                 # adjust block size and re-open
                 rawdev.close()
                 bs = rdb_bs
-                rawdev = RawBlockDevice(img_file, read_only, fobj=fobj, block_bytes=bs)
+                rawdev = RawBlockDevice(
+                    img_file, read_only, fobj=fobj, block_bytes=bs, use_mmap=use_mmap
+                )
                 rawdev.open()
                 rdisk = RDisk(rawdev)
             if not rdisk.open():
@@ -202,6 +244,7 @@ class BlkDevFactory:
                 raise IOError("can't find partition in image file")
             blkdev = part.create_blkdev(True)  # auto_close rdisk
             blkdev.open()
+            blkdev = self._add_cache(blkdev, options, read_only)
         return blkdev
 
     def create(self, img_file, force=True, options=None, fobj=None):
@@ -225,6 +268,7 @@ class BlkDevFactory:
 
         # get block size
         bs = self._get_block_size(options)
+        use_mmap = self._get_use_mmap(options)
 
         # create blkdev
         if t == self.TYPE_ADF:
@@ -238,8 +282,11 @@ class BlkDevFactory:
             geo = DiskGeometry()
             if not geo.setup(options):
                 raise IOError("can't determine geometry of HDF image file")
-            blkdev = HDFBlockDevice(img_file, fobj=fobj, block_size=bs)
+            blkdev = HDFBlockDevice(
+                img_file, fobj=fobj, block_size=bs, use_mmap=use_mmap
+            )
             blkdev.create(geo)
+            blkdev = self._add_cache(blkdev, options)
         return blkdev
 
 
@@ -3,6 +3,9 @@ from .DiskGeometry import DiskGeometry
 
 
 class BlockDevice:
+    # read_block() and write_block() accept num_blks for sequential blocks
+    multi_block = False
+
     def _set_geometry(
         self, cyls=80, heads=2, sectors=11, block_bytes=512, reserved=2, bootblocks=2
     ):
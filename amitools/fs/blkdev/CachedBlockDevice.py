@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from .BlockDevice import BlockDevice
+
+
+class CachedBlockDevice(BlockDevice):
+    """a block device wrapper that caches the blocks of another device.
+
+    The last recently used 'max_blocks' blocks are kept in memory. Written
+    blocks are only marked dirty and written back on flush or if a dirty
+    block is evicted. Then all dirty blocks are written in runs of
+    sequential blocks (of at most 'max_run_blks' blocks) with a single write
+    each if the device supports multi block access.
+    """
+
+    # max number of blocks written back with a single write
+    max_run_blks = 128
+    # max number of dirty blocks of multi block writes kept in the cache
+    max_bulk_blks = 1024
+
+    def __init__(self, blkdev, max_blocks=4096, read_only=False):
+        self.blkdev = blkdev
+        self.max_blocks = max_blocks
+        self.read_only = read_only
+        self._set_geometry(
+            blkdev.cyls,
+            blkdev.heads,
+            blkdev.sectors,
+            blkdev.block_bytes,
+            blkdev.reserved,
+            blkdev.bootblocks,
+        )
+        # read_block() and write_block() always take num_blks but only
+        # advertise multi block access if the wrapped device handles it
+        self.multi_block = blkdev.multi_block
+        # blk_num -> bytes
+        self.blocks = OrderedDict()
+        self.dirty = set()
+        # dirty blocks of multi block writes
+        self.bulk = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.write_runs = 0
+        self.write_blocks = 0
+
+    def __str__(self):
+        return "CachedBlockDevice(blocks=%d/%d,dirty=%d,hits=%d,misses=%d)" % (
+            len(self.blocks),
+            self.max_blocks,
+            len(self.dirty),
+            self.hits,
+            self.misses,
+        )
+
+    def get_stats(self):
+        return {
+            "blocks": len(self.blocks),
+            "dirty": len(self.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "writes": self.writes,
+            "write_runs": self.write_runs,
+            "write_blocks": self.write_blocks,
+        }
+
+    def get_info(self):
+        """return an array of strings with the cache statistics"""
+        s = self.get_stats()
+        total = s["hits"] + s["misses"]
+        if total:
+            ratio = 100.0 * s["hits"] / total
+        else:
+            ratio = 0.0
+        return [
+            "cache:  %10d/%d blocks  hits=%d misses=%d (%.1f%% hits)"
+            % (s["blocks"], self.max_blocks, s["hits"], s["misses"], ratio),
+            "writes: %10d  written back=%d blocks in %d runs"
+            % (s["writes"], s["write_blocks"], s["write_runs"]),
+        ]
+
+    def open(self):
+        pass
+
+    def flush(self):
+        self._write_back()
+        self.blkdev.flush()
+
+    def close(self):
+        self._write_back()
+        self.blocks.clear()
+        self.blkdev.close()
+
+    def read_block(self, blk_num, num_blks=1):
+        if num_blks > 1:
+            return self._read_blocks(blk_num, num_blks)
+        data = self.blocks.get(blk_num)
+        if data is not None:
+            self.hits += 1
+            self.blocks.move_to_end(blk_num)
+            return data
+        self.misses += 1
+        data = bytes(self.blkdev.read_block(blk_num))
+        self._add(blk_num, data)
+        return data
+
+    def _read_blocks(self, blk_num, num_blks):
+        """read multiple blocks without adding them to the cache.
+
+        Bulk reads (e.g. of file data) would evict the often used blocks
+        otherwise. Blocks found in the cache replace the read ones as they
+        might be dirty.
+        """
+        if not self.multi_block:
+            return b"".join(self.read_block(blk_num + i) for i in range(num_blks))
+        data = self.blkdev.read_block(blk_num, num_blks=num_blks)
+        bb = self.block_bytes
+        hits = 0
+        for i in range(num_blks):
+            cached = self.blocks.get(blk_num + i)
+            if cached is not None:
+                if hits == 0:
+                    data = bytearray(data)
+                data[i * bb : (i + 1) * bb] = cached
+                hits += 1
+        self.hits += hits
+        self.misses += num_blks - hits
+        return data
+
+    def write_block(self, blk_num, data, num_blks=1):
+        if self.read_only:
+            raise IOError("Cached block device is read-only!")
+        if blk_num + num_blks > self.num_blocks:
+            raise ValueError(
+                "Invalid cached block num: got %d but max is %d"
+                % (blk_num + num_blks - 1, self.num_blocks)
+            )
+        if len(data) != self.block_bytes * num_blks:
+            raise ValueError(
+                "Invalid cached block size written: got %d but size is %d"
+                % (len(data), self.block_bytes * num_blks)
+            )
+        self.writes += 1
+        if num_blks > 1:
+            self._write_blocks(blk_num, data, num_blks)
+            return
+        self.dirty.add(blk_num)
+        self.bulk.discard(blk_num)
+        self._add(blk_num, bytes(data))
+
+    def _write_blocks(self, blk_num, data, num_blks):
+        """store multiple written blocks as dirty blocks in the cache.
+
+        They are written back together with the other dirty blocks so the
+        runs are coalesced with neighbouring blocks, too. Like bulk reads
+        they are not kept in the cache afterwards and at most
+        'max_bulk_blks' of them are buffered.
+        """
+        bb = self.block_bytes
+        data = bytes(data)
+        for i in range(num_blks):
+            num = blk_num + i
+            self.dirty.add(num)
+            self.bulk.add(num)
+            self._add(num, data[i * bb : (i + 1) * bb])
+        if len(self.bulk) > self.max_bulk_blks:
+            self._write_back()
+
+    def _add(self, blk_num, data):
+        blocks = self.blocks
+        blocks[blk_num] = data
+        blocks.move_to_end(blk_num)
+        while len(blocks) > self.max_blocks:
+            old_num = next(iter(blocks))
+            if old_num in self.dirty:
+                self._write_back()
+                continue
+            del blocks[old_num]
+            self.evictions += 1
+
+    def _write_back(self):
+        """write all dirty blocks in runs of sequential blocks"""
+        if not self.dirty:
+            return
+        blk_nums = sorted(self.dirty)
+        blocks = self.blocks
+        run_start = blk_nums[0]
+        run = [blocks[run_start]]
+        max_run_blks = self.max_run_blks
+        for blk_num in blk_nums[1:]:
+            if blk_num == run_start + len(run) and len(run) < max_run_blks:
+                run.append(blocks[blk_num])
+            else:
+                self._write_run(run_start, run)
+                run_start = blk_num
+                run = [blocks[blk_num]]
+        self._write_run(run_start, run)
+        # drop the written blocks of multi block writes
+        for blk_num in self.bulk:
+            del blocks[blk_num]
+        self.bulk.clear()
+
+    def _write_run(self, blk_num, run):
+        """write a run and only then mark its blocks clean"""
+        num_blks = len(run)
+        self.write_runs += 1
+        if num_blks > 1 and self.multi_block:
+            self.blkdev.write_block(blk_num, b"".join(run), num_blks=num_blks)
+            self.dirty.difference_update(range(blk_num, blk_num + num_blks))
+            self.write_blocks += num_blks
+        else:
+            for data in run:
+                self.blkdev.write_block(blk_num, data)
+                self.dirty.discard(blk_num)
+                self.write_blocks += 1
+                blk_num += 1
@@ -1,16 +1,34 @@
 import os
 import stat
+import mmap
 import amitools.util.BlkDevTools as BlkDevTools
 
 
 class ImageFile:
-    def __init__(self, file_name, read_only=False, block_bytes=512, fobj=None):
+    """access the blocks of an image file.
+
+    Regular image files can be memory mapped: blocks are then returned as
+    memoryviews of the mapping without copying and writes go directly to
+    the mapping. Set 'use_mmap' to True or False to enable or disable it.
+    By default (None) only images with at least 'mmap_min_bytes' bytes are
+    mapped. Block/char devices and given file objects (e.g. gzip streams)
+    always use plain file access.
+    """
+
+    mmap_min_bytes = 4 * 1024 * 1024
+
+    def __init__(
+        self, file_name, read_only=False, block_bytes=512, fobj=None, use_mmap=None
+    ):
         self.file_name = file_name
         self.read_only = read_only
         self.block_bytes = block_bytes
         self.fobj = fobj
+        self.use_mmap = use_mmap
         self.size = 0
         self.num_blocks = 0
+        self.mm = None
+        self.mapped = False
 
     @staticmethod
     def get_image_size(file_name):
@@ -31,6 +49,9 @@ class ImageFile:
             self.size = self.fobj.tell()
             self.fobj.seek(0, 0)  # return to begin
             self.num_blocks = self.size // self.block_bytes
+            # re-open of our own mapped file, e.g. after resize
+            if self.mapped:
+                self._map()
         # file name given
         else:
             # is readable?
@@ -50,6 +71,41 @@ class ImageFile:
             else:
                 flags = "r+b"
             self.fobj = open(self.file_name, flags)
+            if self._want_mmap():
+                self.mapped = True
+                self._map()
+
+    def is_mapped(self):
+        return self.mm is not None
+
+    def _want_mmap(self):
+        if self.use_mmap is False:
+            return False
+        if not stat.S_ISREG(os.fstat(self.fobj.fileno()).st_mode):
+            return False
+        if self.use_mmap:
+            return True
+        return self.size >= self.mmap_min_bytes
+
+    def _map(self):
+        self._unmap()
+        if self.read_only:
+            access = mmap.ACCESS_READ
+        else:
+            access = mmap.ACCESS_WRITE
+        self.mm = mmap.mmap(self.fobj.fileno(), self.size, access=access)
+
+    def _unmap(self):
+        if self.mm is None:
+            return
+        if not self.read_only:
+            self.mm.flush()
+        try:
+            self.mm.close()
+        except BufferError:
+            # blocks are still referenced. the mapping is released with them
+            pass
+        self.mm = None
 
     def read_blk(self, blk_num, num_blks=1):
         if blk_num >= self.num_blocks:
@@ -58,34 +114,44 @@ class ImageFile:
                 % (blk_num, self.num_blocks)
             )
         off = blk_num * self.block_bytes
+        num = self.block_bytes * num_blks
+        if self.mm is not None:
+            return memoryview(self.mm)[off : off + num]
         if off != self.fobj.tell():
             self.fobj.seek(off, os.SEEK_SET)
-        num = self.block_bytes * num_blks
         data = self.fobj.read(num)
         return data
 
     def write_blk(self, blk_num, data, num_blks=1):
         if self.read_only:
             raise IOError("Can't write block: image file is read-only")
-        if blk_num >= self.num_blocks:
+        if blk_num + num_blks > self.num_blocks:
             raise IOError(
                 "Invalid image file block num: got %d but max is %d"
-                % (blk_num, self.num_blocks)
+                % (blk_num + num_blks - 1, self.num_blocks)
             )
         if len(data) != (self.block_bytes * num_blks):
             raise IOError(
                 "Invalid block size written: got %d but size is %d"
-                % (len(data), self.block_bytes)
+                % (len(data), self.block_bytes * num_blks)
             )
         off = blk_num * self.block_bytes
+        if self.mm is not None:
+            self.mm[off : off + len(data)] = data
+            return
         if off != self.fobj.tell():
             self.fobj.seek(off, os.SEEK_SET)
         self.fobj.write(data)
 
     def flush(self):
-        self.fobj.flush()
+        if self.mm is not None:
+            if not self.read_only:
+                self.mm.flush()
+        else:
+            self.fobj.flush()
 
     def close(self):
+        self._unmap()
         self.fobj.close()
         self.fobj = None
 
@@ -93,6 +159,7 @@ class ImageFile:
         if self.read_only:
             raise IOError("Can't create image file in read only mode")
         total_size = num_blocks * self.block_bytes
+        self._unmap()
         if self.fobj is not None:
             self.fobj.truncate(total_size)
             self.fobj.seek(0, 0)
@@ -105,6 +172,7 @@ class ImageFile:
         if self.read_only:
             raise IOError("Can't grow image file in read only mode")
         total_size = new_blocks * self.block_bytes
+        self._unmap()
         if self.fobj is not None:
             self.fobj.truncate(total_size)
             self.fobj.seek(0, 0)  # seek start
@@ -1,4 +1,5 @@
 import struct
+from amitools.util.chksum import block_chksum
 from ..TimeStamp import TimeStamp
 from ..FSString import FSString
 
@@ -152,11 +153,7 @@ class Block:
         self._put_long(self.chk_loc, self.calc_chksum)
 
     def _calc_chksum(self):
-        chksum = 0
-        for i in range(self.block_longs):
-            if i != self.chk_loc:
-                chksum += self._get_long(i)
-        return (-chksum) & 0xFFFFFFFF
+        return block_chksum(self.data, self.chk_loc, self.block_longs)
 
     def _get_timestamp(self, loc):
         days = self._get_long(loc)
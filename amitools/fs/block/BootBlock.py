@@ -1,6 +1,7 @@
 import os.path
 
 from .Block import Block
+from amitools.util.chksum import sum_longs, fold_carry
 import amitools.fs.DosType as DosType
 
 
@@ -49,17 +50,12 @@ class BootBlock(Block):
         return self.valid
 
     def _calc_chksum(self):
-        all_blks = [self] + self.extra_blks
         n = self.blkdev.block_longs
-        chksum = 0
-        for b, blk in enumerate(all_blks):
-            for i in range(n):
-                if not (b == 0 and i == 1):  # skip chksum
-                    chksum += blk._get_long(i)
-                    if chksum > 0xFFFFFFFF:
-                        chksum += 1
-                        chksum &= 0xFFFFFFFF
-        return (~chksum) & 0xFFFFFFFF
+        # skip chksum in long 1 of first block
+        chksum = sum_longs(self.data, n) - self._get_long(1)
+        for blk in self.extra_blks:
+            chksum += sum_longs(blk.data, n)
+        return (~fold_carry(chksum)) & 0xFFFFFFFF
 
     def read(self):
         self._read_data()
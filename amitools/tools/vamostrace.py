@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+#
+# vamostrace [options] <cmd> <trace file>
+#
+# decode binary instruction traces recorded with vamos --instr-trace-file
+#
+
+import sys
+import os
+
+from amitools.vamos.tools import tools_main, TraceTool
+
+
+def main(args=None):
+    cfg_files = (
+        # first look in current dir
+        os.path.join(os.getcwd(), ".vamosrc"),
+        # then in home dir
+        os.path.expanduser("~/.vamosrc"),
+    )
+    tools = [TraceTool()]
+    return tools_main(tools, cfg_files, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
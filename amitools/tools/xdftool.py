@@ -9,6 +9,7 @@ import os.path
 
 from amitools.fs.ADFSVolume import ADFSVolume
 from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+from amitools.fs.blkdev.CachedBlockDevice import CachedBlockDevice
 from amitools.fs.FSError import *
 from amitools.fs.Imager import Imager
 from amitools.fs.Repacker import Repacker
@@ -394,11 +395,10 @@ class ReadCmd(Command):
             return 2
         # its a file
         if node.is_file():
-            data = node.get_file_data()
-            # write data to file
-            fh = open(out_name, "wb")
-            fh.write(data)
-            fh.close()
+            # stream data to file
+            with open(out_name, "wb") as fh:
+                for chunk in node.iter_chunks():
+                    fh.write(chunk)
         # its a dir
         elif node.is_dir():
             img = Imager(meta_mode=Imager.META_MODE_NONE)
@@ -410,6 +410,8 @@ class ReadCmd(Command):
 class InfoCmd(Command):
     def handle_vol(self, vol):
         info = vol.get_info()
+        if isinstance(vol.blkdev, CachedBlockDevice):
+            info += vol.blkdev.get_info()
         for line in info:
             print(line)
         return 0
@@ -462,10 +464,9 @@ class WriteCmd(Command):
         file_name = make_fsstr(file_name)
         # handle file
         if os.path.isfile(sys_file):
-            fh = open(sys_file, "rb")
-            data = fh.read()
-            fh.close()
-            vol.write_file(data, ami_path, file_name)
+            with open(sys_file, "rb") as fh:
+                size = os.fstat(fh.fileno()).st_size
+                vol.write_file_stream(fh, size, ami_path, file_name)
         # handle dir
         elif os.path.isdir(sys_file):
             parent_node, dir_name = vol.get_create_path_name(ami_path, file_name)
@@ -0,0 +1,73 @@
+"""big endian 32 bit sums of whole buffers for block and ROM checksums"""
+
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MASK32 = 0xFFFFFFFF
+
+# use numpy for buffers with at least this number of longs
+numpy_min_longs = 4096
+
+# num_longs -> struct.Struct
+_structs = {}
+
+
+def _get_struct(num_longs):
+    s = _structs.get(num_longs)
+    if s is None:
+        s = struct.Struct(">%dI" % num_longs)
+        _structs[num_longs] = s
+    return s
+
+
+def sum_longs(data, num_longs=None):
+    """return the sum of the big endian longs in data without any overflow
+    handling. if num_longs is not given then the whole buffer is summed."""
+    if num_longs is None:
+        num_longs = len(data) // 4
+    if numpy is not None and num_longs >= numpy_min_longs:
+        arr = numpy.frombuffer(data, dtype=">u4", count=num_longs)
+        return int(arr.sum(dtype=numpy.uint64))
+    return sum(_get_struct(num_longs).unpack_from(data))
+
+
+def fold_carry(value):
+    """fold the carries of a sum back into the lower 32 bits.
+
+    This gives the same result as adding each carry right away after
+    every single add (end-around carry).
+    """
+    while value > MASK32:
+        value = (value & MASK32) + (value >> 32)
+    return value
+
+
+def _get_long(data, num):
+    return struct.unpack_from(">I", data, num * 4)[0]
+
+
+def block_chksum(data, chk_loc, num_longs=None):
+    """return the AmigaDOS block checksum of data.
+
+    The checksum is the negated sum of all longs except the checksum long
+    found at long index chk_loc.
+    """
+    total = sum_longs(data, num_longs) - _get_long(data, chk_loc)
+    return (-total) & MASK32
+
+
+def carry_sum_longs(data, num_longs=None, skip_loc=None):
+    """return the 32 bit sum with end-around carry of the longs in data.
+
+    The long at index skip_loc is left out of the sum if it is given.
+    """
+    if num_longs is None:
+        num_longs = len(data) // 4
+    total = sum_longs(data, num_longs)
+    if skip_loc is not None and 0 <= skip_loc < num_longs:
+        total -= _get_long(data, skip_loc)
+    return fold_carry(total)
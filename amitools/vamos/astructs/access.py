@@ -1,5 +1,76 @@
+import collections
+import struct
+
 from .astruct import AmigaStruct
-from .pointer import BCPLPointerType
+from .pointer import PointerType, BCPLPointerType
+from .scalar import ScalarType
+from .enum import Enum
+from .bitfield import BitField
+
+FieldAccess = collections.namedtuple(
+    "FieldAccess", ["offset", "width", "signed", "bptr", "raw_set", "fmt"]
+)
+
+_width_to_fmt = {
+    (0, False): "B",
+    (0, True): "b",
+    (1, False): ">H",
+    (1, True): ">h",
+    (2, False): ">I",
+    (2, True): ">i",
+}
+_fmt_structs = {key: struct.Struct(fmt) for key, fmt in _width_to_fmt.items()}
+
+
+def _compile_field(field_type, offset):
+    """return the FieldAccess of a field or None if it has no fast access"""
+    if issubclass(field_type, PointerType):
+        width = 2
+        signed = False
+        bptr = issubclass(field_type, BCPLPointerType)
+        raw_set = True
+    elif issubclass(field_type, ScalarType):
+        width = field_type.get_mem_width()
+        signed = field_type.is_signed()
+        bptr = False
+        # enums and bit fields convert names on set
+        raw_set = not issubclass(field_type, (Enum, BitField))
+    else:
+        return None
+    fmt = _fmt_structs[(width, signed)]
+    return FieldAccess(offset, width, signed, bptr, raw_set, fmt)
+
+
+def _get_access_table(sdef):
+    """return the flat table of dotted field names to FieldAccess.
+
+    The table is compiled once per struct definition and contains the
+    offsets of all fields including the ones of embedded structs. Fields
+    without fast access (e.g. arrays) map to their offset only.
+    """
+    table = sdef._access_table
+    if table is None:
+        table = {}
+        leaves = []
+        _fill_access_table(sdef, "", 0, table, leaves)
+        sdef._access_table = table
+        sdef._access_leaves = leaves
+    return table
+
+
+def _fill_access_table(sdef, prefix, base_offset, table, leaves):
+    for field_def in sdef.get_field_defs():
+        name = prefix + field_def.name
+        offset = base_offset + field_def.offset
+        field_type = field_def.type
+        fa = _compile_field(field_type, offset)
+        if fa:
+            table[name] = fa
+            leaves.append((name, fa))
+        else:
+            table[name] = offset
+        if issubclass(field_type, AmigaStruct):
+            _fill_access_table(field_type.sdef, name + ".", offset, table, leaves)
 
 
 class AccessStruct(object):
@@ -7,9 +78,31 @@ class AccessStruct(object):
 
     def __init__(self, mem, struct_def, struct_addr):
         self.mem = mem
-        self.struct = struct_def(mem, struct_addr)
+        self.struct_def = struct_def
+        self.struct_addr = struct_addr
+        self.table = _get_access_table(struct_def.sdef)
+        self._struct = None
+
+    @property
+    def struct(self):
+        """the struct instance with field objects is created on demand"""
+        if self._struct is None:
+            self._struct = self.struct_def(self.mem, self.struct_addr)
+        return self._struct
 
     def w_s(self, name, val):
+        fa = self.table.get(name)
+        if fa is None:
+            fa = self._lookup(name)
+        if type(fa) is FieldAccess and fa.raw_set:
+            # BPTR auto conversion
+            if fa.bptr:
+                val >>= 2
+            if fa.signed:
+                self.mem.writes(fa.width, self.struct_addr + fa.offset, val)
+            else:
+                self.mem.write(fa.width, self.struct_addr + fa.offset, val)
+            return
         field, field_def = self._get_field_for_name(name)
         # BPTR auto conversion
         if issubclass(field_def.type, BCPLPointerType):
@@ -18,20 +111,78 @@ class AccessStruct(object):
             field.set(val)
 
     def r_s(self, name):
+        fa = self.table.get(name)
+        if fa is None:
+            fa = self._lookup(name)
+        if type(fa) is FieldAccess:
+            if fa.signed:
+                return self.mem.reads(fa.width, self.struct_addr + fa.offset)
+            val = self.mem.read(fa.width, self.struct_addr + fa.offset)
+            # BPTR auto conversion
+            if fa.bptr:
+                val <<= 2
+            return val
         field, field_def = self._get_field_for_name(name)
-        # BPTR auto conversion
-        if issubclass(field_def.type, BCPLPointerType):
-            val = field.get_ref_addr()
-        else:
-            val = field.get()
-        return val
+        return field.get()
 
     def s_get_addr(self, name):
-        field, _ = self._get_field_for_name(name)
-        return field.get_addr()
+        fa = self.table.get(name)
+        if fa is None:
+            fa = self._lookup(name)
+        if type(fa) is FieldAccess:
+            return self.struct_addr + fa.offset
+        return self.struct_addr + fa
 
     def get_size(self):
-        return self.struct.get_byte_size()
+        return self.struct_def.get_byte_size()
+
+    def read_all(self):
+        """read the whole struct with a single block read.
+
+        Return a dict of the (dotted) names of all scalar and pointer fields
+        to their values.
+        """
+        data = self.mem.r_block(self.struct_addr, self.get_size())
+        res = {}
+        for name, fa in self.struct_def.sdef._access_leaves:
+            val = fa.fmt.unpack_from(data, fa.offset)[0]
+            if fa.bptr:
+                val <<= 2
+            res[name] = val
+        return res
+
+    def write_many(self, values, clear=False):
+        """write the fields given in the values dict with a single block write.
+
+        The block is read first to keep the other fields. If 'clear' is set
+        then all other fields are cleared instead and no read is needed.
+        """
+        size = self.get_size()
+        if clear:
+            data = bytearray(size)
+        else:
+            data = self.mem.r_block(self.struct_addr, size)
+        table = self.table
+        for name, val in values.items():
+            fa = table.get(name)
+            if fa is None:
+                fa = self._lookup(name)
+            if type(fa) is not FieldAccess or not fa.raw_set:
+                raise ValueError("no raw access to field: %s" % name)
+            if fa.bptr:
+                val >>= 2
+            fa.fmt.pack_into(data, fa.offset, val)
+        self.mem.w_block(self.struct_addr, data)
+
+    def _lookup(self, name):
+        # alias names are resolved via the field objects and then cached
+        field, _ = self._get_field_for_name(name)
+        offset = field.get_addr() - self.struct_addr
+        fa = _compile_field(type(field), offset)
+        if fa is None:
+            fa = offset
+        self.table[name] = fa
+        return fa
 
     def _get_field_for_name(self, name):
         struct = self.struct
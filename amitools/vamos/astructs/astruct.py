@@ -104,6 +104,9 @@ class AmigaStructFieldDefs:
         self._total_size = 0
         self._alias_names = {}
         self._alias_type = None
+        # flat field access table compiled by AccessStruct
+        self._access_table = None
+        self._access_leaves = None
 
     def get_num_field_defs(self):
         return len(self._field_defs)
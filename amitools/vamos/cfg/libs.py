@@ -12,6 +12,7 @@ class LibsParser(Parser):
                     "version": 0,
                     "expunge": Value(str, "shutdown", enum=expunges),
                     "num_fake_funcs": 0,
+                    "native_funcs": False,
                 }
             },
             "devs": {
@@ -20,6 +21,7 @@ class LibsParser(Parser):
                     "version": 0,
                     "expunge": Value(str, "shutdown", enum=expunges),
                     "num_fake_funcs": 0,
+                    "native_funcs": False,
                 }
             },
         }
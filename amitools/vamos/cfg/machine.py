@@ -18,16 +18,19 @@ class MachineParser(Parser):
             "40",
         )
         hw_access = ("emu", "ignore", "abort", "disable")
+        alloc_engines = ("first_fit", "size_bins")
         def_cfg = {
             "machine": {
                 "cpu": Value(str, "68000", enum=cpus),
                 "max_cycles": 0,
                 "cycles_per_run": 1000,
+                "adaptive_cycles": False,
                 "ram_size": 1024,
             },
             "memmap": {
                 "hw_access": Value(str, "emu", enum=hw_access),
                 "old_dos_guard": False,
+                "alloc_engine": Value(str, "first_fit", enum=alloc_engines),
             },
         }
         arg_cfg = {
@@ -50,6 +53,11 @@ class MachineParser(Parser):
                     type=int,
                     help="cycles per block",
                 ),
+                "adaptive_cycles": Argument(
+                    "--adaptive-cycles",
+                    action="store_true",
+                    help="grow cycles per block while no hook needs a slice",
+                ),
                 "ram_size": Argument(
                     "-m",
                     "--ram-size",
@@ -70,6 +78,11 @@ class MachineParser(Parser):
                     action="store_true",
                     help="Reserve memory range to track access to BCPL addrs",
                 ),
+                "alloc_engine": Argument(
+                    "--alloc-engine",
+                    action="store",
+                    help="Select memory allocator engine (first_fit, size_bins)",
+                ),
             },
         }
         ini_trafo = {
@@ -77,9 +90,14 @@ class MachineParser(Parser):
                 "cpu": "cpu",
                 "max_cycles": "max_cycles",
                 "cycles_per_run": "cycles_per_run",
+                "adaptive_cycles": "adaptive_cycles",
                 "ram_size": "ram_size",
             },
-            "memmap": {"hw_access": "hw_access", "old_dos_guard": "old_dos_guard"},
+            "memmap": {
+                "hw_access": "hw_access",
+                "old_dos_guard": "old_dos_guard",
+                "alloc_engine": "alloc_engine",
+            },
         }
         Parser.__init__(
             self,
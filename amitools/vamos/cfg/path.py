@@ -10,6 +10,7 @@ class PathParser(Parser):
                 "vols_base_dir": Value(str, "~/.vamos/volumes"),
                 "auto_assigns": ValueList(str),
                 "auto_volumes": ValueList(str),
+                "bin_cache_dir": Value(str),
             },
             "assigns": ValueList(str),
             "volumes": ValueList(str),
@@ -39,6 +40,11 @@ class PathParser(Parser):
                     action="append",
                     help="select the auto assigns",
                 ),
+                "bin_cache_dir": Argument(
+                    "--bin-cache-dir",
+                    action="store",
+                    help="keep parsed binaries in this directory",
+                ),
             },
             "assigns": Argument(
                 "-a",
@@ -73,6 +79,7 @@ class PathParser(Parser):
                 "cwd": ["path", "cwd"],
                 "auto_volumes": ["path", "auto_volumes"],
                 "auto_assigns": ["path", "auto_assigns"],
+                "bin_cache_dir": ["path", "bin_cache_dir"],
             },
         }
         Parser.__init__(
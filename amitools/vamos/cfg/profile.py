@@ -7,6 +7,14 @@ class ProfileParser(Parser):
             "profile": {
                 "enabled": False,
                 "libs": {"names": ValueList(str), "calls": False},
+                "mem_access": {"enabled": False, "num_hot": 20},
+                "pc_sample": {
+                    "enabled": False,
+                    "interval": 1000,
+                    "num_hot": 20,
+                    "stacks_file": Value(str),
+                },
+                "path_cache": {"enabled": False},
                 "output": {"file": Value(str), "append": False, "dump": False},
             }
         }
@@ -27,6 +35,50 @@ class ProfileParser(Parser):
                         help="store each lib call individually",
                     ),
                 },
+                "mem_access": {
+                    "enabled": Argument(
+                        "--profile-mem-access",
+                        action="store_true",
+                        help="count CPU memory accesses per label",
+                    ),
+                    "num_hot": Argument(
+                        "--profile-mem-hot",
+                        action="store",
+                        type=int,
+                        help="number of hot addresses to report",
+                    ),
+                },
+                "pc_sample": {
+                    "enabled": Argument(
+                        "--profile-pc-sample",
+                        action="store_true",
+                        help="sample the pc of the emulated code",
+                    ),
+                    "interval": Argument(
+                        "--profile-pc-interval",
+                        action="store",
+                        type=int,
+                        help="cycles between pc samples",
+                    ),
+                    "num_hot": Argument(
+                        "--profile-pc-hot",
+                        action="store",
+                        type=int,
+                        help="number of hotspots to report",
+                    ),
+                    "stacks_file": Argument(
+                        "--profile-pc-stacks",
+                        action="store",
+                        help="write collapsed stacks for flame graphs",
+                    ),
+                },
+                "path_cache": {
+                    "enabled": Argument(
+                        "--profile-path-cache",
+                        action="store_true",
+                        help="report hits of the command and dir caches",
+                    ),
+                },
                 "output": {
                     "file": Argument(
                         "--profile-file",
@@ -6,6 +6,7 @@ class TraceParser(Parser):
         def_cfg = {
             "trace": {
                 "instr": False,
+                "instr_file": Value(str),
                 "memory": False,
                 "vamos_ram": False,
                 "reg_dump": False,
@@ -20,6 +21,11 @@ class TraceParser(Parser):
                     action="store_true",
                     help="enable instruction trace",
                 ),
+                "instr_file": Argument(
+                    "--instr-trace-file",
+                    action="store",
+                    help="record binary instruction trace for vamostrace",
+                ),
                 "memory": Argument(
                     "-t",
                     "--memory-trace",
@@ -49,6 +55,7 @@ class TraceParser(Parser):
         ini_trafo = {
             "trace": {
                 "instr": "instr_trace",
+                "instr_file": "instr_trace_file",
                 "memory": "memory_trace",
                 "vamos_ram": "internal_memory_trace",
                 "reg_dump": "reg_dump",
@@ -0,0 +1,147 @@
+from bisect import bisect_left, bisect_right
+
+
+class LabelLayer:
+    """a set of non-overlapping labels kept sorted by address.
+
+    As labels inside a layer never overlap their begin and end addresses
+    are both sorted and a point or range query is a simple bisect.
+    """
+
+    def __init__(self):
+        self.addrs = []
+        self.ends = []
+        self.labels = []
+
+    def __len__(self):
+        return len(self.labels)
+
+    def can_add(self, addr, end):
+        pos = bisect_left(self.addrs, end)
+        if pos == 0:
+            return True
+        return self.ends[pos - 1] <= addr
+
+    def add(self, label):
+        addr = label.addr
+        end = label.end
+        pos = bisect_right(self.addrs, addr)
+        # keep empty labels before non-empty ones with same address
+        while pos > 0 and self.addrs[pos - 1] == addr and self.ends[pos - 1] > end:
+            pos -= 1
+        self.addrs.insert(pos, addr)
+        self.ends.insert(pos, end)
+        self.labels.insert(pos, label)
+
+    def remove(self, label):
+        addr = label.addr
+        pos = bisect_left(self.addrs, addr)
+        end = bisect_right(self.addrs, addr)
+        labels = self.labels
+        while pos < end:
+            if labels[pos] is label:
+                del self.addrs[pos]
+                del self.ends[pos]
+                del labels[pos]
+                return True
+            pos += 1
+        return False
+
+    def find(self, addr):
+        pos = bisect_right(self.addrs, addr) - 1
+        if pos >= 0 and addr < self.ends[pos]:
+            return self.labels[pos]
+
+    def intersect(self, addr, end):
+        # same inclusive semantics as LabelRange.does_intersect()
+        lo = bisect_left(self.ends, addr)
+        hi = bisect_right(self.addrs, end)
+        return self.labels[lo:hi]
+
+    def within(self, addr, end):
+        lo = bisect_left(self.addrs, addr)
+        hi = bisect_right(self.ends, end)
+        return self.labels[lo:hi]
+
+
+class LabelIndex:
+    """address index of labels with O(log n) queries.
+
+    Labels are distributed over layers of non-overlapping labels: a new
+    label is stored in the first layer it fits into. Nested labels (e.g.
+    allocations inside a pool puddle) end up in a few layers only, so a
+    query costs one bisect per layer.
+
+    Each label gets a sequence number on insertion so queries can report
+    labels in insertion order just like the linked list does.
+    """
+
+    def __init__(self):
+        self.layers = []
+        self.seq = {}
+        self.next_seq = 0
+
+    def __len__(self):
+        return len(self.seq)
+
+    def add(self, label):
+        addr = label.addr
+        end = label.end
+        for layer in self.layers:
+            if layer.can_add(addr, end):
+                break
+        else:
+            layer = LabelLayer()
+            self.layers.append(layer)
+        layer.add(label)
+        self.seq[id(label)] = self.next_seq
+        self.next_seq += 1
+
+    def remove(self, label):
+        if self.seq.pop(id(label), None) is None:
+            return False
+        layers = self.layers
+        for layer in layers:
+            if layer.remove(label):
+                break
+        # drop empty layers at the end
+        while layers and len(layers[-1]) == 0:
+            layers.pop()
+        return True
+
+    def find(self, addr):
+        layers = self.layers
+        # fast path: no overlapping labels
+        if len(layers) == 1:
+            return layers[0].find(addr)
+        result = None
+        result_seq = None
+        seq = self.seq
+        for layer in layers:
+            label = layer.find(addr)
+            if label is not None:
+                label_seq = seq[id(label)]
+                if result is None or label_seq < result_seq:
+                    result = label
+                    result_seq = label_seq
+        return result
+
+    def intersect(self, addr, size):
+        end = addr + size
+        result = []
+        for layer in self.layers:
+            result += layer.intersect(addr, end)
+        return self._sort(result)
+
+    def within(self, addr, size):
+        end = addr + size
+        result = []
+        for layer in self.layers:
+            result += layer.within(addr, end)
+        return self._sort(result)
+
+    def _sort(self, labels):
+        if len(labels) > 1:
+            seq = self.seq
+            labels.sort(key=lambda l: seq[id(l)])
+        return labels
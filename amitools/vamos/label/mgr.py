@@ -1,16 +1,21 @@
 import logging
 from amitools.vamos.log import *
+from .index import LabelIndex
 
 
 class LabelManager:
     def __init__(self):
         self.first = None
         self.last = None
+        self.index = LabelIndex()
+        # bumped on every change so users can cache lookups
+        self.generation = 0
 
     # This is now all done manually with doubly linked
     # lists. The reason for this is that the python built-in
     # lists are ill-performing as the list grows larger,
-    # and this is a heavy-duty class.
+    # and this is a heavy-duty class. The list keeps the insertion
+    # order while all address lookups are done with the sorted index.
     def add_label(self, range):
         assert range.next == None
         assert range.prev == None
@@ -22,6 +27,8 @@ class LabelManager:
             self.last.next = range
             range.prev = self.last
             self.last = range
+        self.index.add(range)
+        self.generation += 1
 
     def remove_label(self, range):
         if range.prev != None:
@@ -34,19 +41,15 @@ class LabelManager:
             self.first = range.next
         range.next = None
         range.prev = None
+        self.index.remove(range)
+        self.generation += 1
 
     def delete_labels_within(self, addr, size):
         # try to find compatible: release all labels within the given range
         # this is necessary because the label could be part of a puddle
         # that is released in one go.
-        r = self.first
-        while r != None:
-            if r.addr >= addr and r.addr + r.size <= addr + size:
-                s = r.next
-                self.remove_label(r)
-                r = s
-            else:
-                r = r.next
+        for r in self.index.within(addr, size):
+            self.remove_label(r)
 
     def get_all_labels(self):
         ranges = []
@@ -65,23 +68,13 @@ class LabelManager:
     # This is called quite often and hence
     # a bit speed critical. It finds the
     # range within which the given address
-    # lies.
+    # lies. If ranges overlap then the
+    # first one added is returned.
     def get_label(self, addr):
-        r = self.first
-        while r != None:
-            if r.addr <= addr and addr < r.end:
-                return r
-            r = r.next
-        return None
+        return self.index.find(addr)
 
     def get_intersecting_labels(self, addr, size):
-        result = []
-        r = self.first
-        while r != None:
-            if r.does_intersect(addr, size):
-                result.append(r)
-            r = r.next
-        return result
+        return self.index.intersect(addr, size)
 
     def get_label_offset(self, addr):
         r = self.get_label(addr)
@@ -0,0 +1,218 @@
+import struct
+
+from amitools.fd import read_lib_fd
+from amitools.vamos.libcore import LibJumpTable
+from amitools.vamos.libstructs import FileHandleStruct
+from amitools.vamos.log import log_dos
+
+# offsets of the buffer fields in the FileHandle
+FH_BUF = FileHandleStruct.sdef.fh_Buf.offset
+FH_POS = FileHandleStruct.sdef.fh_Pos.offset
+FH_END = FileHandleStruct.sdef.fh_End.offset
+
+# short branches
+_BRANCH = {
+    "ne": 0x6600,
+    "eq": 0x6700,
+    "mi": 0x6B00,
+    "cc": 0x6400,
+    "ge": 0x6C00,
+    "gt": 0x6E00,
+    "le": 0x6F00,
+}
+
+
+def _assemble(code):
+    """assemble a list of opcode words, label names and (cond, label)
+    short branches into a byte string"""
+    labels = {}
+    pos = 0
+    for item in code:
+        if type(item) is str:
+            labels[item] = pos
+        else:
+            pos += 2
+    words = []
+    pos = 0
+    for item in code:
+        if type(item) is str:
+            continue
+        if type(item) is tuple:
+            cond, label = item
+            disp = labels[label] - (pos + 2)
+            assert -128 <= disp < 128 and disp != 0
+            item = _BRANCH[cond] | (disp & 0xFF)
+        words.append(item)
+        pos += 2
+    return struct.pack(">%dH" % len(words), *words)
+
+
+def _long(val):
+    return [(val >> 16) & 0xFFFF, val & 0xFFFF]
+
+
+def _get_fh(code):
+    """convert the BPTR to the file handle in d1 to an APTR in a0"""
+    return [
+        0x2041,  # movea.l d1,a0
+        0xD1C8,  # adda.l  a0,a0
+        0xD1C8,  # adda.l  a0,a0
+    ] + code
+
+
+def _get_buf():
+    """convert the BPTR fh_Buf of the file handle to an APTR in a1"""
+    return [
+        0x2268,  # movea.l fh_Buf(a0),a1
+        FH_BUF,
+        0xD3C9,  # adda.l  a1,a1
+        0xD3C9,  # adda.l  a1,a1
+    ]
+
+
+def _slow_path(trap_addr):
+    return ["slow", 0x4EF9] + _long(trap_addr)  # jmp trap_addr
+
+
+def gen_fgetc(trap_addr):
+    """FGetC(fh)(d1): return the next char from a read buffer"""
+    code = _get_fh(
+        [
+            0x2028,  # move.l  fh_Pos(a0),d0
+            FH_POS,
+            ("mi", "slow"),
+            0xB0A8,  # cmp.l   fh_End(a0),d0
+            FH_END,
+            ("ge", "slow"),
+        ]
+        + _get_buf()
+        + [
+            0x52A8,  # addq.l  #1,fh_Pos(a0)
+            FH_POS,
+            0xD3C0,  # adda.l  d0,a1
+            0x7000,  # moveq   #0,d0
+            0x1011,  # move.b  (a1),d0
+            0x4E75,  # rts
+        ]
+        + _slow_path(trap_addr)
+    )
+    return _assemble(code)
+
+
+def gen_fputc(trap_addr, buf_size):
+    """FPutC(fh,ch)(d1/d2): append a char to a write buffer.
+    A newline always takes the slow path to flush the line.
+    """
+    code = _get_fh(
+        [
+            0x70FF,  # moveq   #-1,d0
+            0xB0A8,  # cmp.l   fh_End(a0),d0
+            FH_END,
+            ("ne", "slow"),
+            0x2028,  # move.l  fh_Pos(a0),d0
+            FH_POS,
+            0x0C80,  # cmpi.l  #buf_size,d0
+        ]
+        + _long(buf_size)
+        + [
+            ("cc", "slow"),
+            0x0C02,  # cmpi.b  #10,d2
+            10,
+            ("eq", "slow"),
+        ]
+        + _get_buf()
+        + [
+            0xD3C0,  # adda.l  d0,a1
+            0x1282,  # move.b  d2,(a1)
+            0x52A8,  # addq.l  #1,fh_Pos(a0)
+            FH_POS,
+            0x2002,  # move.l  d2,d0
+            0x4E75,  # rts
+        ]
+        + _slow_path(trap_addr)
+    )
+    return _assemble(code)
+
+
+def gen_ungetc(trap_addr):
+    """UnGetC(fh,character)(d1/d2): step back in a read buffer if the
+    char matches the last one read or is -1
+    """
+    code = _get_fh(
+        [
+            0x2028,  # move.l  fh_Pos(a0),d0
+            FH_POS,
+            ("le", "slow"),
+            0xB0A8,  # cmp.l   fh_End(a0),d0
+            FH_END,
+            ("gt", "slow"),
+        ]
+        + _get_buf()
+        + [
+            0xD3C0,  # adda.l  d0,a1
+            0x7000,  # moveq   #0,d0
+            0x1021,  # move.b  -(a1),d0
+            0xB480,  # cmp.l   d0,d2
+            ("eq", "ok"),
+            0x0C82,  # cmpi.l  #-1,d2
+            0xFFFF,
+            0xFFFF,
+            ("ne", "slow"),
+            "ok",
+            0x53A8,  # subq.l  #1,fh_Pos(a0)
+            FH_POS,
+            0x4E75,  # rts
+        ]
+        + _slow_path(trap_addr)
+    )
+    return _assemble(code)
+
+
+class CharIOCode:
+    """native m68k code for buffered FGetC, FPutC and UnGetC.
+
+    The functions work on the buffer of the FileHandle described by
+    fh_Buf, fh_Pos and fh_End (see FileHandle) and run completely inside the
+    CPU emulation. Only if the buffer needs to be refilled or flushed they
+    jump to the trap of the Python implementation.
+    """
+
+    def __init__(self, alloc, buf_size):
+        self.alloc = alloc
+        self.buf_size = buf_size
+        self.mem_obj = None
+        self.jump_table = None
+        self.orig_addrs = {}
+
+    def patch_jump_table(self, base_addr):
+        """place the code in front of the traps in the jump table of dos"""
+        fd = read_lib_fd("dos.library")
+        jt = LibJumpTable(self.alloc.get_mem(), base_addr, fd.get_neg_size(), fd=fd)
+        orig = {name: getattr(jt, name) for name in ("FGetC", "FPutC", "UnGetC")}
+        funcs = (
+            ("FGetC", gen_fgetc(orig["FGetC"])),
+            ("FPutC", gen_fputc(orig["FPutC"], self.buf_size)),
+            ("UnGetC", gen_ungetc(orig["UnGetC"])),
+        )
+        size = sum(len(code) for _, code in funcs)
+        self.mem_obj = self.alloc.alloc_memory(size, label="dos.library(CharIO)")
+        mem = self.alloc.get_mem()
+        addr = self.mem_obj.addr
+        for name, code in funcs:
+            mem.w_block(addr, code)
+            setattr(jt, name, addr)
+            log_dos.info("CharIO: %s @%06x -> trap @%06x", name, addr, orig[name])
+            addr += len(code)
+        self.jump_table = jt
+        self.orig_addrs = orig
+
+    def cleanup(self):
+        """restore the jump table and free the code"""
+        if self.mem_obj is None:
+            return
+        for name, addr in self.orig_addrs.items():
+            setattr(self.jump_table, name, addr)
+        self.alloc.free_memory(self.mem_obj)
+        self.mem_obj = None
+        self.jump_table = None
+        self.orig_addrs = {}
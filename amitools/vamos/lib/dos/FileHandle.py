@@ -2,9 +2,33 @@ import os
 import sys
 from amitools.vamos.libstructs import FileHandleStruct
 
+# size of the char I/O buffer of a file handle
+FH_BUF_SIZE = 4096
+# fh_Pos/fh_End value of an unused buffer
+FH_BUF_NONE = 0xFFFFFFFF
+
+_FH_BUF = FileHandleStruct.sdef.fh_Buf.offset
+_FH_POS = FileHandleStruct.sdef.fh_Pos.offset
+_FH_END = FileHandleStruct.sdef.fh_End.offset
+
 
 class FileHandle:
-    """represent an AmigaOS file handle (FH) in vamos"""
+    """represent an AmigaOS file handle (FH) in vamos
+
+    FGetC/FPutC/UnGetC use a buffer in emulated memory that is described by
+    the fh_Buf, fh_Pos and fh_End fields of the FileHandle. So the native
+    code of these functions (see CharIO) can work on the buffer directly.
+    The buffer is in one of these states:
+
+      idle:  fh_Pos = fh_End = -1
+      read:  0 <= fh_Pos <= fh_End: buf[fh_Pos:fh_End] is not read yet
+      write: fh_End = -1 and fh_Pos >= 0: buf[:fh_Pos] is not written yet
+
+    A fh_End of 0 is never used as it is the faked EOF set by 'endcli'. Then
+    the buffer end last set is taken from 'buf_end' and the buffer is not
+    used anymore. All other file ops sync the buffer first and return it
+    to idle.
+    """
 
     def __init__(
         self, obj, ami_path, sys_path, need_close=True, is_nil=False, auto_flush=False
@@ -20,6 +44,12 @@ class FileHandle:
         self.unch = bytearray()
         self.ch = -1
         self.is_nil = is_nil
+        # char I/O buffer in emulated memory
+        self.buf_mem = None
+        self.buf_from_obj = False
+        self.buf_end = FH_BUF_NONE
+        # set of the file manager with all handles in write state
+        self.write_bufs = None
 
     def __str__(self):
         return "[FH:'%s'(ami='%s',sys='%s',nc=%s)@%06x=B@%06x]" % (
@@ -32,29 +62,183 @@ class FileHandle:
         )
 
     def close(self):
+        self.sync_buf()
         if self.need_close:
             self.obj.close()
 
-    def alloc_fh(self, alloc, fs_handler_port):
+    def alloc_fh(self, alloc, fs_handler_port, write_bufs=None):
         name = "File:" + self.name
         self.mem = alloc.alloc_struct(FileHandleStruct, label=name)
         self.b_addr = self.mem.addr >> 2
+        self.write_bufs = write_bufs
         # -- fill filehandle
         # use baddr of FH itself as identifier
         self.mem.access.w_s("fh_Args", self.b_addr)
         # set port
         self.mem.access.w_s("fh_Type", fs_handler_port)
-        # buffer handling: set fh_End != 0 (to prepare for EOF hack in FGetS)
-        self.mem.access.w_s("fh_End", 1)
+        # setup idle char I/O buffer. fh_End != 0 prepares for EOF hack in FGetS
+        self.buf_mem = alloc.alloc_memory(FH_BUF_SIZE, label=name + "(Buf)")
+        self.buf_addr = self.buf_mem.addr
+        self.pos_addr = self.mem.addr + _FH_POS
+        self.end_addr = self.mem.addr + _FH_END
+        self.ram = alloc.get_mem()
+        self.ram.w32(self.mem.addr + _FH_BUF, self.buf_addr >> 2)
+        self.ram.w32(self.pos_addr, FH_BUF_NONE)
+        self.ram.w32(self.end_addr, FH_BUF_NONE)
         return self.b_addr
 
     def free_fh(self, alloc):
+        if self.buf_mem:
+            self.sync_buf()
+            alloc.free_memory(self.buf_mem)
+            self.buf_mem = None
         alloc.free_struct(self.mem)
 
+    # --- buffered char I/O ---
+
+    def sync_buf(self):
+        """write pending data of the buffer or return unread data and
+        set the buffer to idle"""
+        if not self.buf_mem:
+            return
+        ram = self.ram
+        pos = ram.r32(self.pos_addr)
+        end = ram.r32(self.end_addr)
+        eof_hack = end == 0
+        if eof_hack:
+            # 'endcli' replaced our fh_End
+            end = self.buf_end
+        if pos == FH_BUF_NONE:
+            return
+        if end == FH_BUF_NONE:
+            # write
+            if pos > 0:
+                self._write(ram.r_block(self.buf_addr, pos))
+        else:
+            # read
+            if pos > 0:
+                self.ch = ram.r8(self.buf_addr + pos - 1)
+            if pos < end:
+                self._unread(ram.r_block(self.buf_addr + pos, end - pos))
+        ram.w32(self.pos_addr, FH_BUF_NONE)
+        if not eof_hack:
+            ram.w32(self.end_addr, FH_BUF_NONE)
+        self.buf_end = FH_BUF_NONE
+        if self.write_bufs is not None:
+            self.write_bufs.discard(self)
+
+    def flush_buf(self):
+        """write pending data of a write buffer"""
+        if self.buf_mem and self.buf_end == FH_BUF_NONE:
+            self.sync_buf()
+
+    def buf_getc(self):
+        if not self.buf_mem:
+            return self.getc()
+        ram = self.ram
+        pos = ram.r32(self.pos_addr)
+        end = ram.r32(self.end_addr)
+        if end == 0:
+            return self.getc()
+        if end != FH_BUF_NONE and pos < end:
+            ram.w32(self.pos_addr, pos + 1)
+            return ram.r8(self.buf_addr + pos)
+        # refill buffer: either with pushed back chars or from the file
+        self.sync_buf()
+        if self.unch:
+            data = bytes(self.unch[:FH_BUF_SIZE])
+            del self.unch[:FH_BUF_SIZE]
+            self.buf_from_obj = False
+        else:
+            if self.is_nil:
+                return -1
+            data = self._read_some(FH_BUF_SIZE)
+            if not data:
+                return -1
+            self.buf_from_obj = True
+        ram.w_block(self.buf_addr, data)
+        ram.w32(self.pos_addr, 1)
+        ram.w32(self.end_addr, len(data))
+        self.buf_end = len(data)
+        self.ch = -1
+        return data[0]
+
+    def buf_putc(self, val):
+        ch = val & 0xFF
+        if not self.buf_mem:
+            self.write(bytes((ch,)))
+            return val
+        ram = self.ram
+        pos = ram.r32(self.pos_addr)
+        end = ram.r32(self.end_addr)
+        if end == 0:
+            self.write(bytes((ch,)))
+            return val
+        data = bytes((ch,))
+        if end == FH_BUF_NONE and pos != FH_BUF_NONE:
+            if pos < FH_BUF_SIZE and ch != 10:
+                ram.w8(self.buf_addr + pos, ch)
+                ram.w32(self.pos_addr, pos + 1)
+                return val
+            # buffer full or end of line: write it with the char
+            data = ram.r_block(self.buf_addr, pos) + data
+        else:
+            self.sync_buf()
+        self._write(data)
+        ram.w32(self.pos_addr, 0)
+        ram.w32(self.end_addr, FH_BUF_NONE)
+        if self.write_bufs is not None:
+            self.write_bufs.add(self)
+        return val
+
+    def buf_ungetc(self, var):
+        if not self.buf_mem:
+            return self.ungetc(var)
+        ram = self.ram
+        pos = ram.r32(self.pos_addr)
+        end = ram.r32(self.end_addr)
+        if end == 0:
+            return self.ungetc(var)
+        if end != FH_BUF_NONE and 0 < pos <= end:
+            ch = ram.r8(self.buf_addr + pos - 1)
+            if var == ch or var == 0xFFFFFFFF:
+                ram.w32(self.pos_addr, pos - 1)
+                return ch
+        self.sync_buf()
+        return self.ungetc(var)
+
+    def _unread(self, data):
+        # data came from the file: try to seek back
+        if self.buf_from_obj:
+            try:
+                if self.obj.seekable():
+                    self.obj.seek(-len(data), 1)
+                    return
+            except IOError:
+                pass
+        self.unch[0:0] = data
+
+    def _read_some(self, size):
+        # do not block on interactive input
+        read = getattr(self.obj, "read1", self.obj.read)
+        try:
+            return read(size)
+        except IOError:
+            return b""
+
+    def _write(self, data):
+        try:
+            self.obj.write(data)
+            if self.auto_flush:
+                self.obj.flush()
+        except IOError:
+            pass
+
     # --- file ops ---
 
     def write(self, data):
         assert isinstance(data, (bytes, bytearray))
+        self.sync_buf()
         try:
             self.obj.write(data)
             if self.auto_flush:
@@ -64,6 +248,7 @@ class FileHandle:
             return -1
 
     def read(self, len):
+        self.sync_buf()
         try:
             d = self.obj.read(len)
             return d
@@ -71,6 +256,7 @@ class FileHandle:
             return -1
 
     def getc(self):
+        self.sync_buf()
         if len(self.unch) > 0:
             self.ch = self.unch[0]
             del self.unch[0]
@@ -112,6 +298,7 @@ class FileHandle:
         return res.decode("latin-1")
 
     def ungetc(self, var):
+        self.sync_buf()
         if var == 0xFFFFFFFF:
             var = -1
         if var < 0 and self.ch >= 0:
@@ -122,28 +309,34 @@ class FileHandle:
         return var
 
     def ungets(self, s):
+        self.sync_buf()
         if isinstance(s, str):
             s = s.encode("latin-1")
         self.unch = self.unch + bytearray(s)
 
     def setbuf(self, s):
+        self.sync_buf()
         if isinstance(s, str):
             s = s.encode("latin-1")
         self.unch = bytearray(s)
 
     def getbuf(self):
+        self.sync_buf()
         return self.unch
 
     def tell(self):
+        self.sync_buf()
         return self.obj.tell()
 
     def seek(self, pos, whence):
+        self.sync_buf()
         try:
             self.obj.seek(pos, whence)
         except IOError:
             return -1
 
     def flush(self):
+        self.sync_buf()
         self.obj.flush()
 
     def is_interactive(self):
@@ -22,6 +22,8 @@ class FileManager:
         self.mem = mem
 
         self.files_by_b_addr = {}
+        # files with a char I/O buffer in write state
+        self.write_bufs = set()
 
         # get current umask
         self.umask = os.umask(0)
@@ -30,12 +32,12 @@ class FileManager:
         # setup ports
         # currently we use a single fake port for all devices
         self.fs_handler_port = port_mgr.create_port("FakeFSPort", self.fs_put_msg)
-        log_file.info("dos fs handler port: %06x" % self.fs_handler_port)
+        log_file.info("dos fs handler port: %06x", self.fs_handler_port)
         # create console handler
         self.console_handler_port = port_mgr.create_port(
             "ConsolePort", self.console_put_msg
         )
-        log_file.info("dos console port: %06x" % self.console_handler_port)
+        log_file.info("dos console port: %06x", self.console_handler_port)
 
         # setup std input/output
         self.std_input = self._create_stdin_fh()
@@ -69,9 +71,9 @@ class FileManager:
         return self.console_handler_port
 
     def _register_file(self, fh):
-        baddr = fh.alloc_fh(self.alloc, self.fs_handler_port)
+        baddr = fh.alloc_fh(self.alloc, self.fs_handler_port, self.write_bufs)
         self.files_by_b_addr[baddr] = fh
-        log_file.info("registered: %s" % fh)
+        log_file.info("registered: %s", fh)
 
     def _unregister_file(self, fh):
         if fh.b_addr in self.files_by_b_addr:
@@ -81,7 +83,7 @@ class FileManager:
         else:
             raise ValueError("Invalid File to unregister: %s" % fh)
         del self.files_by_b_addr[fh.b_addr]
-        log_file.info("unregistered: %s" % fh)
+        log_file.info("unregistered: %s", fh)
         fh.free_fh(self.alloc)
 
     def get_input(self):
@@ -111,11 +113,12 @@ class FileManager:
                     lock, ami_path, searchMulti=True
                 )
                 if sys_path == None:
-                    log_file.info("file not found: '%s' -> '%s'" % (ami_path, sys_path))
+                    log_file.info("file not found: '%s' -> '%s'", ami_path, sys_path)
                     return None
 
                 # make some checks on existing file
-                if os.path.exists(sys_path):
+                exists = os.path.exists(sys_path)
+                if exists:
                     # if not writeable -> no append mode
                     if f_mode == "rwb+":
                         f_mode = "rb+"
@@ -128,18 +131,22 @@ class FileManager:
                         f_mode = "wb+"
 
                 log_file.debug(
-                    "opening file: '%s' -> '%s' f_mode=%s"
-                    % (ami_path, sys_path, f_mode)
+                    "opening file: '%s' -> '%s' f_mode=%s", ami_path, sys_path, f_mode
                 )
                 fobj = open(sys_path, f_mode)
+                if not exists:
+                    self.path_mgr.invalidate_sys_path(sys_path)
                 fh = FileHandle(fobj, ami_path, sys_path)
 
             self._register_file(fh)
             return fh
         except IOError as e:
             log_file.info(
-                "error opening: '%s' -> '%s' f_mode=%s -> %s"
-                % (ami_path, sys_path, f_mode, e)
+                "error opening: '%s' -> '%s' f_mode=%s -> %s",
+                ami_path,
+                sys_path,
+                f_mode,
+                e,
             )
             return None
 
@@ -149,6 +156,11 @@ class FileManager:
         if fh not in (self.std_input, self.std_output):
             self._unregister_file(fh)
 
+    def flush_bufs(self):
+        """write pending char output of all files, e.g. a prompt before input"""
+        for fh in list(self.write_bufs):
+            fh.flush_buf()
+
     def get_by_b_addr(self, b_addr, for_writing=None):
         if b_addr == 0:
             return None
@@ -168,37 +180,40 @@ class FileManager:
     def delete(self, lock, ami_path):
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
         if sys_path == None or not os.path.exists(sys_path):
-            log_file.info("file to delete not found: '%s'" % (ami_path))
+            log_file.info("file to delete not found: '%s'", ami_path)
             return ERROR_OBJECT_NOT_FOUND
         try:
             if os.path.isdir(sys_path):
                 os.rmdir(sys_path)
             else:
                 os.remove(sys_path)
+            self.path_mgr.invalidate_sys_path(sys_path)
             return 0
         except OSError as e:
             if e.errno == errno.ENOTEMPTY:  # Directory not empty
-                log_file.info("can't delete directory: '%s' -> not empty!" % (ami_path))
+                log_file.info("can't delete directory: '%s' -> not empty!", ami_path)
                 return ERROR_DIRECTORY_NOT_EMPTY
             else:
-                log_file.info("can't delete file: '%s' -> %s" % (ami_path, e))
+                log_file.info("can't delete file: '%s' -> %s", ami_path, e)
                 return ERROR_OBJECT_IN_USE
 
     def rename(self, lock, old_ami_path, new_ami_path):
         old_sys_path = self.path_mgr.ami_to_sys_path(lock, old_ami_path)
         new_sys_path = self.path_mgr.ami_to_sys_path(lock, new_ami_path)
         if old_sys_path == None or not os.path.exists(old_sys_path):
-            log_file.info("old file to rename not found: '%s'" % old_ami_path)
+            log_file.info("old file to rename not found: '%s'", old_ami_path)
             return ERROR_OBJECT_NOT_FOUND
         if new_sys_path == None:
-            log_file.info("new file to rename not found: '%s'" % new_ami_path)
+            log_file.info("new file to rename not found: '%s'", new_ami_path)
             return ERROR_OBJECT_NOT_FOUND
         try:
             os.rename(old_sys_path, new_sys_path)
+            self.path_mgr.invalidate_sys_path(old_sys_path)
+            self.path_mgr.invalidate_sys_path(new_sys_path)
             return 0
         except OSError as e:
             log_file.info(
-                "can't rename file: '%s','%s' -> %s" % (old_ami_path, new_ami_path, e)
+                "can't rename file: '%s','%s' -> %s", old_ami_path, new_ami_path, e
             )
             return ERROR_OBJECT_IN_USE
 
@@ -244,6 +259,7 @@ class FileManager:
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
         try:
             os.mkdir(sys_path)
+            self.path_mgr.invalidate_sys_path(sys_path)
             return NO_ERROR
         except OSError:
             return ERROR_OBJECT_EXISTS
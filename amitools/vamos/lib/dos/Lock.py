@@ -1,15 +1,46 @@
 import os
 import stat
+import struct
 import uuid
 
 from amitools.vamos.log import log_lock
 
-from amitools.vamos.astructs import AccessStruct
-from amitools.vamos.libstructs import FileLockStruct, DateStampStruct
+from amitools.vamos.libstructs import (
+    FileLockStruct,
+    FileInfoBlockStruct,
+    ExAllDataStruct,
+)
 from .DosProtection import DosProtection
 from .AmiTime import *
 from .Error import *
 
+# FileInfoBlock without fib_Reserved
+FIB_FORMAT = struct.Struct(">Ii108siiIiiii80sHH")
+assert FIB_FORMAT.size == FileInfoBlockStruct.sdef.fib_Reserved.offset
+
+# ExAll() data types
+ED_NAME = 1
+ED_TYPE = 2
+ED_SIZE = 3
+ED_PROTECTION = 4
+ED_DATE = 5
+ED_COMMENT = 6
+ED_OWNER = 7
+
+# ExAllData: all fields. a data type only uses the first ones
+EXALL_FORMAT = struct.Struct(">IIiIIIIIIHH")
+assert EXALL_FORMAT.size == ExAllDataStruct.get_byte_size()
+EXALL_SIZES = (
+    None,
+    ExAllDataStruct.sdef.ed_Type.offset,
+    ExAllDataStruct.sdef.ed_Size.offset,
+    ExAllDataStruct.sdef.ed_Prot.offset,
+    ExAllDataStruct.sdef.ed_Days.offset,
+    ExAllDataStruct.sdef.ed_Comment.offset,
+    ExAllDataStruct.sdef.ed_OwnerUID.offset,
+    ExAllDataStruct.get_byte_size(),
+)
+
 
 class Lock:
     """represent an AmigaOS Lock in vamos"""
@@ -24,6 +55,7 @@ class Lock:
         self.vol_addr = 0
         self.key = 0
         self.dirent = None
+        self.exall_dirent = None
 
     def __repr__(self):
         addr = 0
@@ -54,67 +86,64 @@ class Lock:
 
     # --- lock ops ---
 
-    def _examine_file(self, fib_mem, name, sys_path, key):
-        # name
-        name_addr = fib_mem.s_get_addr("fib_FileName")
-        # clear 32 name bytes
-        mem = fib_mem.mem
-        mem.clear_block(name_addr, 32, 0)
-        mem.w_cstr(name_addr, name)
-        # comment
-        comment_addr = fib_mem.s_get_addr("fib_Comment")
-        mem.w_cstr(comment_addr, "")
-        # create the "inode" information
-        fib_mem.w_s("fib_DiskKey", key)
-        log_lock.debug("examine key: %08x", key)
+    def _get_info(self, name, sys_path, os_stat):
+        """return (type, prot, size, blocks, ami_time) of a stat result"""
+        mode = os_stat.st_mode
         # type
-        if os.path.isdir(sys_path):
+        if stat.S_ISDIR(mode):
             dirEntryType = 2
         else:
             dirEntryType = -3
-        fib_mem.w_s("fib_DirEntryType", dirEntryType)
-        fib_mem.w_s("fib_EntryType", dirEntryType)
         # protection
         prot = DosProtection(0)
-        try:
-            os_stat = os.stat(sys_path)
-            mode = os_stat.st_mode
-            if mode & stat.S_IXUSR == 0:
-                prot.clr(DosProtection.FIBF_EXECUTE)
-            if mode & stat.S_IRUSR == 0:
-                prot.clr(DosProtection.FIBF_READ)
-            if mode & stat.S_IWUSR == 0:
-                prot.clr(DosProtection.FIBF_WRITE)
-            log_lock.debug("examine lock: '%s' mode=%03o: prot=%s", name, mode, prot)
-        except OSError:
-            return ERROR_OBJECT_IN_USE
-        fib_mem.w_s("fib_Protection", prot.mask)
+        if mode & stat.S_IXUSR == 0:
+            prot.clr(DosProtection.FIBF_EXECUTE)
+        if mode & stat.S_IRUSR == 0:
+            prot.clr(DosProtection.FIBF_READ)
+        if mode & stat.S_IWUSR == 0:
+            prot.clr(DosProtection.FIBF_WRITE)
+        log_lock.debug("examine lock: '%s' mode=%03o: prot=%s", name, mode, prot)
         # size
-        if os.path.isfile(sys_path):
-            size = os.path.getsize(sys_path)
+        if stat.S_ISREG(mode):
             # limit to 32bit
-            if size > 0xFFFFFFFF:
-                size = 0xFFFFFFFF
-            fib_mem.w_s("fib_Size", size)
+            size = min(os_stat.st_size, 0xFFFFFFFF)
             blocks = (size + 511) // 512
-            fib_mem.w_s("fib_NumBlocks", blocks)
             log_lock.debug(
                 "examine lock: '%s' size=%d, blocks=%d", sys_path, size, blocks
             )
         else:
-            fib_mem.w_s("fib_NumBlocks", 1)
+            size = 0
+            blocks = 1
             log_lock.debug("examine lock: '%s' no file", sys_path)
         # date (use mtime here)
-        date_addr = fib_mem.s_get_addr("fib_Date")
-        date = AccessStruct(fib_mem.mem, DateStampStruct, date_addr)
-        t = os.path.getmtime(sys_path)
-        at = sys_to_ami_time(t)
-        date.w_s("ds_Days", at.tday)
-        date.w_s("ds_Minute", at.tmin)
-        date.w_s("ds_Tick", at.tick)
-        # fill in UID/GID
-        fib_mem.w_s("fib_OwnerUID", 0)
-        fib_mem.w_s("fib_OwnerGID", 0)
+        at = sys_to_ami_time(os_stat.st_mtime)
+        return dirEntryType, prot.mask, size, blocks, at
+
+    def _examine_file(self, fib_mem, name, sys_path, key, os_stat=None):
+        log_lock.debug("examine key: %08x", key)
+        try:
+            if os_stat is None:
+                os_stat = os.stat(sys_path)
+        except OSError:
+            return ERROR_OBJECT_IN_USE
+        dirEntryType, prot, size, blocks, at = self._get_info(name, sys_path, os_stat)
+        # write all fields up to the reserved ones in one go
+        data = FIB_FORMAT.pack(
+            key,
+            dirEntryType,
+            name.encode("latin-1")[:107],
+            prot,
+            dirEntryType,
+            size,
+            blocks,
+            at.tday,
+            at.tmin,
+            at.tick,
+            b"",
+            0,
+            0,
+        )
+        fib_mem.mem.w_block(fib_mem.s_get_addr("fib_DiskKey"), data)
         return NO_ERROR
 
     def examine_lock(self, fib_mem):
@@ -123,10 +152,11 @@ class Lock:
     def examine_next(self, fib_mem):
         # start scan
         if self.dirent is None:
-            # scan real dir
-            if os.path.isdir(self.sys_path):
-                self.dirent = os.listdir(self.sys_path)
-            else:
+            # scan real dir. the entries keep their stat result
+            try:
+                with os.scandir(self.sys_path) as it:
+                    self.dirent = list(it)
+            except OSError:
                 self.dirent = []
             # assume that key stored in given FIB is my own one
             # (otherwise no Examine() on my lock was done before..., aka broken code!)
@@ -137,12 +167,131 @@ class Lock:
 
         if index < len(self.dirent):
             entry = self.dirent[index]
-            e_path = os.path.join(self.sys_path, entry)
-            return self._examine_file(fib_mem, entry, e_path, index + 1)
+            try:
+                os_stat = entry.stat()
+            except OSError:
+                os_stat = None
+            return self._examine_file(
+                fib_mem, entry.name, entry.path, index + 1, os_stat
+            )
         else:
             self.dirent = None
             return ERROR_NO_MORE_ENTRIES
 
+    def examine_all(
+        self, mem, buf_addr, buf_size, data_type, last_key, match=None, hook=None
+    ):
+        """fill the buffer with ExAllData records of the dir entries.
+
+        The dir is scanned once on the first call (last_key == 0) and the
+        following calls continue with the entry given by last_key. The
+        records are packed on the host and written in one block unless a
+        hook has to see each record in memory. match(name) and
+        hook(rec_addr) filter the entries.
+
+        Return (err, num_entries, last_key). err is NO_ERROR if more entries
+        are pending and ERROR_NO_MORE_ENTRIES if the scan is done.
+        """
+        if data_type < ED_NAME or data_type > ED_OWNER:
+            return ERROR_BAD_NUMBER, 0, 0
+        if last_key == 0:
+            try:
+                with os.scandir(self.sys_path) as it:
+                    self.exall_dirent = list(it)
+            except NotADirectoryError:
+                return ERROR_OBJECT_WRONG_TYPE, 0, 0
+            except OSError:
+                self.exall_dirent = []
+            index = 0
+        elif self.exall_dirent is None:
+            # scan was ended already. don't restart and repeat the entries
+            return ERROR_NO_MORE_ENTRIES, 0, 0
+        else:
+            index = last_key
+        dirent = self.exall_dirent
+        fixed_size = EXALL_SIZES[data_type]
+        with_comment = data_type >= ED_COMMENT
+        buf = bytearray()
+        last_pos = None
+        num = 0
+        while index < len(dirent):
+            entry = dirent[index]
+            name = entry.name
+            if match and not match(name):
+                index += 1
+                continue
+            name_data = name.encode("latin-1")[:107] + b"\0"
+            # fixed part, name and the empty comment. keep records aligned
+            rec_size = fixed_size + len(name_data)
+            if with_comment:
+                rec_size += 1
+            rec_size = (rec_size + 3) & ~3
+            if len(buf) + rec_size > buf_size:
+                break
+            try:
+                os_stat = entry.stat()
+            except OSError:
+                index += 1
+                continue
+            dirEntryType, prot, size, _, at = self._get_info(name, entry.path, os_stat)
+            rec_addr = buf_addr + len(buf)
+            name_addr = rec_addr + fixed_size
+            if with_comment:
+                comment_addr = name_addr + len(name_data)
+            else:
+                comment_addr = 0
+            rec = bytearray(
+                EXALL_FORMAT.pack(
+                    0,
+                    name_addr,
+                    dirEntryType,
+                    size,
+                    prot,
+                    at.tday,
+                    at.tmin,
+                    at.tick,
+                    comment_addr,
+                    0,
+                    0,
+                )[:fixed_size]
+            )
+            rec += name_data
+            rec += bytes(rec_size - len(rec))
+            index += 1
+            if hook:
+                mem.w_block(rec_addr, rec)
+                if not hook(rec_addr):
+                    continue
+            # link the previous record to this one
+            if last_pos is not None:
+                struct.pack_into(">I", buf, last_pos, rec_addr)
+                if hook:
+                    mem.w32(buf_addr + last_pos, rec_addr)
+            last_pos = len(buf)
+            buf += rec
+            num += 1
+        if buf and not hook:
+            mem.w_block(buf_addr, buf)
+        log_lock.debug(
+            "examine all: '%s' type=%d entries=%d next=%d/%d",
+            self.name,
+            data_type,
+            num,
+            index,
+            len(dirent),
+        )
+        if index >= len(dirent):
+            self.exall_dirent = None
+            return ERROR_NO_MORE_ENTRIES, num, 0
+        if num == 0 and index == last_key:
+            # not even a single entry fits into the buffer
+            self.exall_dirent = None
+            return ERROR_NO_FREE_STORE, 0, 0
+        return NO_ERROR, num, index
+
+    def examine_all_end(self):
+        self.exall_dirent = None
+
     def _check_disk_key(self, fib_mem):
         # make sure its a dir entry
         dirEntryType = fib_mem.r_s("fib_DirEntryType")
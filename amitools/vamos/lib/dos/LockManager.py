@@ -88,11 +88,11 @@ class LockManager:
         # register lock in key (with baddr allocated above)
         lock_key.add_lock(lock)
 
-        log_lock.info("registered: %s" % lock)
+        log_lock.info("registered: %s", lock)
         return lock
 
     def _unregister_lock(self, lock):
-        log_lock.info("unregistered: %s" % lock)
+        log_lock.info("unregistered: %s", lock)
         # fetch key and lock_key
         slot_id = lock.key
         lock_key = self.keys[slot_id]
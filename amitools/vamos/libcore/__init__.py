@@ -1,5 +1,6 @@
 from .impl import LibImpl, LibImplScanner, LibImplScan, LibImplFunc, LibImplFuncArg
 from .registry import LibRegistry
+from .regs import LibRegs
 from .ctx import LibCtx
 from .stub import LibStub, LibStubGen
 from .proxy import LibProxy, LibProxyGen
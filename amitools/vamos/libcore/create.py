@@ -5,6 +5,7 @@ from .vlib import VLib
 from .stub import LibStubGen
 from .patch import LibPatcherMultiTrap
 from .impl import LibImplScanner
+from amitools.vamos.libnative import NativeFastFuncs
 
 
 class LibCreator(object):
@@ -106,10 +107,29 @@ class LibCreator(object):
         # patcher
         patcher = LibPatcherMultiTrap(self.alloc, self.traps, stub)
         patcher.patch_jump_table(addr)
-        # fix lib sum
-        library.update_sum()
+        # replace pure compute funcs with native code?
+        if impl and lib_cfg and lib_cfg.native_funcs:
+            native_funcs = NativeFastFuncs(self.alloc)
+            native_funcs.install(name, addr, fd)
+        else:
+            native_funcs = None
         # create vamos lib and combine all pieces
         vlib = VLib(
-            library, info, struct, fd, impl, stub, ctx, patcher, profile, is_dev
+            library,
+            info,
+            struct,
+            fd,
+            impl,
+            stub,
+            ctx,
+            patcher,
+            profile,
+            is_dev,
+            native_funcs,
         )
+        # native code of the impl would bypass logging and profiling
+        if native_funcs and not self.stub_gen.log_valid and not profile:
+            impl.setup_native(ctx, addr)
+        # fix lib sum
+        library.update_sum()
         return vlib
@@ -1,3 +1,6 @@
+from .regs import LibRegs
+
+
 class LibCtx(object):
     """the default context a library receives"""
 
@@ -5,6 +8,7 @@ class LibCtx(object):
         self.machine = machine
         self.cpu = machine.get_cpu()
         self.mem = machine.get_mem()
+        self.regs = LibRegs(self.cpu)
         # will be set on creation
         self.vlib = None
 
@@ -21,6 +21,14 @@ class LibImpl(object):
     def finish_lib(self, ctx):
         pass
 
+    def setup_native(self, ctx, base_addr):
+        """replace functions in the jump table with native code.
+
+        Only called with 'native_funcs' enabled and if neither call logging
+        nor profiling is active. Remove the code in finish_lib().
+        """
+        pass
+
     def open_lib(self, ctx, open_cnt):
         pass
 
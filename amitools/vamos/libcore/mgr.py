@@ -64,7 +64,7 @@ class VLibManager(object):
         self.ctx_map[name] = ctx
         self._add_ctx_extra_attr(ctx)
 
-    def bootstrap_exec(self, exec_info=None, version=0, revision=0):
+    def bootstrap_exec(self, exec_info=None, version=0, revision=0, lib_cfg=None):
         """setup exec library"""
         if exec_info is None:
             date = datetime.date(day=7, month=7, year=2007)
@@ -72,7 +72,7 @@ class VLibManager(object):
         # make sure its an exec info
         assert exec_info.get_name() == "exec.library"
         # create vlib
-        vlib = self._create_vlib(exec_info, False)
+        vlib = self._create_vlib(exec_info, False, lib_cfg)
         assert vlib
         assert vlib.impl
         # setup exec_lib
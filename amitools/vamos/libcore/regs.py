@@ -0,0 +1,114 @@
+from amitools.vamos.machine.regs import REG_D0, REG_D1, str_to_reg_map
+
+
+class LibRegs(object):
+    """batched access to the CPU registers for library implementations.
+
+    A library call usually needs a fixed set of argument registers. Readers
+    and writers for a register set are generated once with all accesses
+    unrolled and are cached. So a call site fetches all its registers with
+    a single call and the stub generator can reuse the generated code.
+    """
+
+    ALL_REGS = tuple(range(16))
+
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self.readers = {}
+        self.writers = {}
+
+    @staticmethod
+    def get_fd_regs(fd_func):
+        """return the register numbers of the args of a fd function"""
+        regs = []
+        fd_args = fd_func.get_args()
+        if fd_args:
+            for arg_name, arg_reg in fd_args:
+                regs.append(str_to_reg_map["REG_" + arg_reg.upper()])
+        return tuple(regs)
+
+    def gen_read_exprs(self, regs):
+        """return the source expressions to read the given registers.
+        the code expects the name 'r_reg' to be bound by gen_env()
+        """
+        return ["r_reg(%d)" % reg for reg in regs]
+
+    def gen_result_code(self, res_name, indent=""):
+        """return source lines that store a lib call result in D0 (and D1)"""
+        return [
+            indent + "if %s is not None:" % res_name,
+            indent + "    if type(%s) in tuple_types:" % res_name,
+            indent + "        w_reg(%d, %s[0] & 0xFFFFFFFF)" % (REG_D0, res_name),
+            indent + "        w_reg(%d, %s[1] & 0xFFFFFFFF)" % (REG_D1, res_name),
+            indent + "    else:",
+            indent + "        w_reg(%d, %s & 0xFFFFFFFF)" % (REG_D0, res_name),
+        ]
+
+    def gen_env(self):
+        """return the names used by the generated code"""
+        cpu = self.cpu
+        return {"r_reg": cpu.r_reg, "w_reg": cpu.w_reg, "tuple_types": (list, tuple)}
+
+    def _compile(self, name, lines):
+        env = self.gen_env()
+        src = "\n".join(lines) + "\n"
+        exec(compile(src, "<regs %s>" % name, "exec"), env)
+        return env[name]
+
+    def get_reader(self, regs):
+        """return a function that reads the given registers as a tuple"""
+        regs = tuple(regs)
+        reader = self.readers.get(regs)
+        if reader is None:
+            exprs = self.gen_read_exprs(regs)
+            lines = ["def reader():", "    return (%s,)" % ", ".join(exprs)]
+            if not regs:
+                lines[1] = "    return ()"
+            reader = self._compile("reader", lines)
+            self.readers[regs] = reader
+        return reader
+
+    def get_writer(self, regs):
+        """return a function that writes its args to the given registers"""
+        regs = tuple(regs)
+        writer = self.writers.get(regs)
+        if writer is None:
+            args = ["v%d" % num for num in range(len(regs))]
+            lines = ["def writer(%s):" % ", ".join(args)]
+            for reg, arg in zip(regs, args):
+                lines.append("    w_reg(%d, %s)" % (reg, arg))
+            if not regs:
+                lines.append("    pass")
+            writer = self._compile("writer", lines)
+            self.writers[regs] = writer
+        return writer
+
+    def get_fd_reader(self, fd_func):
+        """return a function that reads all args of the fd function"""
+        return self.get_reader(self.get_fd_regs(fd_func))
+
+    def read(self, *regs):
+        """read the given registers and return a tuple of values"""
+        reader = self.readers.get(regs)
+        if reader is None:
+            reader = self.get_reader(regs)
+        return reader()
+
+    def read_all(self):
+        """read the full register file: D0-D7, A0-A7"""
+        return self.get_reader(self.ALL_REGS)()
+
+    def read_args(self, fd_func):
+        """read the arg registers of the fd function"""
+        return self.get_fd_reader(fd_func)()
+
+    def write(self, regs, values):
+        """write the values to the given registers"""
+        self.get_writer(regs)(*values)
+
+    def set_result(self, d0, d1=None):
+        """store the result of a lib call"""
+        if d1 is None:
+            self.cpu.w_reg(REG_D0, d0 & 0xFFFFFFFF)
+        else:
+            self.get_writer((REG_D0, REG_D1))(d0 & 0xFFFFFFFF, d1 & 0xFFFFFFFF)
@@ -60,10 +60,14 @@ class LibStubGen(object):
     """the lib stub generator scans a lib impl and creates stubs for all
     methods found there"""
 
-    def __init__(self, log_missing=None, log_valid=None, ignore_invalid=True):
+    def __init__(
+        self, log_missing=None, log_valid=None, ignore_invalid=True, compile_funcs=True
+    ):
         self.log_missing = log_missing
         self.log_valid = log_valid
         self.ignore_invalid = ignore_invalid
+        # compile specialized stub funcs if no logging or profiling is active
+        self.compile_funcs = compile_funcs
 
     def gen_fake_stub(self, name, fd, ctx, profile=None):
         """a fake stub exists without an implementation and only contains
@@ -241,6 +245,44 @@ class LibStubGen(object):
 
         return base_func
 
+    def _gen_compiled_func(self, stub, fd_func, method, ctx, extra_args):
+        """compile a specialized function from generated source that reads
+        all argument registers and writes the return registers directly.
+
+        The resulting function does the same as the base funcs above but
+        without looping over args or calling nested closures.
+        """
+        # register access code is generated by the regs helper of the ctx
+        regs = ctx.regs
+        env = regs.gen_env()
+        env["method"] = method
+        env["ctx"] = ctx
+        # unroll argument register reads
+        call_args = ["ctx"]
+        if extra_args:
+            arg_regs = [arg.reg for arg in extra_args]
+            read_exprs = regs.gen_read_exprs(arg_regs)
+            for num, arg in enumerate(extra_args):
+                if arg.type is int:
+                    call_args.append(read_exprs[num])
+                else:
+                    # bind to type
+                    type_name = "arg_type%d" % num
+                    env[type_name] = arg.type
+                    call_args.append(
+                        "%s(cpu=ctx.cpu, reg=%d, mem=ctx.mem)" % (type_name, arg.reg)
+                    )
+        lines = [
+            "def stub_func(this, *args, **kwargs):",
+            "    res = method(%s)" % ", ".join(call_args),
+        ]
+        lines += regs.gen_result_code("res", "    ")
+        lines.append("    return res")
+        src = "\n".join(lines) + "\n"
+        file_name = "<stub %s:%s>" % (stub.name, fd_func.get_name())
+        exec(compile(src, file_name, "exec"), env)
+        return env["stub_func"]
+
     def _gen_log_func(selgf, stub, fd_func, base_func, ctx, log):
         """wrap the base function with logging."""
         name = fd_func.get_name()
@@ -292,13 +334,18 @@ class LibStubGen(object):
         # do we need to read some registers into extra args?
         method = impl_func.method
         extra_args = impl_func.extra_args
+
+        # no extra features: use a compiled func
+        log = self.log_valid
+        if self.compile_funcs and not log and not profile:
+            return self._gen_compiled_func(stub, fd_func, method, ctx, extra_args)
+
         if extra_args:
             func = self._gen_base_extra_args_func(method, ctx, extra_args)
         else:
             func = self._gen_base_func(method, ctx)
 
         # wrap around logging method?
-        log = self.log_valid
         if log:
             func = self._gen_log_func(stub, fd_func, func, ctx, log)
 
@@ -16,6 +16,7 @@ class VLib(object):
         patcher,
         profile=None,
         is_dev=False,
+        native_funcs=None,
     ):
         self.library = library
         self.info = info
@@ -27,6 +28,7 @@ class VLib(object):
         self.patcher = patcher
         self.profile = profile
         self.is_dev = is_dev
+        self.native_funcs = native_funcs
         self._setup()
 
     def get_library(self):
@@ -79,6 +81,9 @@ class VLib(object):
             self.impl.finish_lib(self.ctx)
         # cleanup patcher
         self.patcher.cleanup()
+        if self.native_funcs:
+            self.native_funcs.cleanup()
+            self.native_funcs = None
         # free library memory
         self.library.free()
         # clear members but leave alone ctx and profile
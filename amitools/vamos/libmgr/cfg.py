@@ -24,7 +24,12 @@ class LibCfg(object):
     )
 
     def __init__(
-        self, create_mode=None, force_version=None, expunge_mode=None, num_fake_funcs=0
+        self,
+        create_mode=None,
+        force_version=None,
+        expunge_mode=None,
+        num_fake_funcs=0,
+        native_funcs=False,
     ):
         # set defaults
         if create_mode is None:
@@ -40,6 +45,7 @@ class LibCfg(object):
         self.force_version = force_version
         self.expunge_mode = expunge_mode
         self.num_fake_funcs = num_fake_funcs
+        self.native_funcs = native_funcs
 
     @classmethod
     def from_dict(cls, cfg):
@@ -47,7 +53,10 @@ class LibCfg(object):
         force_version = cfg.version
         expunge_mode = cfg.expunge
         num_fake_funcs = cfg.num_fake_funcs
-        return cls(create_mode, force_version, expunge_mode, num_fake_funcs)
+        native_funcs = cfg.get("native_funcs", False)
+        return cls(
+            create_mode, force_version, expunge_mode, num_fake_funcs, native_funcs
+        )
 
     def get_create_mode(self):
         return self.create_mode
@@ -61,12 +70,16 @@ class LibCfg(object):
     def get_num_fake_funcs(self):
         return self.num_fake_funcs
 
+    def get_native_funcs(self):
+        return self.native_funcs
+
     def __eq__(self, other):
         return (
             self.create_mode == other.create_mode
             and self.force_version == other.force_version
             and self.expunge_mode == other.expunge_mode
             and self.num_fake_funcs == other.num_fake_funcs
+            and self.native_funcs == other.native_funcs
         )
 
     def __ne__(self, other):
@@ -75,17 +88,20 @@ class LibCfg(object):
             or self.force_version != other.force_version
             or self.expunge_mode != other.expunge_mode
             or self.num_fake_funcs != other.num_fake_funcs
+            or self.native_funcs != other.native_funcs
         )
 
     def __repr__(self):
         return (
             "LibCfg(create_mode=%s,"
-            " force_version=%s, expunge_mode=%s, num_fake_funcs=%d)"
+            " force_version=%s, expunge_mode=%s, num_fake_funcs=%d,"
+            " native_funcs=%s)"
             % (
                 self.create_mode,
                 self.force_version,
                 self.expunge_mode,
                 self.num_fake_funcs,
+                self.native_funcs,
             )
         )
 
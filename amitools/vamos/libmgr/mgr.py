@@ -52,7 +52,7 @@ class LibManager(object):
         if force_version is not None:
             version = force_version
             log_libmgr.info("exec: force version: %s", version)
-        return self.vlib_mgr.bootstrap_exec(exec_info, version)
+        return self.vlib_mgr.bootstrap_exec(exec_info, version, lib_cfg=lib_cfg)
 
     def shutdown(self, run_sp=None):
         """cleanup libs
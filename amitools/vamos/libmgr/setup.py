@@ -1,7 +1,7 @@
 from amitools.vamos.lib.lexec.ExecLibCtx import ExecLibCtx
 from amitools.vamos.lib.dos.DosLibCtx import DosLibCtx
 from amitools.vamos.lib.LibList import vamos_libs
-from amitools.vamos.loader import SegmentLoader
+from amitools.vamos.loader import SegmentLoader, PCSampleProfiler, BinImageCache
 from amitools.vamos.log import log_libmgr
 from .cfg import LibMgrCfg
 from .mgr import LibManager
@@ -9,7 +9,14 @@ from .mgr import LibManager
 
 class SetupLibManager(object):
     def __init__(
-        self, machine, mem_map, scheduler, path_mgr, lib_cfg=None, main_profiler=None
+        self,
+        machine,
+        mem_map,
+        scheduler,
+        path_mgr,
+        lib_cfg=None,
+        main_profiler=None,
+        bin_cache_dir=None,
     ):
         self.machine = machine
         self.mem_map = mem_map
@@ -18,11 +25,13 @@ class SetupLibManager(object):
         self.alloc = mem_map.get_alloc()
         self.lib_mgr_cfg = lib_cfg
         self.main_profiler = main_profiler
+        self.bin_cache_dir = bin_cache_dir
         # state
         self.seg_loader = None
         self.exec_ctx = None
         self.dos_ctx = None
         self.lib_mgr = None
+        self.pc_profiler = None
 
     def parse_config(self, cfg):
         if not cfg:
@@ -35,7 +44,12 @@ class SetupLibManager(object):
         if self.lib_mgr_cfg is None:
             self.lib_mgr_cfg = LibMgrCfg()
         # create segment loader
-        self.seg_loader = SegmentLoader(self.alloc, self.path_mgr)
+        bin_cache = BinImageCache(cache_dir=self.bin_cache_dir)
+        self.seg_loader = SegmentLoader(self.alloc, self.path_mgr, bin_cache)
+        # sample the pc of code in the loaded seglists
+        if self.main_profiler:
+            self.pc_profiler = PCSampleProfiler(self.machine, self.seg_loader)
+            self.main_profiler.add_profiler(self.pc_profiler)
         # setup contexts
         odg_base = self.mem_map.get_old_dos_guard_base()
         # create lib mgr
@@ -5,3 +5,4 @@ from .libfuncs import LibFuncs
 from .initresident import InitRes
 from .loader import LibLoader
 from .mgr import ALibManager
+from .fastfuncs import NativeFastFuncs
@@ -0,0 +1,175 @@
+from amitools.vamos.log import log_lib
+from .makefuncs import MakeFuncs
+
+# CopyMem(source=a0, dest=a1, size=d0)
+# copy longs if both pointers are even and the rest with bytes
+code_copy_mem = (
+    0x2208,  # move.l a0,d1
+    0x0801,  # btst #0,d1
+    0x0000,
+    0x661A,  # bne.s bytes
+    0x2209,  # move.l a1,d1
+    0x0801,  # btst #0,d1
+    0x0000,
+    0x6612,  # bne.s bytes
+    0x2200,  # move.l d0,d1
+    0xE489,  # lsr.l #2,d1
+    0x6706,  # beq.s rest
+    0x22D8,  # longs: move.l (a0)+,(a1)+
+    0x5381,  # subq.l #1,d1
+    0x66FA,  # bne.s longs
+    0x0280,  # rest: andi.l #3,d0
+    0x0000,
+    0x0003,
+    0x4A80,  # bytes: tst.l d0
+    0x6706,  # beq.s done
+    0x12D8,  # loop: move.b (a0)+,(a1)+
+    0x5380,  # subq.l #1,d0
+    0x66FA,  # bne.s loop
+    0x4E75,  # done: rts
+)
+
+# UMult32(arg1=d0, arg2=d1) and SMult32(): lower 32 bits of the product
+# d0 = lo(a)*lo(b) + ((hi(a)*lo(b) + lo(a)*hi(b)) << 16)
+code_mult32 = (
+    0x2042,  # movea.l d2,a0
+    0x2240,  # movea.l d0,a1
+    0x2401,  # move.l d1,d2
+    0x4842,  # swap d2
+    0xC4C0,  # mulu.w d0,d2
+    0x4840,  # swap d0
+    0xC0C1,  # mulu.w d1,d0
+    0xD042,  # add.w d2,d0
+    0x4840,  # swap d0
+    0x4240,  # clr.w d0
+    0x2409,  # move.l a1,d2
+    0xC4C1,  # mulu.w d1,d2
+    0xD082,  # add.l d2,d0
+    0x2408,  # move.l a0,d2
+    0x4E75,  # rts
+)
+
+# UDivMod32(dividend=d0, divisor=d1): d0=quotient, d1=remainder
+# shift and subtract division
+code_udivmod32 = (
+    0x2042,  # movea.l d2,a0
+    0x2241,  # movea.l d1,a1
+    0x7200,  # moveq #0,d1
+    0x741F,  # moveq #31,d2
+    0xD080,  # loop: add.l d0,d0
+    0xD381,  # addx.l d1,d1
+    0x6504,  # bcs.s sub
+    0xB289,  # cmp.l a1,d1
+    0x6504,  # bcs.s next
+    0x9289,  # sub: sub.l a1,d1
+    0x5280,  # addq.l #1,d0
+    0x51CA,  # next: dbra d2,loop
+    0xFFF0,
+    0x2408,  # move.l a0,d2
+    0x4E75,  # rts
+)
+
+# SDivMod32(dividend=d0, divisor=d1): d0=quotient, d1=remainder
+# divide the absolute values and fix the signs like C does
+code_sdivmod32 = (
+    0x48E7,  # movem.l d2-d4,-(sp)
+    0x3800,
+    0x2600,  # move.l d0,d3
+    0x2800,  # move.l d0,d4
+    0xB384,  # eor.l d1,d4
+    0x4A80,  # tst.l d0
+    0x6A02,  # bpl.s 1f
+    0x4480,  # neg.l d0
+    0x4A81,  # 1: tst.l d1
+    0x6A02,  # bpl.s 2f
+    0x4481,  # neg.l d1
+    0x2241,  # 2: movea.l d1,a1
+    0x7200,  # moveq #0,d1
+    0x741F,  # moveq #31,d2
+    0xD080,  # loop: add.l d0,d0
+    0xD381,  # addx.l d1,d1
+    0x6504,  # bcs.s sub
+    0xB289,  # cmp.l a1,d1
+    0x6504,  # bcs.s next
+    0x9289,  # sub: sub.l a1,d1
+    0x5280,  # addq.l #1,d0
+    0x51CA,  # next: dbra d2,loop
+    0xFFF0,
+    0x4A84,  # tst.l d4
+    0x6A02,  # bpl.s 3f
+    0x4480,  # neg.l d0
+    0x4A83,  # 3: tst.l d3
+    0x6A02,  # bpl.s 4f
+    0x4481,  # neg.l d1
+    0x4CDF,  # 4: movem.l (sp)+,d2-d4
+    0x001C,
+    0x4E75,  # rts
+)
+
+# lib name -> func name -> code
+native_funcs = {
+    "exec.library": {
+        "CopyMem": code_copy_mem,
+        "CopyMemQuick": code_copy_mem,
+    },
+    "utility.library": {
+        "UMult32": code_mult32,
+        "SMult32": code_mult32,
+        "UDivMod32": code_udivmod32,
+        "SDivMod32": code_sdivmod32,
+    },
+}
+
+
+class NativeFastFuncs(object):
+    """install m68k routines for pure compute functions of a library.
+
+    The routines replace the trap based calls in the jump table and run
+    entirely in the CPU. The code of all routines is placed in a single
+    memory block that is freed on cleanup.
+    """
+
+    def __init__(self, alloc, funcs=None):
+        if funcs is None:
+            funcs = native_funcs
+        self.alloc = alloc
+        self.funcs = funcs
+        self.mem_obj = None
+
+    def get_funcs(self, lib_name):
+        """return dict of func name to code words for the lib"""
+        return self.funcs.get(lib_name, {})
+
+    def install(self, lib_name, lib_base, fd):
+        """install the routines of the lib and return the installed names"""
+        funcs = self.get_funcs(lib_name)
+        # collect code blocks and the funcs using them
+        blocks = {}
+        for name, code in funcs.items():
+            if fd.get_func_by_name(name) is None:
+                continue
+            blocks.setdefault(code, []).append(name)
+        if not blocks:
+            return []
+        size = sum(len(code) * 2 for code in blocks)
+        label = "%s(NativeFuncs)" % lib_name
+        self.mem_obj = self.alloc.alloc_memory(size, label=label)
+        mem = self.alloc.get_mem()
+        make_funcs = MakeFuncs(mem)
+        addr = self.mem_obj.addr
+        names = []
+        for code, code_names in blocks.items():
+            data = b"".join(w.to_bytes(2, "big") for w in code)
+            mem.w_block(addr, data)
+            for name in code_names:
+                bias = fd.get_func_by_name(name).get_bias()
+                make_funcs.set_function(lib_base, bias, addr)
+                log_lib.info("%s: native %s @%06x", lib_name, name, addr)
+                names.append(name)
+            addr += len(data)
+        return names
+
+    def cleanup(self):
+        if self.mem_obj:
+            self.alloc.free_memory(self.mem_obj)
+            self.mem_obj = None
@@ -37,3 +37,9 @@ class MakeFuncs(object):
                 src_ptr += 4
                 dst_ptr -= 6
         return size
+
+    def set_function(self, lib_base_ptr, bias, addr):
+        """patch a single jump table entry at the given bias to jump to addr"""
+        dst_ptr = lib_base_ptr - bias
+        self.mem.w16(dst_ptr, op_jmp)
+        self.mem.w32(dst_ptr + 2, addr)
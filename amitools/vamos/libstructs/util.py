@@ -1,9 +1,11 @@
 from amitools.vamos.astructs import (
     AmigaStructDef,
     AmigaStruct,
+    APTR_VOID,
     UWORD,
     ULONG,
 )
+from .exec_ import MinNodeStruct
 
 
 # TagItem
@@ -12,6 +14,17 @@ class TagItemStruct(AmigaStruct):
     _format = [(ULONG, "ti_Tag"), (ULONG, "ti_Data")]
 
 
+# Hook
+@AmigaStructDef
+class HookStruct(AmigaStruct):
+    _format = [
+        (MinNodeStruct, "h_MinNode"),
+        (APTR_VOID, "h_Entry"),
+        (APTR_VOID, "h_SubEntry"),
+        (APTR_VOID, "h_Data"),
+    ]
+
+
 # ClockData
 @AmigaStructDef
 class ClockDataStruct(AmigaStruct):
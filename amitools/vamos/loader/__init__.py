@@ -1,2 +1,4 @@
 from .seglist import SegList, Segment
 from .segload import SegmentLoader
+from .profile import SegAddrResolver, PCSampleProfiler
+from .bincache import BinImageCache
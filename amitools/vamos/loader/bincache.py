@@ -0,0 +1,330 @@
+import os
+import struct
+import hashlib
+from collections import OrderedDict
+
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImage import (
+    BinImage,
+    Segment,
+    Relocations,
+    Reloc,
+    SymbolTable,
+    Symbol,
+    DebugLine,
+    DebugLineFile,
+    DebugLineEntry,
+)
+from amitools.vamos.log import log_segload
+
+
+class BinCacheFormatError(Exception):
+    pass
+
+
+class BinImageWriter:
+    """write a BinImage in the compact binary format of the disk cache.
+
+    Only the parts needed for loading and symbolizing are stored: segments,
+    relocations, symbols and debug lines. The file data of the original
+    format is dropped.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, bin_img, key):
+        self.parts = []
+        segs = bin_img.get_segments()
+        self.parts.append(BinImageCache.magic)
+        self._u32(BinImageCache.version)
+        self._str(key)
+        self._u32(bin_img.file_type)
+        self._u32(len(segs))
+        for seg in segs:
+            self._write_seg(seg)
+        return b"".join(self.parts)
+
+    def _u32(self, val):
+        self.parts.append(struct.pack(">I", val))
+
+    def _array(self, fmt, values):
+        self._u32(len(values))
+        self.parts.append(struct.pack(">%d%s" % (len(values), fmt), *values))
+
+    def _str(self, val):
+        # type byte: 0=None, 1=str, 2=bytes
+        if val is None:
+            self.parts.append(b"\0")
+            return
+        if isinstance(val, str):
+            self.parts.append(b"\1")
+            val = val.encode("utf-8", "surrogateescape")
+        else:
+            self.parts.append(b"\2")
+        self._u32(len(val))
+        self.parts.append(val)
+
+    def _write_seg(self, seg):
+        self._u32(seg.get_type())
+        self._u32(seg.get_size())
+        self._u32(seg.flags)
+        data = seg.get_data()
+        if data is None:
+            self.parts.append(b"\0")
+        else:
+            self.parts.append(b"\1")
+            self._u32(len(data))
+            self.parts.append(bytes(data))
+        # relocations
+        to_segs = seg.get_reloc_to_segs()
+        self._u32(len(to_segs))
+        for to_seg in to_segs:
+            relocs = seg.get_reloc(to_seg).get_relocs()
+            self._u32(to_seg.id)
+            self._array("I", [r.offset for r in relocs])
+            self._array("i", [r.addend for r in relocs])
+            self._array("B", [r.type for r in relocs])
+            self._array("B", [r.width for r in relocs])
+        # symbols
+        symtab = seg.get_symtab()
+        if symtab is None:
+            self.parts.append(b"\0")
+        else:
+            self.parts.append(b"\1")
+            syms = symtab.get_symbols()
+            self._array("I", [s.offset for s in syms])
+            for s in syms:
+                self._str(s.name)
+                self._str(s.file_name)
+        # debug lines
+        debug_line = seg.get_debug_line()
+        if debug_line is None:
+            self.parts.append(b"\0")
+        else:
+            self.parts.append(b"\1")
+            files = debug_line.get_files()
+            self._u32(len(files))
+            for df in files:
+                self._str(df.get_src_file())
+                self._str(df.get_dir_name())
+                self._u32(df.get_base_offset())
+                entries = df.get_entries()
+                self._array("I", [e.offset for e in entries])
+                self._array("I", [e.src_line for e in entries])
+                self._array("I", [e.flags for e in entries])
+
+
+class BinImageReader:
+    """read a BinImage written by the BinImageWriter"""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def read(self, key):
+        if bytes(self._get(4)) != BinImageCache.magic:
+            raise BinCacheFormatError("invalid magic")
+        if self._u32() != BinImageCache.version:
+            raise BinCacheFormatError("invalid version")
+        if self._str() != key:
+            raise BinCacheFormatError("key mismatch")
+        bin_img = BinImage(self._u32())
+        num_segs = self._u32()
+        relocs = []
+        for _ in range(num_segs):
+            seg, seg_relocs = self._read_seg()
+            bin_img.add_segment(seg)
+            relocs.append(seg_relocs)
+        # resolve targets of relocations
+        segs = bin_img.get_segments()
+        for seg, seg_relocs in zip(segs, relocs):
+            for to_id, rl in seg_relocs:
+                if to_id >= num_segs:
+                    raise BinCacheFormatError("invalid reloc target")
+                to_seg = segs[to_id]
+                rl.to_seg = to_seg
+                seg.add_reloc(to_seg, rl)
+        if self.pos != len(self.data):
+            raise BinCacheFormatError("trailing data")
+        return bin_img
+
+    def _get(self, size):
+        pos = self.pos
+        end = pos + size
+        if end > len(self.data):
+            raise BinCacheFormatError("truncated")
+        self.pos = end
+        return self.data[pos:end]
+
+    def _u32(self):
+        return struct.unpack(">I", self._get(4))[0]
+
+    def _flag(self):
+        return self._get(1)[0]
+
+    def _array(self, fmt):
+        num = self._u32()
+        size = struct.calcsize(fmt) * num
+        return struct.unpack(">%d%s" % (num, fmt), self._get(size))
+
+    def _str(self):
+        kind = self._flag()
+        if kind == 0:
+            return None
+        val = bytes(self._get(self._u32()))
+        if kind == 1:
+            return val.decode("utf-8", "surrogateescape")
+        return val
+
+    def _read_seg(self):
+        seg_type = self._u32()
+        size = self._u32()
+        flags = self._u32()
+        if self._flag():
+            data = bytes(self._get(self._u32()))
+        else:
+            data = None
+        seg = Segment(seg_type, size, data, flags)
+        # relocations
+        relocs = []
+        for _ in range(self._u32()):
+            to_id = self._u32()
+            offsets = self._array("I")
+            addends = self._array("i")
+            types = self._array("B")
+            widths = self._array("B")
+            rl = Relocations(None)
+            rl.entries = [
+                Reloc(o, t, w, a) for o, a, t, w in zip(offsets, addends, types, widths)
+            ]
+            relocs.append((to_id, rl))
+        # symbols
+        if self._flag():
+            symtab = SymbolTable()
+            for offset in self._array("I"):
+                name = self._str()
+                file_name = self._str()
+                symtab.add_symbol(Symbol(offset, name, file_name))
+            seg.set_symtab(symtab)
+        # debug lines
+        if self._flag():
+            debug_line = DebugLine()
+            for _ in range(self._u32()):
+                src_file = self._str()
+                dir_name = self._str()
+                base_offset = self._u32()
+                df = DebugLineFile(src_file, dir_name, base_offset)
+                offsets = self._array("I")
+                lines = self._array("I")
+                flags = self._array("I")
+                for entry in zip(offsets, lines, flags):
+                    df.add_entry(DebugLineEntry(*entry))
+                debug_line.add_file(df)
+            seg.set_debug_line(debug_line)
+        return seg, relocs
+
+
+class BinImageCache:
+    """cache the BinImages of loaded binaries.
+
+    Images are kept in memory keyed by path, size and mtime of the binary
+    so loading a binary again only needs to allocate and relocate its
+    segments. The least recently used images are dropped if more than
+    'max_images' are cached.
+
+    If a 'cache_dir' is given then the images are also stored there in a
+    compact binary format and reused by later runs.
+    """
+
+    magic = b"VBIC"
+    version = 1
+
+    def __init__(self, binfmt=None, max_images=64, cache_dir=None):
+        if binfmt is None:
+            binfmt = BinFmt()
+        self.binfmt = binfmt
+        self.max_images = max_images
+        self.cache_dir = cache_dir
+        # key -> bin_img
+        self.images = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return "BinImageCache(images=%d/%d,hits=%d,disk_hits=%d,misses=%d)" % (
+            len(self.images),
+            self.max_images,
+            self.hits,
+            self.disk_hits,
+            self.misses,
+        )
+
+    def get_key(self, sys_path):
+        """return cache key of binary or None if its not a file"""
+        try:
+            st = os.stat(sys_path)
+        except OSError:
+            return None
+        return "%s:%d:%d" % (os.path.abspath(sys_path), st.st_size, st.st_mtime_ns)
+
+    def load_image(self, sys_path):
+        """return the BinImage of the binary or None if it can't be loaded"""
+        key = self.get_key(sys_path)
+        if key is None:
+            return None
+        bin_img = self.images.get(key)
+        if bin_img is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return bin_img
+        bin_img = self._load_disk(key)
+        if bin_img is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            bin_img = self.binfmt.load_image(sys_path)
+            if bin_img is None:
+                return None
+            self._save_disk(key, bin_img)
+        self.images[key] = bin_img
+        if len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+        return bin_img
+
+    def clear(self):
+        self.images.clear()
+
+    def _get_disk_path(self, key):
+        name = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".bic")
+
+    def _load_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._get_disk_path(key)
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            return None
+        try:
+            return BinImageReader(data).read(key)
+        except BinCacheFormatError as e:
+            log_segload.warning("invalid bin cache file '%s': %s", path, e)
+            return None
+
+    def _save_disk(self, key, bin_img):
+        if not self.cache_dir:
+            return
+        path = self._get_disk_path(key)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data = BinImageWriter().write(bin_img, key)
+            with open(tmp_path, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_segload.warning("can't write bin cache file '%s': %s", path, e)
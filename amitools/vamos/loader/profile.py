@@ -0,0 +1,333 @@
+import os
+from bisect import bisect_right
+
+from amitools.binfmt.BinImage import SEGMENT_TYPE_CODE
+from amitools.vamos.log import log_prof
+from amitools.vamos.profiler import Profiler
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.vamos.machine.regs import REG_A5, REG_A7
+
+
+class SegAddrResolver:
+    """map addresses to the segments, symbols and source lines of the
+    seglists registered in the segment loader.
+
+    Resolved addresses are cached until the seglists change.
+    """
+
+    def __init__(self, seg_loader):
+        self.seg_loader = seg_loader
+        self.generation = -1
+        self.seg_addrs = []
+        self.segs = []
+        self.cache = {}
+        self.sym_tabs = {}
+        self.line_tabs = {}
+
+    def resolve(self, addr):
+        """return (module, func, src, is_code) or None if addr is not in a
+        segment. func is the nearest symbol or the segment number and src
+        the nearest debug line or None"""
+        if self.generation != self.seg_loader.generation:
+            self._update()
+        cache = self.cache
+        if addr in cache:
+            return cache[addr]
+        res = self._resolve(addr)
+        cache[addr] = res
+        return res
+
+    def _update(self):
+        self.generation = self.seg_loader.generation
+        self.cache = {}
+        ranges = []
+        for baddr, info in self.seg_loader.infos.items():
+            if info.bin_img:
+                bin_segs = info.bin_img.get_segments()
+            else:
+                bin_segs = ()
+            file_name = info.sys_file or info.ami_file
+            if file_name:
+                name = os.path.basename(file_name)
+            else:
+                name = "seglist@%06x" % (baddr << 2)
+            for num, seg in enumerate(info.seglist):
+                if num < len(bin_segs):
+                    bin_seg = bin_segs[num]
+                else:
+                    bin_seg = None
+                ranges.append((seg.get_addr(), seg.get_end(), name, num, bin_seg))
+        ranges.sort(key=lambda x: x[0])
+        self.seg_addrs = [r[0] for r in ranges]
+        self.segs = ranges
+
+    def _resolve(self, addr):
+        pos = bisect_right(self.seg_addrs, addr) - 1
+        if pos < 0:
+            return None
+        begin, end, name, num, bin_seg = self.segs[pos]
+        if addr >= end:
+            return None
+        if bin_seg is None:
+            return name, "seg%d" % num, None, True
+        offset = addr - begin
+        func = self._find_symbol(bin_seg, offset)
+        if func is None:
+            func = "seg%d" % num
+        src = self._find_line(bin_seg, offset)
+        is_code = bin_seg.get_type() == SEGMENT_TYPE_CODE
+        return name, func, src, is_code
+
+    def _find_symbol(self, bin_seg, offset):
+        tab = self.sym_tabs.get(bin_seg)
+        if tab is None:
+            syms = []
+            symtab = bin_seg.get_symtab()
+            if symtab:
+                for sym in symtab.get_symbols():
+                    name = sym.get_name()
+                    if isinstance(name, bytes):
+                        name = name.decode("latin-1")
+                    syms.append((sym.get_offset(), name))
+            syms.sort(key=lambda x: x[0])
+            tab = ([s[0] for s in syms], [s[1] for s in syms])
+            self.sym_tabs[bin_seg] = tab
+        pos = bisect_right(tab[0], offset) - 1
+        if pos >= 0:
+            return tab[1][pos]
+
+    def _find_line(self, bin_seg, offset):
+        tab = self.line_tabs.get(bin_seg)
+        if tab is None:
+            lines = []
+            debug_line = bin_seg.get_debug_line()
+            if debug_line:
+                for df in debug_line.get_files():
+                    src_file = df.get_src_file()
+                    for e in df.get_entries():
+                        src = "%s:%d" % (src_file, e.get_src_line())
+                        lines.append((e.get_offset(), src))
+            lines.sort(key=lambda x: x[0])
+            tab = ([l[0] for l in lines], [l[1] for l in lines])
+            self.line_tabs[bin_seg] = tab
+        pos = bisect_right(tab[0], offset) - 1
+        if pos >= 0:
+            return tab[1][pos]
+
+
+class PCSampleProfiler(Profiler):
+    """sample the PC and the call stack of the emulated m68k code.
+
+    Every 'interval' cycles the machine calls the sampler. The return
+    addresses are found by walking the A5 frame pointer chain and by
+    checking the top of stack for a caller of a leaf function. A return
+    address is only accepted if it is found right after a BSR or JSR in a
+    code segment. Each sample is weighted with the cycles of its slice and
+    is accounted for the symbolized stack.
+    """
+
+    name = "pc_sample"
+
+    def __init__(
+        self,
+        machine,
+        seg_loader,
+        enabled=False,
+        interval=1000,
+        num_hot=20,
+        stacks_file=None,
+        max_depth=32,
+    ):
+        self.machine = machine
+        self.seg_loader = seg_loader
+        self.enabled = enabled
+        self.interval = interval
+        self.num_hot = num_hot
+        self.stacks_file = stacks_file
+        self.max_depth = max_depth
+        self.resolver = SegAddrResolver(seg_loader)
+        # collapsed stack -> cycles
+        self.stacks = {}
+        # source line of pc -> cycles
+        self.lines = {}
+        self.total = 0
+        self.num_samples = 0
+
+    def get_name(self):
+        return self.name
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        self.interval = cfg.interval
+        self.num_hot = cfg.num_hot
+        self.stacks_file = cfg.stacks_file
+        return True
+
+    def set_data(self, data_dict):
+        self.stacks = dict(data_dict.stacks)
+        self.lines = dict(data_dict.lines)
+        self.total = data_dict.total
+        self.num_samples = data_dict.num_samples
+        return True
+
+    def get_data(self):
+        if not self.enabled:
+            return None
+        res = ConfigDict()
+        res["total"] = self.total
+        res["num_samples"] = self.num_samples
+        res["stacks"] = self.stacks
+        res["lines"] = self.lines
+        return res
+
+    def setup(self):
+        if not self.enabled:
+            return
+        if self.interval <= 0:
+            log_prof.error("pc_sample: invalid interval %d", self.interval)
+            self.enabled = False
+            return
+        log_prof.debug("pc_sample: interval=%d", self.interval)
+        self.machine.set_sample_hook(self._create_sampler(), self.interval)
+
+    def shutdown(self):
+        if not self.enabled:
+            return
+        self.machine.set_sample_hook(None, 0)
+        if self.stacks_file:
+            log_prof.info("pc_sample: writing stacks to '%s'", self.stacks_file)
+            with open(self.stacks_file, "w") as fh:
+                self.write_stacks(fh)
+
+    def dump(self, write):
+        if not self.enabled:
+            return
+        total = self.total
+        write("total: %d cycles in %d samples", total, self.num_samples)
+        if total == 0:
+            return
+        self._dump_table(write, "self", self.get_flat())
+        self._dump_table(write, "cumulative", self.get_cumulative())
+        self._dump_table(write, "line", self.get_hot_lines())
+
+    def _dump_table(self, write, title, entries):
+        write("%10s  %7s  %s", "cycles", "%", title)
+        for name, cycles in entries[: self.num_hot]:
+            ratio = 100.0 * cycles / self.total
+            write("%10d  %6.2f%%  %s", cycles, ratio, name)
+
+    def write_stacks(self, fobj):
+        """write the stacks in the collapsed format for flame graphs"""
+        for stack in sorted(self.stacks):
+            fobj.write("%s %d\n" % (stack, self.stacks[stack]))
+
+    def get_flat(self):
+        """return (func, cycles) list sorted by self cycles"""
+        res = {}
+        for stack, cycles in self.stacks.items():
+            func = stack.rsplit(";", 1)[-1]
+            res[func] = res.get(func, 0) + cycles
+        return self._sort(res)
+
+    def get_cumulative(self):
+        """return (func, cycles) list sorted by cycles including callees"""
+        res = {}
+        for stack, cycles in self.stacks.items():
+            for func in set(stack.split(";")):
+                res[func] = res.get(func, 0) + cycles
+        return self._sort(res)
+
+    def get_hot_lines(self):
+        return self._sort(self.lines)
+
+    def _sort(self, counts):
+        return sorted(counts.items(), key=lambda x: x[1], reverse=True)
+
+    def _get_frame(self, addr):
+        res = self.resolver.resolve(addr)
+        if res is None:
+            label_mgr = self.machine.get_label_mgr()
+            if label_mgr:
+                label = label_mgr.get_label(addr)
+                if label:
+                    return label.name, None
+            return "??", None
+        module, func, src, _ = res
+        return "%s:%s" % (module, func), src
+
+    def _is_ret_addr(self, addr):
+        """is addr a return address in code right after a BSR or JSR?"""
+        if addr & 1 or addr < 6 or addr >= self.ram_end:
+            return False
+        res = self.resolver.resolve(addr)
+        if res is None or not res[3]:
+            return False
+        r16 = self.mem.r16
+        for delta in (2, 4, 6):
+            op = r16(addr - delta)
+            if op & 0xFFC0 == 0x4E80 or op & 0xFF00 == 0x6100:
+                return True
+        return False
+
+    def _get_ret_addrs(self, pc):
+        cpu = self.machine.get_cpu()
+        r32 = self.mem.r32
+        ram_end = self.ram_end
+        is_ret_addr = self._is_ret_addr
+        max_depth = self.max_depth
+        sp = cpu.r_reg(REG_A7)
+        fp = cpu.r_reg(REG_A5)
+        res = []
+        # a leaf function without frame keeps its return address on top.
+        # a saved code pointer of the same function is no caller.
+        if sp + 4 <= ram_end:
+            top = r32(sp)
+            if is_ret_addr(top):
+                caller = self.resolver.resolve(top - 2)
+                callee = self.resolver.resolve(pc)
+                if not callee or not caller or caller[:2] != callee[:2]:
+                    res.append(top)
+        # walk the frame pointer chain
+        first = True
+        while len(res) < max_depth:
+            if fp & 1 or fp < sp or fp + 8 > ram_end:
+                break
+            ret_addr = r32(fp + 4)
+            if not is_ret_addr(ret_addr):
+                break
+            # the function has not setup its frame yet
+            if not (first and res and res[0] == ret_addr):
+                res.append(ret_addr)
+            first = False
+            next_fp = r32(fp)
+            if next_fp <= fp:
+                break
+            fp = next_fp
+        return res
+
+    def _create_sampler(self):
+        self.mem = self.machine.get_mem()
+        self.ram_end = self.machine.get_ram_total_kib() * 1024
+        cpu = self.machine.get_cpu()
+        get_frame = self._get_frame
+        get_ret_addrs = self._get_ret_addrs
+        stacks = self.stacks
+        lines = self.lines
+
+        def sampler(cycles):
+            pc = cpu.r_pc()
+            name, src = get_frame(pc)
+            names = [name]
+            for addr in get_ret_addrs(pc):
+                names.append(get_frame(addr - 2)[0])
+            names.reverse()
+            key = ";".join(names)
+            stacks[key] = stacks.get(key, 0) + cycles
+            if src:
+                lines[src] = lines.get(src, 0) + cycles
+            self.total += cycles
+            self.num_samples += 1
+
+        return sampler
@@ -4,6 +4,7 @@ from amitools.binfmt.BinFmt import BinFmt
 from amitools.binfmt.Relocate import Relocate
 from amitools.vamos.log import log_segload
 from .seglist import SegList
+from .bincache import BinImageCache
 
 
 class SegLoadInfo(object):
@@ -22,13 +23,19 @@ class SegLoadInfo(object):
 
 
 class SegmentLoader(object):
-    def __init__(self, alloc, path_mgr=None):
+    def __init__(self, alloc, path_mgr=None, bin_cache=None):
         self.alloc = alloc
         self.path_mgr = path_mgr
         self.mem = alloc.get_mem()
         self.binfmt = BinFmt()
+        # parsed binaries are reused
+        if bin_cache is None:
+            bin_cache = BinImageCache(self.binfmt)
+        self.bin_cache = bin_cache
         # map seglist baddr to bin_img
         self.infos = {}
+        # bumped whenever the registered seglists change
+        self.generation = 0
 
     def load_sys_seglist(self, sys_bin_file):
         """load seglist, register it, and return seglist baddr or 0"""
@@ -36,6 +43,7 @@ class SegmentLoader(object):
         if info:
             baddr = info.seglist.get_baddr()
             self.infos[baddr] = info
+            self.generation += 1
             log_segload.info("loaded sys seglist: %s", info)
             return baddr
         else:
@@ -48,6 +56,7 @@ class SegmentLoader(object):
         if info:
             baddr = info.seglist.get_baddr()
             self.infos[baddr] = info
+            self.generation += 1
             log_segload.info("loaded ami seglist: %s", info)
             return baddr
         else:
@@ -63,6 +72,7 @@ class SegmentLoader(object):
         info = self.infos[seglist_baddr]
         log_segload.info("unload seglist: %s", info)
         del self.infos[seglist_baddr]
+        self.generation += 1
         info.seglist.free()
         return True
 
@@ -76,16 +86,18 @@ class SegmentLoader(object):
         info = SegLoadInfo(SegList(self.alloc, baddr))
         log_segload.info("register seglist: %s", info)
         self.infos[baddr] = info
+        self.generation += 1
 
     def unregister_seglist(self, baddr):
         """remove custom seglist"""
         info = self.infos[baddr]
         log_segload.info("unregister seglist: %s", info)
         del self.infos[baddr]
+        self.generation += 1
 
     def shutdown(self):
         """check orphan seglists on shutdown and return number of orphans"""
-        log_segload.info("shutdown")
+        log_segload.info("shutdown: %s", self.bin_cache)
         for baddr in self.infos:
             info = self.infos[baddr]
             log_segload.warning("orphaned seglist: %s", info)
@@ -114,7 +126,7 @@ class SegmentLoader(object):
             return None
 
         # try to load bin image in supported format (e.g. HUNK or ELF)
-        bin_img = self.binfmt.load_image(sys_bin_file)
+        bin_img = self.bin_cache.load_image(sys_bin_file)
         if bin_img is None:
             log_segload.debug("load_image failed: %s", sys_bin_file)
             return None
@@ -142,12 +154,7 @@ class SegmentLoader(object):
         # retrieve addr
         addrs = seg_list.get_all_addrs()
 
-        # relocate to addresses and return data
-        datas = relocator.relocate(addrs)
-
-        # write contents to allocated memory
-        for i in range(len(sizes)):
-            # write data to segments
-            self.mem.w_block(addrs[i], datas[i])
+        # copy and relocate segments in place
+        relocator.relocate_to_mem(self.mem, addrs)
 
         return SegLoadInfo(seg_list, bin_img, sys_bin_file)
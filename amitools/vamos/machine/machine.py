@@ -26,13 +26,14 @@ class RunState(object):
         self.error = None
         self.done = False
         self.cycles = 0
+        self.slices = 0
         self.time_delta = 0
         self.regs = None
 
     def __str__(self):
         return (
             "RunState('%s', pc=%06x,sp=%06x,ret_addr=%06x,error=%s,done=%s,"
-            "cycles=%s,time_delta=%s,regs=%s)"
+            "cycles=%s,slices=%s,time_delta=%s,regs=%s)"
             % (
                 self.name,
                 self.pc,
@@ -41,11 +42,18 @@ class RunState(object):
                 self.error,
                 self.done,
                 self.cycles,
+                self.slices,
                 self.time_delta,
                 self.regs,
             )
         )
 
+    def get_slices_per_sec(self):
+        """number of returns from the CPU core to Python per second"""
+        if self.time_delta > 0:
+            return self.slices / self.time_delta
+        return 0
+
 
 class Machine(object):
     """the main interface to the m68k emulation including CPU, memory,
@@ -86,6 +94,7 @@ class Machine(object):
     scratch_begin = 0x600
     quick_trap_begin = 0x500
     quick_trap_num = 128
+    max_cycles_per_run = 1 << 20
 
     def __init__(
         self,
@@ -96,6 +105,7 @@ class Machine(object):
         cycles_per_run=1000,
         max_cycles=0,
         cpu_name=None,
+        adaptive_cycles=False,
     ):
         if cpu_name is None:
             cpu_name = machine68k.cpu_type_to_str(cpu_type)
@@ -117,7 +127,10 @@ class Machine(object):
         self.error_reporter = ErrorReporter(self)
         self.run_states = []
         self.instr_hook = None
+        self.sample_hook = None
+        self.sample_cycles = 0
         self.cycles_per_run = cycles_per_run
+        self.adaptive_cycles = adaptive_cycles
         self.max_cycles = max_cycles
         self.bail_out = False
         # call init
@@ -151,13 +164,16 @@ class Machine(object):
         ram_size = machine_cfg.ram_size
         cycles_per_run = machine_cfg.cycles_per_run
         max_cycles = machine_cfg.max_cycles
+        adaptive_cycles = machine_cfg.adaptive_cycles
         log_machine.info(
-            "cpu=%s(%d), ram_size=%d, labels=%s, " "cycles_per_run=%d, max_cycles=%d",
+            "cpu=%s(%d), ram_size=%d, labels=%s, "
+            "cycles_per_run=%d, adaptive=%s, max_cycles=%d",
             cpu_name,
             cpu_type,
             ram_size,
             use_labels,
             cycles_per_run,
+            adaptive_cycles,
             max_cycles,
         )
         return cls(
@@ -168,6 +184,7 @@ class Machine(object):
             cycles_per_run=cycles_per_run,
             max_cycles=max_cycles,
             cpu_name=cpu_name,
+            adaptive_cycles=adaptive_cycles,
         )
 
     @classmethod
@@ -315,9 +332,23 @@ class Machine(object):
     def set_cycles_per_run(self, num):
         self.cycles_per_run = num
 
+    def set_adaptive_cycles(self, on):
+        """grow the CPU slices of a run while nothing needs attention"""
+        self.adaptive_cycles = on
+
     def set_instr_hook(self, func):
         self.cpu.set_instr_hook_callback(func)
 
+    def set_sample_hook(self, func, cycles):
+        """call func(cycles) every given number of cycles in a run.
+
+        The CPU is executed in slices of the given size and the hook is
+        called after each slice with the cycles it really took.
+        Pass None to remove the hook.
+        """
+        self.sample_hook = func
+        self.sample_cycles = cycles
+
     def show_instr(self, show_regs=False):
         if show_regs:
             state = CPUState()
@@ -492,18 +523,38 @@ class Machine(object):
             cycles_per_run = self.cycles_per_run
         if not max_cycles:
             max_cycles = self.max_cycles
+        sample_hook = self.sample_hook
+        if sample_hook:
+            cycles_per_run = self.sample_cycles
+        # the slice only grows if no hook needs a fixed size
+        adaptive = self.adaptive_cycles and not sample_hook
+        max_slice = max(self.max_cycles_per_run, cycles_per_run)
+        debug = log_machine.isEnabledFor(logging.DEBUG)
 
         # main execution loop of run
+        slice_cycles = cycles_per_run
         total_cycles = 0
+        num_slices = 0
         start_time = time.perf_counter()
         try:
             while not run_state.done:
-                log_machine.debug("+ cpu.execute")
-                total_cycles += cpu.execute(cycles_per_run)
-                log_machine.debug("- cpu.execute")
+                num = slice_cycles
+                if max_cycles > 0 and max_cycles - total_cycles < num:
+                    num = max_cycles - total_cycles
+                if debug:
+                    log_machine.debug("+ cpu.execute(%d)", num)
+                cycles = cpu.execute(num)
+                total_cycles += cycles
+                num_slices += 1
+                if debug:
+                    log_machine.debug("- cpu.execute: %d cycles", cycles)
+                if sample_hook and not run_state.done:
+                    sample_hook(cycles)
                 # end after enough cycles
                 if max_cycles > 0 and total_cycles >= max_cycles:
                     break
+                if adaptive and slice_cycles < max_slice:
+                    slice_cycles = min(slice_cycles * 2, max_slice)
         except Exception as e:
             self.error_reporter.report_error(e)
         end_time = time.perf_counter()
@@ -525,6 +576,7 @@ class Machine(object):
         # update run state
         run_state.time_delta = end_time - start_time
         run_state.cycles = total_cycles
+        run_state.slices = num_slices
         # pop
         self.run_states.pop()
 
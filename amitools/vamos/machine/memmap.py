@@ -14,6 +14,7 @@ class MemoryMap(object):
         # options
         self.hw_access = None
         self.dos_guard_base = 0xFF01DD05
+        self.alloc_engine = "first_fit"
         # init
         self._init_base_labels()
         # alloc
@@ -38,6 +39,8 @@ class MemoryMap(object):
         odg = cfg.old_dos_guard
         if odg:
             self.setup_old_dos_guard()
+        # allocator engine
+        self.alloc_engine = cfg.alloc_engine
         if not self.validate():
             return False
         self.setup_ram_allocator()
@@ -77,8 +80,15 @@ class MemoryMap(object):
         mem = self.machine.get_mem()
         mem_begin = 0x1000
         mem_size = self.ram_total - mem_begin
-        log_mem_map.info("setup ram allocator: @%06x +%06x", mem_begin, mem_size)
-        self.alloc = MemoryAlloc(mem, mem_begin, mem_size, self.label_mgr)
+        log_mem_map.info(
+            "setup ram allocator: @%06x +%06x engine=%s",
+            mem_begin,
+            mem_size,
+            self.alloc_engine,
+        )
+        self.alloc = MemoryAlloc(
+            mem, mem_begin, mem_size, self.label_mgr, engine=self.alloc_engine
+        )
 
     def get_old_dos_guard_base(self):
         return self.dos_guard_base
@@ -32,5 +32,8 @@ class MockMachine(object):
     def set_cpu_mem_trace_hook(self, func):
         pass
 
+    def set_sample_hook(self, func, cycles):
+        pass
+
     def set_mem(self, mem):
         self.mem = mem
@@ -126,6 +126,10 @@ class MockMemory(object):
         else:
             raise ValueError("invalid width: %s" % width)
 
+    def get_buffer(self):
+        """return a writable view of the RAM"""
+        return memoryview(self.data)
+
     # block access via str/bytearray (only RAM!)
     def r_block(self, addr, size):
         if (addr + size) > self.size_bytes:
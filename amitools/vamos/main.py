@@ -6,7 +6,7 @@ from .cfg import VamosMainParser
 from .machine import Machine, MemoryMap
 from .machine.regs import REG_D0
 from .log import log_main, log_setup, log_help
-from .path import VamosPathManager
+from .path import VamosPathManager, resolve_sys_path
 from .trace import TraceManager
 from .libmgr import SetupLibManager
 from .schedule import Scheduler
@@ -65,6 +65,7 @@ def main(cfg_files=None, args=None, cfg_dict=None, profile=False):
     if not trace_mgr.parse_config(trace_mgr_cfg):
         log_main.error("tracing setup failed!")
         return RET_CODE_CONFIG_ERROR
+    trace_mgr.add_mem_profiler(main_profiler)
 
     # setup path manager
     path_mgr = VamosPathManager()
@@ -75,19 +76,29 @@ def main(cfg_files=None, args=None, cfg_dict=None, profile=False):
         if not path_mgr.setup():
             log_main.error("path setup failed!")
             return RET_CODE_CONFIG_ERROR
+        path_mgr.add_profiler(main_profiler)
 
         # setup scheduler
         scheduler = Scheduler(machine)
 
         # setup lib mgr
         lib_cfg = mp.get_libs_dict()
+        bin_cache_dir = mp.get_path_dict().path.bin_cache_dir
+        if bin_cache_dir:
+            bin_cache_dir = resolve_sys_path(bin_cache_dir)
         slm = SetupLibManager(
-            machine, mem_map, scheduler, path_mgr, main_profiler=main_profiler
+            machine,
+            mem_map,
+            scheduler,
+            path_mgr,
+            main_profiler=main_profiler,
+            bin_cache_dir=bin_cache_dir,
         )
         if not slm.parse_config(lib_cfg):
             log_main.error("lib manager setup failed!")
             return RET_CODE_CONFIG_ERROR
         slm.setup()
+        trace_mgr.set_seg_loader(slm.seg_loader)
 
         # setup profiler
         main_profiler.setup()
@@ -120,6 +131,11 @@ def main(cfg_files=None, args=None, cfg_dict=None, profile=False):
                 exit_code = run_state.regs[REG_D0] & 0xFF
                 log_main.info("done. exit code=%d", exit_code)
                 log_main.info("total cycles: %d", run_state.cycles)
+                log_main.info(
+                    "cpu slices: %d (%.0f/s)",
+                    run_state.slices,
+                    run_state.get_slices_per_sec(),
+                )
         else:
             log_main.info(
                 "vamos was stopped after %d cycles. ignoring result",
@@ -140,6 +156,8 @@ def main(cfg_files=None, args=None, cfg_dict=None, profile=False):
         # always shutdown path manager to ensure that
         # external resources are cleaned up properly
         path_mgr.shutdown()
+        # close traces: a trace file is always completed
+        trace_mgr.shutdown()
 
     # mem_map and machine shutdown
     if ok:
@@ -1,7 +1,10 @@
+import logging
+
 from amitools.vamos.error import *
 from amitools.vamos.log import log_mem_alloc
 from amitools.vamos.label import LabelRange, LabelStruct, LabelLib
 from amitools.vamos.astructs import AccessStruct
+from .engine import MemoryChunk, create_alloc_engine
 
 
 class Memory:
@@ -18,29 +21,12 @@ class Memory:
             return "[@%06x +%06x %06x]" % (self.addr, self.size, self.addr + self.size)
 
 
-class MemoryChunk:
-    def __init__(self, addr, size):
-        self.addr = addr
-        self.size = size
-        self.next = None
-        self.prev = None
-
-    def __str__(self):
-        end = self.addr + self.size
-        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
-
-    def does_fit(self, size):
-        """check if new size would fit into chunk
-        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
-        """
-        return self.size - size
-
-
 class MemoryAlloc:
-    def __init__(self, mem, addr=0, size=0, label_mgr=None):
+    def __init__(self, mem, addr=0, size=0, label_mgr=None, engine="first_fit"):
         """mem is a interface.
         setup allocator starting at addr with size bytes.
         if label_mgr is set then labels are created for allocations.
+        engine selects the free chunk management (first_fit or size_bins).
         """
         # if no size is specified then take mem total
         if size == 0:
@@ -60,18 +46,21 @@ class MemoryAlloc:
 
         self.addrs = {}
         self.mem_objs = {}
+        # fast allocs: addr -> name format and addr -> callee pc
+        self.fast_fmts = {}
+        self.fast_pcs = {}
 
-        # init free list
+        # init free chunks
         self.free_bytes = size
-        self.free_first = MemoryChunk(addr, self.free_bytes)
-        self.free_entries = 1
+        self.engine = create_alloc_engine(engine, addr, size)
 
     @classmethod
-    def for_machine(cls, machine):
+    def for_machine(cls, machine, engine="first_fit"):
         return cls(
             machine.get_mem(),
             addr=machine.get_ram_begin(),
             label_mgr=machine.get_label_mgr(),
+            engine=engine,
         )
 
     def get_mem(self):
@@ -86,99 +75,20 @@ class MemoryAlloc:
     def get_label_mgr(self):
         return self.label_mgr
 
+    def get_engine(self):
+        return self.engine
+
     def get_free_bytes(self):
         return self.free_bytes
 
     def is_all_free(self):
         return self.size == self.free_bytes
 
-    def _find_best_chunk(self, size):
-        """find best chunk that could take the given alloc
-        return: index of chunk in free list or -1 if none found + bytes left in chunk
-        """
-        chunk = self.free_first
-        while chunk != None:
-            left = chunk.does_fit(size)
-            # exact match
-            if left == 0:
-                return (chunk, 0)
-            # potential candidate: has some bytes left
-            elif left > 0:
-                # Don't make such a hassle. Return the first one that fits.
-                # This function takes too much time.
-                return (chunk, left)
-            chunk = chunk.next
-        # nothing found?
-        return (None, -1)
-
-    def _remove_chunk(self, chunk):
-        next = chunk.next
-        prev = chunk.prev
-        if chunk == self.free_first:
-            self.free_first = next
-        if next != None:
-            next.prev = prev
-        if prev != None:
-            prev.next = next
-        self.free_entries -= 1
-
-    def _replace_chunk(self, old_chunk, new_chunk):
-        next = old_chunk.next
-        prev = old_chunk.prev
-        if old_chunk == self.free_first:
-            self.free_first = new_chunk
-        if next != None:
-            next.prev = new_chunk
-        if prev != None:
-            prev.next = new_chunk
-        new_chunk.next = next
-        new_chunk.prev = prev
-
-    def _insert_chunk(self, chunk):
-        cur = self.free_first
-        last = None
-        addr = chunk.addr
-        while cur != None:
-            # fits right before
-            if addr < cur.addr:
-                break
-            last = cur
-            cur = cur.next
-        # inster after last but before cur
-        if last == None:
-            self.free_first = chunk
-        else:
-            last.next = chunk
-            chunk.prev = last
-        if cur != None:
-            chunk.next = cur
-            cur.prev = chunk
-        self.free_entries += 1
-
-    def _merge_chunk(self, a, b):
-        # can we merge?
-        if a.addr + a.size == b.addr:
-            chunk = MemoryChunk(a.addr, a.size + b.size)
-            prev = a.prev
-            if prev != None:
-                prev.next = chunk
-                chunk.prev = prev
-            next = b.next
-            if next != None:
-                next.prev = chunk
-                chunk.next = next
-            if self.free_first == a:
-                self.free_first = chunk
-            self.free_entries -= 1
-            return chunk
-        else:
-            return None
-
     def _stat_info(self):
         num_allocs = len(self.addrs)
         return "(free %06x #%d) (allocs #%d)" % (
             self.free_bytes,
-            self.free_entries,
+            self.engine.get_num_chunks(),
             num_allocs,
         )
 
@@ -186,35 +96,28 @@ class MemoryAlloc:
         """allocate memory and return addr or 0 if no more memory"""
         # align size to 4 bytes
         size = (size + 3) & ~3
-        # find best free chunk
-        chunk, left = self._find_best_chunk(size)
+        # find a free chunk
+        addr = self.engine.alloc(size)
         # out of memory?
-        if chunk == None:
+        if addr == None:
             if except_on_fail:
                 self.dump_orphans()
                 log_mem_alloc.error("[alloc: NO MEMORY for %06x bytes]" % size)
                 raise VamosInternalError("[alloc: NO MEMORY for %06x bytes]" % size)
             return 0
-        # remove chunk from free list
-        # is something left?
-        addr = chunk.addr
-        if left == 0:
-            self._remove_chunk(chunk)
-        else:
-            left_chunk = MemoryChunk(addr + size, left)
-            self._replace_chunk(chunk, left_chunk)
         # add to valid allocs map
         self.addrs[addr] = size
         self.free_bytes -= size
         # erase memory
         self.mem.clear_block(addr, size, 0)
-        log_mem_alloc.info(
-            "[alloc @%06x-%06x: %06x bytes] %s",
-            addr,
-            addr + size,
-            size,
-            self._stat_info(),
-        )
+        if log_mem_alloc.isEnabledFor(logging.INFO):
+            log_mem_alloc.info(
+                "[alloc @%06x-%06x: %06x bytes] %s",
+                addr,
+                addr + size,
+                size,
+                self._stat_info(),
+            )
         if addr % 4:
             raise VamosInternalError(
                 "Memory pool is invalid, return address not aligned by a long word"
@@ -231,37 +134,19 @@ class MemoryAlloc:
         assert size == real_size
         # remove from valid allocs
         del self.addrs[addr]
-        # create a new free chunk
-        chunk = MemoryChunk(addr, real_size)
-        self._insert_chunk(chunk)
-
-        # try to merge with prev/next
-        prev = chunk.prev
-        if prev != None:
-            new_chunk = self._merge_chunk(prev, chunk)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: %s + this=%s -> %s", prev, chunk, new_chunk
-                )
-                chunk = new_chunk
-        next = chunk.next
-        if next != None:
-            new_chunk = self._merge_chunk(chunk, next)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: this=%s + %s -> %s", chunk, next, new_chunk
-                )
+        # return chunk to engine and merge with neighbours
+        self.engine.free(addr, real_size)
 
         # correct free bytes
         self.free_bytes += size
-        num_allocs = len(self.addrs)
-        log_mem_alloc.info(
-            "[free  @%06x-%06x: %06x bytes] %s",
-            addr,
-            addr + size,
-            size,
-            self._stat_info(),
-        )
+        if log_mem_alloc.isEnabledFor(logging.INFO):
+            log_mem_alloc.info(
+                "[free  @%06x-%06x: %06x bytes] %s",
+                addr,
+                addr + size,
+                size,
+                self._stat_info(),
+            )
 
     def get_range_by_addr(self, addr):
         if addr in self.addrs:
@@ -270,12 +155,8 @@ class MemoryAlloc:
             return None
 
     def dump_mem_state(self):
-        chunk = self.free_first
-        num = 0
-        while chunk != None:
+        for num, chunk in enumerate(self.engine.get_chunks()):
             log_mem_alloc.debug("dump #%02d: %s" % (num, chunk))
-            num += 1
-            chunk = chunk.next
 
     def _dump_orphan(self, addr, size):
         log_mem_alloc.warning("orphan: [@%06x +%06x %06x]" % (addr, size, addr + size))
@@ -283,28 +164,72 @@ class MemoryAlloc:
             labels = self.label_mgr.get_intersecting_labels(addr, size)
             for l in labels:
                 log_mem_alloc.warning("-> %s", l)
+        end = addr + size
+        for fast_addr in sorted(self.fast_fmts):
+            if addr <= fast_addr < end:
+                log_mem_alloc.warning(
+                    "-> [%s @%06x +%06x]",
+                    self.get_fast_name(fast_addr),
+                    fast_addr,
+                    self.addrs[fast_addr],
+                )
 
     def dump_orphans(self):
-        last = self.free_first
+        chunks = self.engine.get_chunks()
+        # no free memory at all?
+        if not chunks:
+            self._dump_orphan(self.addr, self.size)
+            return
+        last = chunks[0]
         # orphan at begin?
         if last.addr != self.addr:
             addr = self.addr
             size = last.addr - addr
             self._dump_orphan(addr, size)
         # walk along free list
-        cur = last.next
-        while cur != None:
+        for cur in chunks[1:]:
             addr = last.addr + last.size
             size = cur.addr - addr
             self._dump_orphan(addr, size)
             last = cur
-            cur = cur.next
         # orphan at end?
         addr = last.addr + last.size
         end = self.addr + self.size
         if addr != end:
             self._dump_orphan(addr, end - addr)
 
+    # ----- fast allocations without memory objects and labels -----
+
+    def alloc_fast(self, size, name_fmt, pc=0):
+        """allocate memory and only keep the name format and the callee pc.
+
+        No Memory object and label is created. The name of the allocation
+        is only built with name_fmt % pc if its needed, e.g. for orphans.
+        Return the address.
+        """
+        addr = self.alloc_mem(size)
+        self.fast_fmts[addr] = name_fmt
+        self.fast_pcs[addr] = pc
+        return addr
+
+    def free_fast(self, addr):
+        """free a fast allocation and return its size or None if the addr
+        is not a fast allocation"""
+        name_fmt = self.fast_fmts.pop(addr, None)
+        if name_fmt is None:
+            return None
+        del self.fast_pcs[addr]
+        size = self.addrs[addr]
+        self.free_mem(addr, size)
+        return size
+
+    def get_fast_name(self, addr):
+        """return name of a fast allocation or None"""
+        name_fmt = self.fast_fmts.get(addr)
+        if name_fmt is None:
+            return None
+        return name_fmt % self.fast_pcs[addr]
+
     # ----- convenience functions with label creation -----
 
     def get_memory(self, addr):
@@ -451,18 +376,7 @@ class MemoryAlloc:
         return self.size
 
     def available(self):
-        free = 0
-        chunk = self.free_first
-        while chunk != None:
-            free += chunk.size
-            chunk = chunk.next
-        return free
+        return self.free_bytes
 
     def largest_chunk(self):
-        largest = 0
-        chunk = self.free_first
-        while chunk != None:
-            if chunk.size > largest:
-                largest = chunk.size
-            chunk = chunk.next
-        return largest
+        return self.engine.largest_chunk()
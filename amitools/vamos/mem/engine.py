@@ -0,0 +1,278 @@
+class MemoryChunk:
+    def __init__(self, addr, size):
+        self.addr = addr
+        self.size = size
+        self.next = None
+        self.prev = None
+
+    def __str__(self):
+        end = self.addr + self.size
+        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
+
+    def does_fit(self, size):
+        """check if new size would fit into chunk
+        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
+        """
+        return self.size - size
+
+
+class FirstFitEngine:
+    """the classic allocator engine.
+
+    All free chunks are kept in a single address ordered linked list and
+    an allocation takes the first chunk that fits.
+    """
+
+    name = "first_fit"
+
+    def __init__(self, addr, size):
+        self.free_first = MemoryChunk(addr, size)
+        self.free_entries = 1
+
+    def get_num_chunks(self):
+        return self.free_entries
+
+    def get_chunks(self):
+        """return all free chunks in address order"""
+        chunks = []
+        chunk = self.free_first
+        while chunk != None:
+            chunks.append(chunk)
+            chunk = chunk.next
+        return chunks
+
+    def largest_chunk(self):
+        largest = 0
+        chunk = self.free_first
+        while chunk != None:
+            if chunk.size > largest:
+                largest = chunk.size
+            chunk = chunk.next
+        return largest
+
+    def alloc(self, size):
+        """allocate size bytes and return addr or None if no chunk fits"""
+        chunk, left = self._find_best_chunk(size)
+        if chunk == None:
+            return None
+        # remove chunk from free list
+        # is something left?
+        addr = chunk.addr
+        if left == 0:
+            self._remove_chunk(chunk)
+        else:
+            left_chunk = MemoryChunk(addr + size, left)
+            self._replace_chunk(chunk, left_chunk)
+        return addr
+
+    def free(self, addr, size):
+        # create a new free chunk
+        chunk = MemoryChunk(addr, size)
+        self._insert_chunk(chunk)
+
+        # try to merge with prev/next
+        prev = chunk.prev
+        if prev != None:
+            new_chunk = self._merge_chunk(prev, chunk)
+            if new_chunk != None:
+                chunk = new_chunk
+        next = chunk.next
+        if next != None:
+            self._merge_chunk(chunk, next)
+
+    def _find_best_chunk(self, size):
+        """find best chunk that could take the given alloc
+        return: index of chunk in free list or -1 if none found + bytes left in chunk
+        """
+        chunk = self.free_first
+        while chunk != None:
+            left = chunk.does_fit(size)
+            # exact match
+            if left == 0:
+                return (chunk, 0)
+            # potential candidate: has some bytes left
+            elif left > 0:
+                # Don't make such a hassle. Return the first one that fits.
+                # This function takes too much time.
+                return (chunk, left)
+            chunk = chunk.next
+        # nothing found?
+        return (None, -1)
+
+    def _remove_chunk(self, chunk):
+        next = chunk.next
+        prev = chunk.prev
+        if chunk == self.free_first:
+            self.free_first = next
+        if next != None:
+            next.prev = prev
+        if prev != None:
+            prev.next = next
+        self.free_entries -= 1
+
+    def _replace_chunk(self, old_chunk, new_chunk):
+        next = old_chunk.next
+        prev = old_chunk.prev
+        if old_chunk == self.free_first:
+            self.free_first = new_chunk
+        if next != None:
+            next.prev = new_chunk
+        if prev != None:
+            prev.next = new_chunk
+        new_chunk.next = next
+        new_chunk.prev = prev
+
+    def _insert_chunk(self, chunk):
+        cur = self.free_first
+        last = None
+        addr = chunk.addr
+        while cur != None:
+            # fits right before
+            if addr < cur.addr:
+                break
+            last = cur
+            cur = cur.next
+        # inster after last but before cur
+        if last == None:
+            self.free_first = chunk
+        else:
+            last.next = chunk
+            chunk.prev = last
+        if cur != None:
+            chunk.next = cur
+            cur.prev = chunk
+        self.free_entries += 1
+
+    def _merge_chunk(self, a, b):
+        # can we merge?
+        if a.addr + a.size == b.addr:
+            chunk = MemoryChunk(a.addr, a.size + b.size)
+            prev = a.prev
+            if prev != None:
+                prev.next = chunk
+                chunk.prev = prev
+            next = b.next
+            if next != None:
+                next.prev = chunk
+                chunk.next = next
+            if self.free_first == a:
+                self.free_first = chunk
+            self.free_entries -= 1
+            return chunk
+        else:
+            return None
+
+
+class SizeBinsEngine:
+    """a segregated free list allocator engine.
+
+    Free chunks are sorted into size class bins: small sizes get an exact
+    bin per long word size and larger sizes share a bin per power of two.
+    A bit mask of non-empty bins allows to find the smallest fitting bin
+    without scanning.
+
+    For coalescing the chunks are also indexed by their begin and end
+    address so the neighbours of a freed block are found directly.
+    """
+
+    name = "size_bins"
+
+    # sizes up to this limit get an exact bin per long word
+    SMALL_LIMIT = 1024
+    NUM_SMALL_BINS = SMALL_LIMIT // 4
+
+    def __init__(self, addr, size):
+        # addr -> size of all free chunks
+        self.by_addr = {}
+        # end addr -> begin addr of all free chunks
+        self.by_end = {}
+        # each bin is a dict of addr -> size (keeps insertion order)
+        self.bins = [{} for _ in range(self.NUM_SMALL_BINS + 32)]
+        self.bin_mask = 0
+        self._add_chunk(addr, size)
+
+    def get_num_chunks(self):
+        return len(self.by_addr)
+
+    def get_chunks(self):
+        """return all free chunks in address order"""
+        by_addr = self.by_addr
+        return [MemoryChunk(addr, by_addr[addr]) for addr in sorted(by_addr)]
+
+    def largest_chunk(self):
+        if not self.by_addr:
+            return 0
+        return max(self.by_addr.values())
+
+    def alloc(self, size):
+        """allocate size bytes and return addr or None if no chunk fits"""
+        bin_no = self._get_bin(size)
+        bins = self.bins
+        # the bin for our size class may contain too small chunks
+        # if it covers a range of sizes
+        if bin_no >= self.NUM_SMALL_BINS:
+            chunks = bins[bin_no]
+            for addr, chunk_size in chunks.items():
+                if chunk_size >= size:
+                    return self._split_chunk(addr, chunk_size, size)
+            bin_no += 1
+        # all chunks in larger bins fit: take the smallest bin
+        mask = self.bin_mask >> bin_no
+        if mask == 0:
+            return None
+        bin_no += (mask & -mask).bit_length() - 1
+        addr, chunk_size = next(iter(bins[bin_no].items()))
+        return self._split_chunk(addr, chunk_size, size)
+
+    def free(self, addr, size):
+        # merge with previous chunk
+        prev_addr = self.by_end.get(addr)
+        if prev_addr is not None:
+            size += self._remove_chunk(prev_addr)
+            addr = prev_addr
+        # merge with next chunk
+        end = addr + size
+        if end in self.by_addr:
+            size += self._remove_chunk(end)
+        self._add_chunk(addr, size)
+
+    def _get_bin(self, size):
+        if size < self.SMALL_LIMIT:
+            return size >> 2
+        return self.NUM_SMALL_BINS + size.bit_length() - self.SMALL_LIMIT.bit_length()
+
+    def _split_chunk(self, addr, chunk_size, size):
+        self._remove_chunk(addr)
+        left = chunk_size - size
+        if left > 0:
+            self._add_chunk(addr + size, left)
+        return addr
+
+    def _add_chunk(self, addr, size):
+        self.by_addr[addr] = size
+        self.by_end[addr + size] = addr
+        bin_no = self._get_bin(size)
+        self.bins[bin_no][addr] = size
+        self.bin_mask |= 1 << bin_no
+
+    def _remove_chunk(self, addr):
+        size = self.by_addr.pop(addr)
+        del self.by_end[addr + size]
+        bin_no = self._get_bin(size)
+        chunks = self.bins[bin_no]
+        del chunks[addr]
+        if not chunks:
+            self.bin_mask &= ~(1 << bin_no)
+        return size
+
+
+ALLOC_ENGINES = {
+    FirstFitEngine.name: FirstFitEngine,
+    SizeBinsEngine.name: SizeBinsEngine,
+}
+
+
+def create_alloc_engine(name, addr, size):
+    if name not in ALLOC_ENGINES:
+        raise ValueError("invalid alloc engine: " + name)
+    return ALLOC_ENGINES[name](addr, size)
@@ -87,6 +87,8 @@ class AssignManager(object):
         self.assigns = []
         self.is_setup = False
         self.assigns_by_name = {}
+        # bumped whenever the assigns change
+        self.generation = 0
 
     def get_volume_mgr(self):
         return self.vol_mgr
@@ -180,6 +182,7 @@ class AssignManager(object):
         log_path.info("adding assign: %s", assign)
         self.assigns_by_name[lo_name] = assign
         self.assigns.append(assign)
+        self.generation += 1
         return assign
 
     def del_assign(self, name):
@@ -191,6 +194,7 @@ class AssignManager(object):
         a.is_setup = False
         self.assigns.remove(a)
         del self.assigns_by_name[lo_name]
+        self.generation += 1
         log_path.info("delete assign: %s", a)
         return True
 
@@ -218,6 +222,7 @@ class AssignManager(object):
                     "appending to existing assign: name='%s': %r", name, elements
                 )
                 assign.append(elements)
+                self.generation += 1
                 return assign
             log_path.warning("can't append to non-existing assign: '%s'", name)
             # fall through
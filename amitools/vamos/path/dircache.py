@@ -0,0 +1,98 @@
+import os
+import stat
+import time
+from collections import OrderedDict
+
+from amitools.vamos.log import log_path
+
+
+class DirCache:
+    """cache the lower case names of the entries of system dirs.
+
+    Each dir entry maps the lower case names to the real names found in
+    the system dir. An entry is valid as long as the mtime of the dir does
+    not change. File systems with a coarse mtime might not update the mtime
+    for changes that happen right after the listing. So listings that are
+    not older than 'racy_ns' than the mtime of the dir are not trusted.
+
+    The least recently used dirs are evicted if more than 'max_dirs' are
+    cached.
+    """
+
+    def __init__(self, max_dirs=256, racy_ns=2_000_000_000):
+        self.max_dirs = max_dirs
+        self.racy_ns = racy_ns
+        # dir_path -> (mtime_ns, names)
+        self.dirs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __str__(self):
+        return "DirCache(dirs=%d/%d,hits=%d,misses=%d,evictions=%d)" % (
+            len(self.dirs),
+            self.max_dirs,
+            self.hits,
+            self.misses,
+            self.evictions,
+        )
+
+    def get_stats(self):
+        return {
+            "dirs": len(self.dirs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def get_names(self, dir_path):
+        """return dict of lower case name to real name of the entries in
+        dir_path or None if its no dir"""
+        try:
+            st = os.stat(dir_path)
+        except OSError:
+            self.dirs.pop(dir_path, None)
+            return None
+        mtime_ns = st.st_mtime_ns
+        if not stat.S_ISDIR(st.st_mode):
+            self.dirs.pop(dir_path, None)
+            return None
+        entry = self.dirs.get(dir_path)
+        if entry is not None and entry[0] == mtime_ns:
+            self.hits += 1
+            self.dirs.move_to_end(dir_path)
+            return entry[1]
+        self.misses += 1
+        try:
+            files = os.listdir(dir_path)
+        except OSError:
+            self.dirs.pop(dir_path, None)
+            return None
+        names = {}
+        for name in files:
+            names.setdefault(name.lower(), name)
+        # only keep listings that are safe from mtime granularity
+        if time.time_ns() - mtime_ns >= self.racy_ns:
+            self.dirs[dir_path] = (mtime_ns, names)
+            self.dirs.move_to_end(dir_path)
+            if len(self.dirs) > self.max_dirs:
+                self.dirs.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.dirs.pop(dir_path, None)
+        return names
+
+    def invalidate(self, sys_path):
+        """drop the dir containing sys_path and sys_path itself including
+        all its sub dirs"""
+        sys_path = os.path.normpath(sys_path)
+        parent = os.path.dirname(sys_path)
+        self.dirs.pop(parent, None)
+        prefix = os.path.join(sys_path, "")
+        for dir_path in list(self.dirs):
+            if dir_path == sys_path or dir_path.startswith(prefix):
+                del self.dirs[dir_path]
+        log_path.debug("dir cache: invalidate '%s'", sys_path)
+
+    def clear(self):
+        self.dirs.clear()
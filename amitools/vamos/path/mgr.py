@@ -249,6 +249,10 @@ class PathManager:
     def get_cmd_paths(self):
         return self.default_env.get_cmd_paths()
 
+    def invalidate_sys_path(self, sys_path):
+        """tell the path caches that sys_path was changed by vamos"""
+        self.vol_mgr.invalidate_sys_path(sys_path)
+
     def get_cwd(self):
         return self.default_env.get_cwd()
 
@@ -0,0 +1,62 @@
+from amitools.vamos.profiler import Profiler
+from amitools.vamos.cfgcore import ConfigDict
+
+
+class PathCacheProfiler(Profiler):
+    """report the statistics of the path caches.
+
+    The command cache memoizes command and LoadSeg() lookups and the dir
+    cache keeps the case-insensitive dir listings of the volumes.
+    """
+
+    name = "path_cache"
+
+    def __init__(self, path_mgr, enabled=False):
+        self.path_mgr = path_mgr
+        self.enabled = enabled
+        self.old_data = None
+
+    def get_name(self):
+        return self.name
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        return True
+
+    def set_data(self, data_dict):
+        self.old_data = data_dict
+        return True
+
+    def get_data(self):
+        if not self.enabled:
+            return None
+        res = ConfigDict()
+        res["cmd"] = self._get_counts(self.path_mgr.get_cmd_cache_stats(), "cmd")
+        res["dir"] = self._get_counts(
+            self.path_mgr.get_vol_mgr().dir_cache.get_stats(), "dir"
+        )
+        return res
+
+    def _get_counts(self, stats, key):
+        res = {"hits": stats["hits"], "misses": stats["misses"]}
+        if self.old_data and key in self.old_data:
+            old = self.old_data[key]
+            for name in res:
+                res[name] += old.get(name, 0)
+        return res
+
+    def dump(self, write):
+        if not self.enabled:
+            return
+        data = self.get_data()
+        for key in ("cmd", "dir"):
+            hits = data[key]["hits"]
+            misses = data[key]["misses"]
+            total = hits + misses
+            if total:
+                ratio = 100.0 * hits / total
+            else:
+                ratio = 0.0
+            write("%s cache: hits=%d misses=%d (%.1f%% hits)", key, hits, misses, ratio)
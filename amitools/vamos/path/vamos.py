@@ -3,13 +3,29 @@ import os
 from amitools.vamos.log import log_path
 from .mgr import PathManager
 from .amipath import AmiPath, AmiPathError
+from .profile import PathCacheProfiler
 
 
 class VamosPathManager(PathManager):
     """The VamosPathManager keeps the old vamos path manager API (for now)
     but has already the new PathManager under the hood.
+
+    The results of command and LoadSeg() lookups are memoized. The cache
+    key contains the generations of the volumes and assigns so any change
+    there invalidates the results. A hit is only accepted if the found
+    file still exists.
     """
 
+    cmd_cache_size = 1024
+
+    def __init__(self, *args, **kwargs):
+        PathManager.__init__(self, *args, **kwargs)
+        # key -> (sys_path, ami_path)
+        self.cmd_cache = {}
+        self.cmd_cache_hits = 0
+        self.cmd_cache_misses = 0
+        self.profiler = None
+
     def _get_lock_env(self, lock):
         cmd_paths = self.get_default_env().get_cmd_paths()
         if lock is None:
@@ -19,11 +35,85 @@ class VamosPathManager(PathManager):
         cwd = AmiPath(cwd)
         return self.create_env(cwd=cwd, cmd_paths=cmd_paths)
 
+    def _get_cache_key(self, kind, cwd_lock, ami_path):
+        if cwd_lock is None:
+            cwd = "sys:"
+        else:
+            cwd = cwd_lock.ami_path
+        cmd_paths = tuple(str(p) for p in self.get_default_env().get_cmd_paths())
+        return (
+            kind,
+            str(ami_path),
+            cwd,
+            cmd_paths,
+            self.vol_mgr.generation,
+            self.assign_mgr.generation,
+        )
+
+    def _cached_lookup(self, kind, cwd_lock, ami_path, func):
+        key = self._get_cache_key(kind, cwd_lock, ami_path)
+        res = self.cmd_cache.get(key)
+        if res is not None:
+            if os.path.isfile(res[0]):
+                self.cmd_cache_hits += 1
+                return res
+            del self.cmd_cache[key]
+        self.cmd_cache_misses += 1
+        res = func(cwd_lock, ami_path)
+        # only keep found files
+        if res[0]:
+            if len(self.cmd_cache) >= self.cmd_cache_size:
+                self.cmd_cache.clear()
+            self.cmd_cache[key] = res
+        return res
+
+    def invalidate_sys_path(self, sys_path):
+        PathManager.invalidate_sys_path(self, sys_path)
+        # a new file might hide a cached command of the same name
+        name = os.path.basename(sys_path).lower()
+        for key in list(self.cmd_cache):
+            if self._get_base_name(key[1]) == name:
+                del self.cmd_cache[key]
+
+    def _get_base_name(self, ami_path):
+        pos = max(ami_path.rfind(":"), ami_path.rfind("/"))
+        return ami_path[pos + 1 :].lower()
+
+    def add_profiler(self, main_profiler):
+        """register the path cache profiler"""
+        self.profiler = PathCacheProfiler(self)
+        return main_profiler.add_profiler(self.profiler)
+
+    def get_cmd_cache_stats(self):
+        return {
+            "entries": len(self.cmd_cache),
+            "hits": self.cmd_cache_hits,
+            "misses": self.cmd_cache_misses,
+        }
+
     # ----- API -----
 
     def ami_command_to_sys_path(self, cwd_lock, ami_path):
         """lookup a command on path if it does not contain a relative or
         absolute path. otherwise perform normal 'ami_to_sys_path' conversion"""
+        return self._cached_lookup(
+            "cmd", cwd_lock, ami_path, self._ami_command_to_sys_path
+        )
+
+    def ami_load_to_sys_path(self, cwd_lock, ami_path):
+        """find an existing binary for LoadSeg() in all assigned locations.
+        return the sys path or None"""
+        return self._cached_lookup(
+            "load", cwd_lock, ami_path, self._ami_load_to_sys_path
+        )[0]
+
+    def _ami_load_to_sys_path(self, cwd_lock, ami_path):
+        sys_path = self.ami_to_sys_path(cwd_lock, ami_path, mustExist=True)
+        if sys_path and os.path.isfile(sys_path):
+            return sys_path, None
+        return None, None
+
+    def _ami_command_to_sys_path(self, cwd_lock, ami_path):
         env = self._get_lock_env(cwd_lock)
         cmd_paths = self.cmdpaths(ami_path, env=env)
         log_path.info(
@@ -4,6 +4,7 @@ import shutil
 from amitools.vamos.log import log_path
 import logging
 from .spec import Spec
+from .dircache import DirCache
 
 
 def resolve_sys_path(sys_path):
@@ -136,11 +137,14 @@ class Volume(object):
 
 
 class VolumeManager(object):
-    def __init__(self, vols_base_dir=None):
+    def __init__(self, vols_base_dir=None, dir_cache_size=256):
         self.volumes = []
         self.is_setup = False
         self.vols_by_name = {}
         self.vols_base_dir = vols_base_dir
+        self.dir_cache = DirCache(dir_cache_size)
+        # bumped whenever the volumes change
+        self.generation = 0
 
     def get_num_volumes(self):
         return len(self.volumes)
@@ -162,6 +166,7 @@ class VolumeManager(object):
         log_path.info("--- volume config ---")
         for volume in self.volumes:
             log_path.info("%s", volume)
+        log_path.info("%s", self.dir_cache)
 
     def setup(self):
         # setup all defined volumes
@@ -181,6 +186,8 @@ class VolumeManager(object):
             log_path.info("cleaning up volume: %s", volume)
             volume.shutdown()
             volume.is_setup = False
+        log_path.info("%s", self.dir_cache)
+        self.dir_cache.clear()
 
     def add_volumes(self, volumes):
         if not volumes:
@@ -225,6 +232,7 @@ class VolumeManager(object):
         log_path.info("adding volume: %s", volume)
         self.vols_by_name[lo_name] = volume
         self.volumes.append(volume)
+        self.generation += 1
         return volume
 
     def _parse_spec(self, spec):
@@ -286,8 +294,10 @@ class VolumeManager(object):
         volume = self.vols_by_name[lo_name]
         volume.shutdown()
         volume.is_setup = False
+        self.dir_cache.invalidate(volume.get_path())
         self.volumes.remove(volume)
         del self.vols_by_name[lo_name]
+        self.generation += 1
         log_path.info("delete volume: %s", volume)
         return True
 
@@ -392,30 +402,28 @@ class VolumeManager(object):
             )
             return None
 
+    def invalidate_sys_path(self, sys_path):
+        """the entry sys_path was created, deleted or renamed by vamos"""
+        self.dir_cache.invalidate(sys_path)
+
     def _follow_path_no_case(self, base, dirs, fast):
-        # base is the name (no more dirs)
-        if len(dirs) == 0:
-            return base
-        # make sure base is a dir
-        if not os.path.isdir(base):
-            # assume remainder is new
-            return os.path.join(base, os.path.join(*dirs))
-        # dir component to search
-        d = dirs[0]
-        # check for direct match first
-        if fast:
-            dp = os.path.join(base, d)
-            if os.path.exists(dp):
-                return self._follow_path_no_case(dp, dirs[1:], fast)
-        # read dir and check for no case variant
-        dlow = d.lower()
-        files = os.listdir(base)
-        dl = len(d)
-        for f in files:
-            if len(f) == dl:
-                flow = f.lower()
-                if flow == dlow:
-                    res = os.path.join(base, f)
-                    return self._follow_path_no_case(res, dirs[1:], fast)
-        # can't find it -> we assume rest of path is new
-        return os.path.join(base, os.path.join(*dirs))
+        get_names = self.dir_cache.get_names
+        for pos, d in enumerate(dirs):
+            # check for direct match first without listing the dir
+            if fast:
+                dp = os.path.join(base, d)
+                if os.path.exists(dp):
+                    base = dp
+                    continue
+            # make sure base is a dir
+            names = get_names(base)
+            if names is None:
+                # assume remainder is new
+                return os.path.join(base, *dirs[pos:])
+            # check cached dir for no case variant
+            name = names.get(d.lower())
+            if name is None:
+                # can't find it -> we assume rest of path is new
+                return os.path.join(base, *dirs[pos:])
+            base = os.path.join(base, name)
+        return base
@@ -3,3 +3,4 @@ from .tool import Tool
 from .path import PathTool
 from .type import TypeTool
 from .libprof import LibProfilerTool
+from .trace import TraceTool
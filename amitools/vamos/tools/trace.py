@@ -0,0 +1,106 @@
+from .tool import Tool
+from amitools.vamos.machine import DisAsm
+from amitools.vamos.trace import InstrTraceReader
+
+
+class TraceTool(Tool):
+    def __init__(self):
+        Tool.__init__(self, "trace", "decode binary instruction traces")
+        self.reader = None
+        self.disasm = None
+        self.lines = {}
+
+    def add_args(self, arg_parser):
+        sub = arg_parser.add_subparsers(dest="trace_cmd")
+        # dump
+        parser = sub.add_parser("dump", help="disassemble all traced instructions")
+        parser.add_argument("input", help="trace file")
+        # blocks
+        parser = sub.add_parser("blocks", help="list executed basic blocks")
+        parser.add_argument("input", help="trace file")
+        # hot
+        parser = sub.add_parser("hot", help="show the most executed basic blocks")
+        parser.add_argument("input", help="trace file")
+        parser.add_argument(
+            "-n",
+            "--num",
+            type=int,
+            default=20,
+            help="number of blocks to show",
+        )
+
+    def run(self, args):
+        self.reader = InstrTraceReader(args.input)
+        try:
+            self.reader.load()
+        except (IOError, ValueError) as e:
+            print("loading '%s' failed: %s" % (args.input, e))
+            return 1
+        self.disasm = DisAsm.create(self.reader.get_cpu_name())
+        cmd = args.trace_cmd
+        if cmd == "dump":
+            return self._do_dump()
+        elif cmd == "blocks":
+            return self._do_blocks()
+        elif cmd == "hot":
+            return self._do_hot(args.num)
+        else:
+            return 1
+
+    def _do_dump(self):
+        reader = self.reader
+        for pc, count, regs in reader.get_records():
+            if regs:
+                print(self._format_regs(regs))
+            for instr_pc in reader.get_instrs(pc, count):
+                for line in self._get_lines(instr_pc):
+                    print(line)
+        return 0
+
+    def _do_blocks(self):
+        for pc, count, _ in self.reader.get_records():
+            label = self.reader.get_code(pc)[1]
+            print("%06x  %5d  %s" % (pc, count, label))
+        return 0
+
+    def _do_hot(self, num):
+        blocks = {}
+        total = 0
+        for pc, count, _ in self.reader.get_records():
+            key = (pc, self.reader.get_version(pc))
+            blocks[key] = blocks.get(key, 0) + count
+            total += count
+        hot = sorted(blocks.items(), key=lambda x: x[1], reverse=True)
+        print("total instructions: %d" % total)
+        for (pc, version), count in hot[:num]:
+            info = self.reader.get_code(pc, version)
+            label, sym = info[1], info[2]
+            ratio = 100.0 * count / total
+            print("%06x  %10d  %6.2f%%  %s  %s" % (pc, count, ratio, label, sym or ""))
+        return 0
+
+    def _format_regs(self, regs):
+        res = []
+        for reg, val in regs:
+            if reg < 8:
+                name = "D%d" % reg
+            else:
+                name = "A%d" % (reg - 8)
+            res.append("%s=%08x" % (name, val))
+        return " " * 40 + "  " + " ".join(res)
+
+    def _get_lines(self, pc):
+        key = (pc, self.reader.get_version(pc))
+        lines = self.lines.get(key)
+        if lines is None:
+            data, label, sym, src, addon, txt = self.reader.get_code(pc)
+            if txt is None:
+                _, txt = self.disasm.disassemble_raw(pc, data)
+            lines = []
+            if sym is not None:
+                lines.append("%s%s:" % (" " * 40, sym))
+            if src is not None:
+                lines.append("%s%s" % (" " * 50, src))
+            lines.append("%-40s  %06x    %-20s  %s" % (label, pc, txt, addon))
+            self.lines[key] = lines
+        return lines
@@ -1,2 +1,4 @@
 from .mem import TraceMemory
 from .mgr import TraceManager
+from .instr import InstrTraceFile, InstrTraceRecorder, InstrTraceReader
+from .profile import MemAccessProfiler
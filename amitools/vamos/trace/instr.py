@@ -0,0 +1,312 @@
+import json
+import struct
+import sys
+from array import array
+
+from amitools.vamos.log import log_instr
+
+
+class InstrTraceFile:
+    """binary instruction trace file layout
+
+    header:  magic 'VTRC', version, flags
+    records: array of 32 bit words in native byte order. each record is
+             pc, count | num_words << 16 and num_words of reg, value pairs.
+             The record covers count instructions executed in a row
+             starting at pc. The pairs give the changed registers before pc.
+             A record with a count of 0 marks that the code at pc changed
+             and the next code version of pc is used from now on.
+    meta:    json data with the code versions and labels of all traced pcs
+    footer:  offset and size of meta data, magic 'VTRE'
+    """
+
+    MAGIC = b"VTRC"
+    END_MAGIC = b"VTRE"
+    VERSION = 1
+    FLAG_REGS = 1
+    FLAG_LITTLE_ENDIAN = 2
+    HEADER = struct.Struct(">4sHH")
+    FOOTER = struct.Struct(">QQ4s")
+    MAX_COUNT = 0xFFFF
+    NUM_REGS = 16
+
+
+class InstrTraceRecorder:
+    """record executed instructions in a compact binary trace file.
+
+    The instruction hook only stores the pc if the control flow leaves the
+    current basic block. Each pc is disassembled and symbolized only the
+    first time it is seen to find the next pc. If seglists are loaded or
+    unloaded (see set_seg_loader) the memory might hold new code, so all
+    pcs are checked again and changed code is stored as a new version. The
+    trace is decoded and disassembled offline with 'vamostrace'.
+    """
+
+    def __init__(self, machine, file_name, with_regs=False, trace_mgr=None):
+        self.machine = machine
+        self.cpu = machine.get_cpu()
+        self.mem = machine.get_mem()
+        self.file_name = file_name
+        self.with_regs = with_regs
+        self.trace_mgr = trace_mgr
+        # pc -> next pc
+        self.next_pcs = {}
+        # pc -> list of meta info versions
+        self.code = {}
+        self.seg_loader = None
+        self.seg_gen = -1
+        self.recs = array("I")
+        assert self.recs.itemsize == 4
+        self.chunk_words = 1 << 16
+        self.num_recs = 0
+        self.fobj = None
+        self.flush_rec = None
+
+    def set_seg_loader(self, seg_loader):
+        """check the code again whenever the seglists change"""
+        self.seg_loader = seg_loader
+        self.seg_gen = seg_loader.generation
+
+    def start(self):
+        self.fobj = open(self.file_name, "wb")
+        flags = 0
+        if self.with_regs:
+            flags |= InstrTraceFile.FLAG_REGS
+        if sys.byteorder == "little":
+            flags |= InstrTraceFile.FLAG_LITTLE_ENDIAN
+        hdr = InstrTraceFile.HEADER.pack(
+            InstrTraceFile.MAGIC, InstrTraceFile.VERSION, flags
+        )
+        self.fobj.write(hdr)
+        if self.with_regs:
+            hook = self._create_regs_hook()
+        else:
+            hook = self._create_hook()
+        self.machine.set_instr_hook(hook)
+        log_instr.info("recording instruction trace to '%s'", self.file_name)
+
+    def stop(self):
+        if self.fobj is None:
+            return
+        self.machine.set_instr_hook(None)
+        self.flush_rec()
+        self._flush()
+        # write meta data and footer
+        meta = {
+            "cpu": self.machine.get_cpu_name(),
+            "num_recs": self.num_recs,
+            "code": {"%x" % pc: info for pc, info in self.code.items()},
+        }
+        meta_data = json.dumps(meta).encode("utf-8")
+        offset = self.fobj.tell()
+        self.fobj.write(meta_data)
+        footer = InstrTraceFile.FOOTER.pack(
+            offset, len(meta_data), InstrTraceFile.END_MAGIC
+        )
+        self.fobj.write(footer)
+        self.fobj.close()
+        self.fobj = None
+        log_instr.info(
+            "instruction trace: %d records, %d pcs", self.num_recs, len(self.code)
+        )
+
+    def _flush(self):
+        recs = self.recs
+        if recs:
+            recs.tofile(self.fobj)
+            del recs[:]
+
+    def _add_pc(self, pc):
+        """first visit of a pc: keep code and labels and return next pc"""
+        disasm = self.trace_mgr.disasm
+        num_bytes, txt = disasm.disassemble(pc)
+        data = self.mem.r_block(pc, num_bytes)
+        label, sym, src, addon = self.trace_mgr._get_disasm_info(pc)
+        if isinstance(sym, bytes):
+            sym = sym.decode("latin-1")
+        # python traps can't be resolved offline
+        if not txt.startswith("PyTrap"):
+            txt = None
+        info = [data.hex(), label, sym, src, addon, txt]
+        versions = self.code.get(pc)
+        if versions is None:
+            self.code[pc] = [info]
+        elif versions[-1] != info:
+            # new code at pc: mark the switch to the next version
+            versions.append(info)
+            self.recs.append(pc)
+            self.recs.append(0)
+        next_pc = pc + num_bytes
+        self.next_pcs[pc] = next_pc
+        return next_pc
+
+    def _check_seg_loader(self):
+        """if the seglists changed then all pcs need to be checked again"""
+        seg_loader = self.seg_loader
+        if seg_loader and seg_loader.generation != self.seg_gen:
+            self.seg_gen = seg_loader.generation
+            self.next_pcs.clear()
+
+    def _create_hook(self):
+        r_pc = self.cpu.r_pc
+        recs = self.recs
+        append = recs.append
+        next_pcs = self.next_pcs
+        check_seg_loader = self._check_seg_loader
+        max_count = InstrTraceFile.MAX_COUNT
+        chunk_words = self.chunk_words
+        blk_pc = 0
+        blk_num = 0
+        nxt = -1
+
+        def flush_rec():
+            nonlocal blk_num
+            if blk_num > 0:
+                append(blk_pc)
+                append(blk_num)
+                self.num_recs += 1
+                blk_num = 0
+
+        def instr_hook():
+            nonlocal blk_pc, blk_num, nxt
+            pc = r_pc()
+            if pc == nxt and blk_num < max_count:
+                blk_num += 1
+            else:
+                if blk_num > 0:
+                    append(blk_pc)
+                    append(blk_num)
+                    self.num_recs += 1
+                    if len(recs) >= chunk_words:
+                        self._flush()
+                blk_pc = pc
+                blk_num = 1
+                check_seg_loader()
+            nxt = next_pcs.get(pc)
+            if nxt is None:
+                nxt = self._add_pc(pc)
+
+        self.flush_rec = flush_rec
+        return instr_hook
+
+    def _create_regs_hook(self):
+        r_pc = self.cpu.r_pc
+        r_reg = self.cpu.r_reg
+        recs = self.recs
+        append = recs.append
+        next_pcs = self.next_pcs
+        check_seg_loader = self._check_seg_loader
+        chunk_words = self.chunk_words
+        reg_nums = tuple(range(InstrTraceFile.NUM_REGS))
+        last = [None] * InstrTraceFile.NUM_REGS
+
+        def instr_hook():
+            pc = r_pc()
+            check_seg_loader()
+            if pc not in next_pcs:
+                self._add_pc(pc)
+            deltas = []
+            for num in reg_nums:
+                val = r_reg(num)
+                if val != last[num]:
+                    last[num] = val
+                    deltas.append(num)
+                    deltas.append(val)
+            append(pc)
+            append(1 | (len(deltas) << 16))
+            recs.extend(deltas)
+            self.num_recs += 1
+            if len(recs) >= chunk_words:
+                self._flush()
+
+        self.flush_rec = lambda: None
+        return instr_hook
+
+
+class InstrTraceReader:
+    """read a binary instruction trace file"""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.flags = 0
+        self.meta = None
+        self.code = None
+        self.recs = None
+        # pc -> current code version while reading the records
+        self.versions = {}
+
+    def load(self):
+        with open(self.file_name, "rb") as fh:
+            data = fh.read()
+        hdr = InstrTraceFile.HEADER
+        footer = InstrTraceFile.FOOTER
+        if len(data) < hdr.size + footer.size:
+            raise ValueError("trace file too short")
+        magic, version, flags = hdr.unpack_from(data, 0)
+        if magic != InstrTraceFile.MAGIC or version != InstrTraceFile.VERSION:
+            raise ValueError("no vamos trace file")
+        offset, size, end_magic = footer.unpack_from(data, len(data) - footer.size)
+        if end_magic != InstrTraceFile.END_MAGIC:
+            raise ValueError("incomplete vamos trace file")
+        self.flags = flags
+        self.meta = json.loads(data[offset : offset + size].decode("utf-8"))
+        self.code = {}
+        for pc_str, versions in self.meta["code"].items():
+            for info in versions:
+                info[0] = bytes.fromhex(info[0])
+            self.code[int(pc_str, 16)] = versions
+        recs = array("I")
+        recs.frombytes(data[hdr.size : offset])
+        little = bool(flags & InstrTraceFile.FLAG_LITTLE_ENDIAN)
+        if little != (sys.byteorder == "little"):
+            recs.byteswap()
+        self.recs = recs
+
+    def has_regs(self):
+        return bool(self.flags & InstrTraceFile.FLAG_REGS)
+
+    def get_cpu_name(self):
+        return self.meta["cpu"]
+
+    def get_version(self, pc):
+        """return the code version of pc at the current record"""
+        return self.versions.get(pc, 0)
+
+    def get_code(self, pc, version=None):
+        """return [code_bytes, label, sym, src, addon, txt] of pc.
+
+        Without a version the code at the current record is returned.
+        """
+        if version is None:
+            version = self.versions.get(pc, 0)
+        return self.code[pc][version]
+
+    def get_records(self):
+        """yield (pc, count, regs) where regs is a list of (reg, val)"""
+        recs = self.recs
+        num = len(recs)
+        versions = self.versions
+        versions.clear()
+        pos = 0
+        while pos < num:
+            pc = recs[pos]
+            word = recs[pos + 1]
+            pos += 2
+            count = word & 0xFFFF
+            num_vals = word >> 16
+            if count == 0:
+                versions[pc] = versions.get(pc, 0) + 1
+                continue
+            regs = []
+            if num_vals:
+                vals = recs[pos : pos + num_vals]
+                regs = list(zip(vals[0::2], vals[1::2]))
+                pos += num_vals
+            yield pc, count, regs
+
+    def get_instrs(self, pc, count):
+        """yield the pcs of count instructions executed from pc on"""
+        get_code = self.get_code
+        for _ in range(count):
+            yield pc
+            pc += len(get_code(pc)[0])
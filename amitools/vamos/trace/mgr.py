@@ -4,6 +4,8 @@ from amitools.vamos.label import LabelStruct, LabelLib, LabelSegment
 from amitools.vamos.machine import CPUState, DisAsm
 from amitools.vamos.machine.regs import *
 from .mem import TraceMemory
+from .instr import InstrTraceRecorder
+from .profile import MemAccessProfiler
 
 
 class TraceManager(object):
@@ -16,6 +18,9 @@ class TraceManager(object):
         self.disasm = DisAsm(machine)
         # state
         self.mem_tracer = None
+        self.instr_recorder = None
+        self.cpu_mem_trace = False
+        self.mem_profiler = None
 
     def parse_config(self, cfg):
         if not cfg:
@@ -24,11 +29,19 @@ class TraceManager(object):
             self.setup_vamos_ram_trace()
         if cfg.memory:
             self.setup_cpu_mem_trace()
-        if cfg.instr:
+        instr_file = cfg.get("instr_file")
+        if instr_file:
+            self.setup_cpu_instr_record(instr_file, cfg.reg_dump)
+        elif cfg.instr:
             with_regs = cfg.reg_dump
             self.setup_cpu_instr_trace(with_regs)
         return True
 
+    def shutdown(self):
+        if self.instr_recorder:
+            self.instr_recorder.stop()
+            self.instr_recorder = None
+
     def setup_vamos_ram_trace(self):
         mem = self.machine.get_mem()
         self.mem_tracer = TraceMemory(mem, self)
@@ -39,6 +52,7 @@ class TraceManager(object):
 
     def setup_cpu_mem_trace(self):
         self.machine.set_cpu_mem_trace_hook(self.trace_cpu_mem)
+        self.cpu_mem_trace = True
         if not log_mem.isEnabledFor(logging.INFO):
             log_mem.setLevel(logging.INFO)
 
@@ -68,6 +82,24 @@ class TraceManager(object):
 
         self.machine.set_instr_hook(instr_hook)
 
+    def setup_cpu_instr_record(self, file_name, with_regs):
+        """record a binary instruction trace for vamostrace"""
+        self.instr_recorder = InstrTraceRecorder(
+            self.machine, file_name, with_regs, self
+        )
+        self.instr_recorder.start()
+
+    def set_seg_loader(self, seg_loader):
+        """the instruction recorder watches the seglists for new code"""
+        if self.instr_recorder:
+            self.instr_recorder.set_seg_loader(seg_loader)
+
+    def add_mem_profiler(self, main_profiler):
+        """register the memory access profiler. a memory trace is kept"""
+        chain_func = self.trace_cpu_mem if self.cpu_mem_trace else None
+        self.mem_profiler = MemAccessProfiler(self.machine, chain_func)
+        return main_profiler.add_profiler(self.mem_profiler)
+
     # trace callback from CPU core
     def trace_cpu_mem(self, mode, width, addr, value=0):
         self._trace_mem(log_mem, mode, width, addr, value)
@@ -0,0 +1,248 @@
+import heapq
+from array import array
+
+from amitools.vamos.log import log_prof
+from amitools.vamos.profiler import Profiler
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.vamos.label import LabelLib, LabelStruct, LabelSegment
+
+
+class MemAccessProfiler(Profiler):
+    """count the memory accesses of the CPU.
+
+    Instead of logging each access like the memory trace the accesses are
+    counted in arrays: per label, per access width and per address granule.
+    The label of an address is looked up in the label manager and cached
+    until the address leaves the label or the labels change. Each granule
+    also keeps the label of its last access so the hot addresses can be
+    named even if the label was freed. Note that the CPU core also reports
+    the instruction fetches as reads.
+    """
+
+    name = "mem_access"
+    modes = ("R", "W")
+    widths = (8, 16, 32)
+
+    def __init__(self, machine, chain_func=None, enabled=False, num_hot=20):
+        self.machine = machine
+        self.label_mgr = machine.get_label_mgr()
+        self.chain_func = chain_func
+        self.enabled = enabled
+        self.num_hot = num_hot
+        self.granule_shift = 2
+        # (kind, name) -> slot
+        self.slots = {}
+        self.slot_keys = []
+        self.label_reads = array("Q")
+        self.label_writes = array("Q")
+        # mode * 3 + width
+        self.width_counts = array("Q", [0] * 6)
+        # per granule: only allocated if enabled
+        self.addr_reads = array("Q")
+        self.addr_writes = array("Q")
+        self.addr_slots = array("I")
+        # data of former runs
+        self.old_data = None
+
+    def get_name(self):
+        return self.name
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        self.num_hot = cfg.num_hot
+        return True
+
+    def set_data(self, data_dict):
+        self.old_data = data_dict
+        return True
+
+    def get_data(self):
+        if not self.enabled:
+            return None
+        res = ConfigDict()
+        widths = {}
+        for mode_idx, mode in enumerate(self.modes):
+            for width_idx, width in enumerate(self.widths):
+                widths["%s%d" % (mode, width)] = self.width_counts[
+                    mode_idx * 3 + width_idx
+                ]
+        res["widths"] = widths
+        labels = {}
+        for (kind, name), reads, writes in self.get_label_counts():
+            labels["%s:%s" % (kind, name)] = [reads, writes]
+        res["labels"] = labels
+        res["hot"] = [
+            ["%06x" % addr, reads, writes, name]
+            for addr, reads, writes, name in self.get_hot()
+        ]
+        if self.old_data:
+            self._merge_data(res, self.old_data)
+        return res
+
+    def _merge_data(self, res, old):
+        for key, val in old.widths.items():
+            res.widths[key] = res.widths.get(key, 0) + val
+        for key, val in old.labels.items():
+            cur = res.labels.get(key, [0, 0])
+            res.labels[key] = [cur[0] + val[0], cur[1] + val[1]]
+        # the hot addresses are only valid for a single run
+        hot = {entry[0]: entry[1:] for entry in old.hot}
+        for addr, reads, writes, name in res.hot:
+            if addr in hot:
+                old_reads, old_writes, _ = hot[addr]
+                hot[addr] = [reads + old_reads, writes + old_writes, name]
+            else:
+                hot[addr] = [reads, writes, name]
+        entries = [[addr] + val for addr, val in hot.items()]
+        entries.sort(key=lambda x: x[1] + x[2], reverse=True)
+        res["hot"] = entries[: self.num_hot]
+
+    def setup(self):
+        if not self.enabled:
+            return
+        log_prof.debug("mem_access: num_hot=%d", self.num_hot)
+        num = self.machine.get_ram_bytes() >> self.granule_shift
+        if len(self.addr_reads) != num:
+            self.addr_reads = array("Q", bytes(8 * num))
+            self.addr_writes = array("Q", bytes(8 * num))
+            self.addr_slots = array("I", bytes(4 * num))
+        self.machine.set_cpu_mem_trace_hook(self._create_hook())
+
+    def shutdown(self):
+        if not self.enabled:
+            return
+        if self.chain_func:
+            self.machine.set_cpu_mem_trace_hook(self.chain_func)
+        else:
+            mem = self.machine.get_mem()
+            mem.set_trace_mode(0)
+            mem.set_trace_func(None)
+
+    def dump(self, write):
+        if not self.enabled:
+            return
+        reads, writes = self.get_totals()
+        write("total reads: %d, writes: %d", reads, writes)
+        for mode_idx, mode in enumerate(self.modes):
+            counts = self.width_counts[mode_idx * 3 : mode_idx * 3 + 3]
+            write(
+                "%s:  8 bit: %10d  16 bit: %10d  32 bit: %10d",
+                mode,
+                counts[0],
+                counts[1],
+                counts[2],
+            )
+        write("%-8s  %-32s  %10s  %10s", "kind", "label", "reads", "writes")
+        for (kind, name), reads, writes in self.get_label_counts():
+            write("%-8s  %-32s  %10d  %10d", kind, name, reads, writes)
+        write("%-8s  %-32s  %10s  %10s", "address", "label", "reads", "writes")
+        for addr, reads, writes, name in self.get_hot():
+            write("%06x    %-32s  %10d  %10d", addr, name, reads, writes)
+
+    def get_totals(self):
+        reads = sum(self.width_counts[0:3])
+        writes = sum(self.width_counts[3:6])
+        return reads, writes
+
+    def get_label_counts(self):
+        """return list of ((kind, name), reads, writes) sorted by accesses"""
+        res = []
+        for slot, key in enumerate(self.slot_keys):
+            reads = self.label_reads[slot]
+            writes = self.label_writes[slot]
+            res.append((key, reads, writes))
+        res.sort(key=lambda x: x[1] + x[2], reverse=True)
+        return res
+
+    def get_hot(self):
+        """return list of (addr, reads, writes, label) of the most used
+        granules"""
+        reads = self.addr_reads
+        writes = self.addr_writes
+        slots = self.addr_slots
+        keys = self.slot_keys
+        idxs = heapq.nlargest(
+            self.num_hot,
+            (idx for idx in range(len(reads)) if reads[idx] or writes[idx]),
+            key=lambda idx: reads[idx] + writes[idx],
+        )
+        shift = self.granule_shift
+        return [
+            (idx << shift, reads[idx], writes[idx], keys[slots[idx]][1]) for idx in idxs
+        ]
+
+    def _get_slot(self, label):
+        if label is None:
+            key = ("none", "??")
+        elif isinstance(label, LabelLib):
+            key = ("lib", label.name)
+        elif isinstance(label, LabelSegment):
+            key = ("segment", label.name)
+        elif isinstance(label, LabelStruct):
+            key = ("struct", "%s(%s)" % (label.name, label.struct.sdef.get_type_name()))
+        else:
+            key = ("range", label.name)
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = len(self.slot_keys)
+            self.slots[key] = slot
+            self.slot_keys.append(key)
+            self.label_reads.append(0)
+            self.label_writes.append(0)
+        return slot
+
+    def _create_hook(self):
+        label_mgr = self.label_mgr
+        label_reads = self.label_reads
+        label_writes = self.label_writes
+        width_counts = self.width_counts
+        addr_reads = self.addr_reads
+        addr_writes = self.addr_writes
+        addr_slots = self.addr_slots
+        num_addrs = len(addr_reads)
+        shift = self.granule_shift
+        get_slot = self._get_slot
+        chain_func = self.chain_func
+        # cached label range
+        lo = 0
+        hi = 0
+        slot = 0
+        gen = -1
+        if label_mgr is None:
+            hi = 1 << 32
+            slot = get_slot(None)
+            find = None
+        else:
+            find = label_mgr.get_label
+
+        def hook(mode, width, addr, value=0):
+            nonlocal lo, hi, slot, gen
+            if not (lo <= addr < hi) or (find and gen != label_mgr.generation):
+                gen = label_mgr.generation
+                label = find(addr)
+                if label is None:
+                    lo = hi = 0
+                else:
+                    lo = label.addr
+                    hi = label.end
+                slot = get_slot(label)
+            idx = addr >> shift
+            if mode == "R":
+                width_counts[width] += 1
+                label_reads[slot] += 1
+                if idx < num_addrs:
+                    addr_reads[idx] += 1
+                    addr_slots[idx] = slot
+            elif mode == "W":
+                width_counts[3 + width] += 1
+                label_writes[slot] += 1
+                if idx < num_addrs:
+                    addr_writes[idx] += 1
+                    addr_slots[idx] = slot
+            if chain_func:
+                chain_func(mode, width, addr, value)
+            return 0
+
+        return hook
@@ -0,0 +1,56 @@
+from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.libstructs import FileInfoBlockStruct, MessageStruct
+from amitools.vamos.machine import MockMemory
+
+FIB_VALUES = {
+    "fib_DiskKey": 42,
+    "fib_DirEntryType": -3,
+    "fib_EntryType": -3,
+    "fib_Protection": 0x0F,
+    "fib_Size": 1234,
+    "fib_NumBlocks": 3,
+    "fib_Date.ds_Days": 10000,
+    "fib_Date.ds_Minute": 100,
+    "fib_Date.ds_Tick": 20,
+}
+
+
+def astructs_access_msg_benchmark(benchmark):
+    mem = MockMemory()
+
+    def run():
+        msg = AccessStruct(mem, MessageStruct, 0x100)
+        msg.w_s("mn_ReplyPort", 0x200)
+        msg.w_s("mn_Length", 20)
+        return msg.r_s("mn_Node.ln_Name")
+
+    assert benchmark(run) == 0
+
+
+def astructs_access_fib_w_s_benchmark(benchmark):
+    mem = MockMemory()
+
+    def run():
+        fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+        for name, val in FIB_VALUES.items():
+            fib.w_s(name, val)
+
+    benchmark(run)
+
+
+def astructs_access_fib_write_many_benchmark(benchmark):
+    mem = MockMemory()
+
+    def run():
+        fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+        fib.write_many(FIB_VALUES, clear=True)
+
+    benchmark(run)
+
+
+def astructs_access_fib_read_all_benchmark(benchmark):
+    mem = MockMemory()
+    fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+    fib.write_many(FIB_VALUES)
+    values = benchmark(fib.read_all)
+    assert values["fib_Date.ds_Tick"] == 20
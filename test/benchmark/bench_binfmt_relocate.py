@@ -0,0 +1,54 @@
+import pytest
+from machine68k import CPUType
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.Relocate import Relocate
+from amitools.vamos.machine import Machine
+
+BINS = ("math_double_trans_gcc_dbg", "dos_examine_sc")
+
+
+class EntryRelocate(Relocate):
+    """relocate each entry separately like the verbose mode does"""
+
+    def _reloc_data(self, data, segment, addrs, offset=0):
+        my_addr = addrs[segment.id]
+        for to_seg in segment.get_reloc_to_segs():
+            to_addr = addrs[to_seg.id]
+            for r in segment.get_reloc(to_seg).get_relocs():
+                self._reloc(segment.id, data, r, my_addr, to_addr, to_seg.id, offset)
+
+
+@pytest.mark.parametrize("mode", ["entry", "batch"])
+@pytest.mark.parametrize("name", BINS)
+def binfmt_relocate_benchmark(benchmark, name, mode):
+    bin_img = BinFmt().load_image("bin/" + name)
+    if mode == "entry":
+        r = EntryRelocate(bin_img)
+    else:
+        r = Relocate(bin_img)
+    addrs = r.get_seq_addrs(0x20000)
+    result = benchmark(r.relocate, addrs)
+    assert result == Relocate(bin_img).relocate(addrs)
+
+
+@pytest.mark.parametrize("mode", ["copy", "in_place"])
+@pytest.mark.parametrize("name", BINS)
+def binfmt_relocate_to_mem_benchmark(benchmark, name, mode):
+    bin_img = BinFmt().load_image("bin/" + name)
+    r = Relocate(bin_img)
+    addrs = r.get_seq_addrs(0x1000, 8)
+    machine = Machine(CPUType.M68000, raise_on_main_run=False)
+    mem = machine.get_mem()
+
+    def copy():
+        for addr, data in zip(addrs, r.relocate(addrs)):
+            mem.w_block(addr, data)
+
+    def in_place():
+        r.relocate_to_mem(mem, addrs)
+
+    if mode == "copy":
+        benchmark(copy)
+    else:
+        benchmark(in_place)
+    machine.cleanup()
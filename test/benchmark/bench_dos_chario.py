@@ -0,0 +1,70 @@
+import io
+from amitools.vamos.lib.DosLibrary import DosLibrary
+from amitools.vamos.lib.dos.FileHandle import FileHandle
+from amitools.vamos.log import log_dos
+from amitools.vamos.machine import MockMachine
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.libcore import LibCtx
+
+
+class FakeFileManager:
+    def __init__(self, fh):
+        self.fh = fh
+
+    def get_by_b_addr(self, b_addr, for_writing=None):
+        return self.fh
+
+    def flush_bufs(self):
+        self.fh.flush_buf()
+
+
+def _setup(data=b""):
+    machine = MockMachine()
+    ctx = LibCtx(machine)
+    alloc = MemoryAlloc.for_machine(machine)
+    fh = FileHandle(io.BytesIO(data), "ram:test", "/tmp/test")
+    b_addr = fh.alloc_fh(alloc, 0)
+    dos = DosLibrary()
+    dos.file_mgr = FakeFileManager(fh)
+    return dos, ctx, fh, b_addr
+
+
+def _eager_fgetc(dos, b_addr):
+    """FGetC as it was with eager log formatting"""
+    fh = dos.file_mgr.get_by_b_addr(b_addr, False)
+    ch = fh.getc()
+    if ch == -1:
+        log_dos.info("FGetC(%s) -> EOF (%d)" % (fh, ch))
+    else:
+        log_dos.info("FGetC(%s) -> '%c' (%d)" % (fh, ch, ch))
+    return ch
+
+
+def _eager_fputc(dos, b_addr, val):
+    """FPutC as it was with eager log formatting"""
+    fh = dos.file_mgr.get_by_b_addr(b_addr, True)
+    log_dos.info("FPutC(%s, '%c' (%d))" % (fh, val, val))
+    fh.write(bytes((val,)))
+    return val
+
+
+def dos_fgetc_eager_benchmark(benchmark):
+    dos, ctx, fh, b_addr = _setup()
+    fh.ungets(b"a")
+    benchmark(_eager_fgetc, dos, b_addr)
+
+
+def dos_fgetc_lazy_benchmark(benchmark):
+    dos, ctx, fh, b_addr = _setup()
+    fh.ungets(b"a")
+    benchmark(dos.FGetC, ctx, b_addr)
+
+
+def dos_fputc_eager_benchmark(benchmark):
+    dos, ctx, fh, b_addr = _setup()
+    benchmark(_eager_fputc, dos, b_addr, 0x41)
+
+
+def dos_fputc_lazy_benchmark(benchmark):
+    dos, ctx, fh, b_addr = _setup()
+    benchmark(dos.FPutC, ctx, b_addr, 0x41)
@@ -0,0 +1,32 @@
+import pytest
+from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.libstructs import FileInfoBlockStruct
+from amitools.vamos.lib.dos.Lock import Lock
+from amitools.vamos.lib.dos.Error import NO_ERROR
+from amitools.vamos.machine import MockMemory
+
+NUM_FILES = 10000
+
+
+@pytest.fixture(scope="module")
+def big_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("big_dir")
+    for i in range(NUM_FILES):
+        (path / ("file%05d.c" % i)).write_bytes(b"x" * (i % 1000))
+    return str(path)
+
+
+def dos_lock_exnext_benchmark(benchmark, big_dir):
+    mem = MockMemory()
+    fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+    lock = Lock("big", "t:big", big_dir)
+    lock.key = 1
+
+    def scan():
+        assert lock.examine_lock(fib) == NO_ERROR
+        num = 0
+        while lock.examine_next(fib) == NO_ERROR:
+            num += 1
+        assert num == NUM_FILES
+
+    benchmark(scan)
@@ -0,0 +1,47 @@
+import pytest
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+from amitools.fs.blkdev.ImageFile import ImageFile
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+
+DATA = bytes(x % 256 for x in range(6 * 1024))
+
+
+def write_files(path, cache):
+    opts = {"size": "4Mi", "mmap": False, "cache": cache}
+    blkdev = BlkDevFactory().create(path, options=opts)
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Bench"), is_ffs=True)
+    for d in range(4):
+        dir_name = "dir%d" % d
+        vol.create_dir(FSString(dir_name))
+        for f in range(16):
+            vol.write_file(DATA, FSString("%s/file%d" % (dir_name, f)))
+    vol.close()
+    blkdev.close()
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def fs_blkcache_write_benchmark(benchmark, tmpdir, monkeypatch, cache):
+    path = str(tmpdir / "bench.hdf")
+    benchmark(write_files, path, cache)
+    # count the writes reaching the image file
+    writes = []
+    write_blk = ImageFile.write_blk
+
+    def count_write_blk(self, blk_num, data, num_blks=1):
+        writes.append(blk_num)
+        write_blk(self, blk_num, data, num_blks)
+
+    monkeypatch.setattr(ImageFile, "write_blk", count_write_blk)
+    write_files(path, cache)
+    monkeypatch.undo()
+    benchmark.extra_info["image_writes"] = len(writes)
+    if cache:
+        assert len(writes) < 10
+    blkdev = BlkDevFactory().open(path, read_only=True)
+    vol = ADFSVolume(blkdev)
+    vol.open()
+    assert vol.read_file(FSString("dir3/file15")) == DATA
+    vol.close()
+    blkdev.close()
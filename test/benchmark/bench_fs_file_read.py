@@ -0,0 +1,35 @@
+import pytest
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.ADFSFile import ADFSFile
+from amitools.fs.FSString import FSString
+
+DATA = bytes(x % 251 for x in range(4 * 1024 * 1024))
+
+
+@pytest.fixture(scope="module")
+def hdf_image(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bench") / "bench.hdf")
+    blkdev = BlkDevFactory().create(path, options={"size": "8Mi"})
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Bench"), is_ffs=True)
+    vol.write_file(DATA, FSString("big"))
+    vol.close()
+    blkdev.close()
+    return path
+
+
+def read_file(vol):
+    return vol.read_file(FSString("big"))
+
+
+@pytest.mark.parametrize("max_blks", [1, 128])
+def fs_file_read_benchmark(benchmark, hdf_image, monkeypatch, max_blks):
+    monkeypatch.setattr(ADFSFile, "max_chunk_blks", max_blks)
+    blkdev = BlkDevFactory().open(hdf_image, read_only=True)
+    vol = ADFSVolume(blkdev)
+    vol.open()
+    data = benchmark(read_file, vol)
+    assert data == DATA
+    vol.close()
+    blkdev.close()
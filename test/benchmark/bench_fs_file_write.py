@@ -0,0 +1,45 @@
+import tracemalloc
+import pytest
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+
+SIZE = 4 * 1024 * 1024
+
+
+def write_file(path, data_file, mode):
+    blkdev = BlkDevFactory().create(path, options={"size": "8Mi"})
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Bench"), is_ffs=True)
+    fh = open(data_file, "rb")
+    if mode == "stream":
+        vol.write_file_stream(fh, SIZE, FSString("big"))
+    else:
+        vol.write_file(fh.read(), FSString("big"))
+    fh.close()
+    vol.close()
+    blkdev.close()
+
+
+@pytest.mark.parametrize("mode", ["data", "stream"])
+def fs_file_write_benchmark(benchmark, tmpdir, mode):
+    data = bytes(x % 251 for x in range(SIZE))
+    data_file = str(tmpdir / "data")
+    with open(data_file, "wb") as fh:
+        fh.write(data)
+    path = str(tmpdir / "bench.hdf")
+    benchmark(write_file, path, data_file, mode)
+    # measure peak memory of a single write
+    tracemalloc.start()
+    write_file(path, data_file, mode)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_mem"] = peak
+    if mode == "stream":
+        assert peak < SIZE
+    blkdev = BlkDevFactory().open(path, read_only=True)
+    vol = ADFSVolume(blkdev)
+    vol.open()
+    assert vol.read_file(FSString("big")) == data
+    vol.close()
+    blkdev.close()
@@ -0,0 +1,29 @@
+import pytest
+from amitools.fs.blkdev.ImageFile import ImageFile
+
+NUM_BLOCKS = 8192
+
+
+def create_image(tmpdir):
+    path = str(tmpdir / "bench.hdf")
+    with open(path, "wb") as fh:
+        fh.truncate(NUM_BLOCKS * 512)
+    return path
+
+
+def read_write_blocks(im):
+    data = b"\x42" * 512
+    for blk_num in range(NUM_BLOCKS):
+        im.read_blk(blk_num)
+        im.write_blk(blk_num, data)
+    im.flush()
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def fs_imagefile_benchmark(benchmark, tmpdir, use_mmap):
+    im = ImageFile(create_image(tmpdir), use_mmap=use_mmap)
+    im.open()
+    assert im.is_mapped() == use_mmap
+    benchmark(read_write_blocks, im)
+    assert bytes(im.read_blk(NUM_BLOCKS - 1)) == b"\x42" * 512
+    im.close()
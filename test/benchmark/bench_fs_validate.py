@@ -0,0 +1,70 @@
+import pytest
+from amitools.fs.blkdev.ADFBlockDevice import ADFBlockDevice
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+from amitools.fs.validate.Validator import Validator
+from amitools.fs.validate.Log import Log
+from amitools.fs.block.Block import Block
+from amitools.fs.block.BootBlock import BootBlock
+
+
+def loop_block_chksum(self):
+    chksum = 0
+    for i in range(self.block_longs):
+        if i != self.chk_loc:
+            chksum += self._get_long(i)
+    return (-chksum) & 0xFFFFFFFF
+
+
+def loop_boot_chksum(self):
+    all_blks = [self] + self.extra_blks
+    n = self.blkdev.block_longs
+    chksum = 0
+    for b, blk in enumerate(all_blks):
+        for i in range(n):
+            if not (b == 0 and i == 1):  # skip chksum
+                chksum += blk._get_long(i)
+                if chksum > 0xFFFFFFFF:
+                    chksum += 1
+                    chksum &= 0xFFFFFFFF
+    return (~chksum) & 0xFFFFFFFF
+
+
+def create_image(tmpdir):
+    img_file = str(tmpdir / "bench.adf")
+    blkdev = ADFBlockDevice(img_file)
+    blkdev.create()
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Bench"))
+    data = bytes(x % 256 for x in range(20 * 1024))
+    for d in range(4):
+        dir_name = "dir%d" % d
+        vol.create_dir(FSString(dir_name))
+        for f in range(8):
+            path = FSString("%s/file%d" % (dir_name, f))
+            vol.write_file(data, path)
+    vol.close()
+    blkdev.close()
+    return img_file
+
+
+def validate(blkdev):
+    v = Validator(blkdev, min_level=Log.ERROR)
+    v.scan_boot()
+    v.scan_root()
+    v.scan_dir_tree()
+    v.scan_files()
+    v.scan_bitmap()
+    return v.get_summary()
+
+
+@pytest.mark.parametrize("mode", ["loop", "sum"])
+def fs_validate_benchmark(benchmark, tmpdir, monkeypatch, mode):
+    blkdev = ADFBlockDevice(create_image(tmpdir), read_only=True)
+    blkdev.open()
+    if mode == "loop":
+        monkeypatch.setattr(Block, "_calc_chksum", loop_block_chksum)
+        monkeypatch.setattr(BootBlock, "_calc_chksum", loop_boot_chksum)
+    result = benchmark(validate, blkdev)
+    assert result == (0, 0)
+    blkdev.close()
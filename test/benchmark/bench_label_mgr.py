@@ -0,0 +1,59 @@
+import random
+from amitools.vamos.label import LabelManager, LabelRange
+
+NUM_LABELS = 10000
+
+
+def _create_labels():
+    # allocation like layout: consecutive blocks of mixed sizes
+    rng = random.Random(4711)
+    labels = []
+    addr = 0x1000
+    for i in range(NUM_LABELS):
+        size = rng.choice((8, 16, 32, 64, 256, 1024))
+        labels.append(LabelRange("label%d" % i, addr, size))
+        addr += size
+    return labels, addr
+
+
+def _create_mgr():
+    labels, end = _create_labels()
+    lm = LabelManager()
+    for label in labels:
+        lm.add_label(label)
+    return lm, labels, end
+
+
+def label_mgr_add_remove_benchmark(benchmark):
+    labels, _ = _create_labels()
+
+    def run():
+        lm = LabelManager()
+        for label in labels:
+            lm.add_label(label)
+        for label in labels:
+            lm.remove_label(label)
+
+    benchmark(run)
+
+
+def label_mgr_get_label_benchmark(benchmark):
+    lm, _, end = _create_mgr()
+    addrs = list(range(0x1000, end, (end - 0x1000) // 1000))
+
+    def run():
+        for addr in addrs:
+            lm.get_label(addr)
+
+    benchmark(run)
+
+
+def label_mgr_get_intersecting_benchmark(benchmark):
+    lm, _, end = _create_mgr()
+    addrs = list(range(0x1000, end, (end - 0x1000) // 1000))
+
+    def run():
+        for addr in addrs:
+            lm.get_intersecting_labels(addr, 0x100)
+
+    benchmark(run)
@@ -13,7 +13,7 @@ def _create_ctx():
     return LibCtx(machine)
 
 
-def _create_stub(do_profile=False, do_log=False):
+def _create_stub(do_profile=False, do_log=False, compile_funcs=False):
     name = "vamostest.library"
     impl = VamosTestLibrary()
     fd = read_lib_fd(name)
@@ -31,7 +31,9 @@ def _create_stub(do_profile=False, do_log=False):
         log_missing = None
         log_valid = None
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = LibStubGen(
+        log_missing=log_missing, log_valid=log_valid, compile_funcs=compile_funcs
+    )
     stub = gen.gen_stub(scan, ctx, profile)
     return stub
 
@@ -41,6 +43,38 @@ def libcore_stub_base_benchmark(benchmark):
     benchmark(stub.PrintHello)
 
 
+def libcore_stub_compiled_benchmark(benchmark):
+    stub = _create_stub(compile_funcs=True)
+    benchmark(stub.PrintHello)
+
+
+def libcore_stub_args_base_benchmark(benchmark):
+    stub = _create_stub()
+    benchmark(stub.Add)
+
+
+def libcore_stub_args_compiled_benchmark(benchmark):
+    stub = _create_stub(compile_funcs=True)
+    benchmark(stub.Add)
+
+
+def libcore_regs_single_benchmark(benchmark):
+    ctx = _create_ctx()
+    cpu = ctx.cpu
+
+    def run():
+        return cpu.r_reg(1), cpu.r_reg(2), cpu.r_reg(3), cpu.r_reg(4)
+
+    benchmark(run)
+
+
+def libcore_regs_reader_benchmark(benchmark):
+    ctx = _create_ctx()
+    fd = read_lib_fd("dos.library")
+    reader = ctx.regs.get_fd_reader(fd.get_func_by_name("FRead"))
+    benchmark(reader)
+
+
 def libcore_stub_profile_benchmark(benchmark):
     stub = _create_stub(do_profile=True)
     benchmark(stub.PrintHello)
@@ -0,0 +1,51 @@
+import pytest
+from machine68k import CPUType
+from amitools.vamos.machine import Machine
+from amitools.vamos.machine.opcodes import op_rts
+from amitools.vamos.main import main as vamos_main
+
+LOOP_COUNT = 1000000
+SUITE_PROGS = (
+    "math_double_trans_gcc",
+    "math_single_gcc",
+    "exec_rawdofmt_gcc",
+    "dos_readargs_gcc",
+)
+
+
+def _setup_loop(adaptive):
+    m = Machine(CPUType.M68000, raise_on_main_run=False, adaptive_cycles=adaptive)
+    mem = m.get_mem()
+    code = m.get_ram_begin()
+    # move.l #count,d0 ; loop: subq.l #1,d0 ; bne loop ; rts
+    mem.w16(code, 0x203C)
+    mem.w32(code + 2, LOOP_COUNT)
+    mem.w16(code + 6, 0x5380)
+    mem.w16(code + 8, 0x66FC)
+    mem.w16(code + 10, op_rts)
+    return m, code, m.get_scratch_top()
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def machine_run_loop_benchmark(benchmark, adaptive):
+    m, code, stack = _setup_loop(adaptive)
+
+    def run():
+        rs = m.run(code, stack)
+        assert rs.done
+
+    benchmark(run)
+    m.cleanup()
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize("prog", SUITE_PROGS)
+def machine_run_suite_benchmark(benchmark, prog, adaptive):
+    args = ["-c", "test.vamosrc", "-q", "bin/" + prog]
+    if adaptive:
+        args.insert(0, "--adaptive-cycles")
+
+    def run():
+        assert vamos_main(args=args) == 0
+
+    benchmark(run)
@@ -0,0 +1,88 @@
+import random
+import pytest
+from amitools.vamos.machine import MockMemory
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.label import LabelManager
+
+ENGINES = ("first_fit", "size_bins")
+
+
+def _record_trace(num_ops, sizes, free_ratio, seed):
+    """record an alloc/free trace: ('a', id, size) or ('f', id)"""
+    rng = random.Random(seed)
+    trace = []
+    live = []
+    next_id = 0
+    for _ in range(num_ops):
+        if live and rng.random() < free_ratio:
+            pos = rng.randrange(len(live))
+            live[pos], live[-1] = live[-1], live[pos]
+            trace.append(("f", live.pop()))
+        else:
+            trace.append(("a", next_id, rng.choice(sizes)))
+            live.append(next_id)
+            next_id += 1
+    # free all remaining
+    for i in live:
+        trace.append(("f", i))
+    return trace
+
+
+# compiler like: many small nodes with some buffers in between
+TRACE_NODES = _record_trace(20000, (8, 12, 16, 24, 32, 48, 64, 512, 4096), 0.4, 42)
+# fragmenting: mixed sizes with a lot of frees
+TRACE_FRAG = _record_trace(20000, (4, 100, 1000, 10000), 0.48, 23)
+
+
+def _replay(engine, trace):
+    mem = MockMemory(size_kib=16 * 1024)
+    alloc = MemoryAlloc(mem, engine=engine)
+    addrs = {}
+    sizes = {}
+    for op in trace:
+        if op[0] == "a":
+            _, i, size = op
+            addrs[i] = alloc.alloc_mem(size)
+            sizes[i] = size
+        else:
+            i = op[1]
+            alloc.free_mem(addrs.pop(i), sizes.pop(i))
+    assert alloc.is_all_free()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_nodes_benchmark(benchmark, engine):
+    benchmark(_replay, engine, TRACE_NODES)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_frag_benchmark(benchmark, engine):
+    benchmark(_replay, engine, TRACE_FRAG)
+
+
+@pytest.mark.parametrize("mode", ["label", "fast"])
+def mem_alloc_exec_benchmark(benchmark, mode):
+    mem = MockMemory(size_kib=16 * 1024)
+    if mode == "label":
+        alloc = MemoryAlloc(mem, label_mgr=LabelManager())
+    else:
+        alloc = MemoryAlloc(mem)
+    sizes = [16 + (i % 8) * 24 for i in range(1000)]
+
+    def label_run():
+        mbs = [
+            alloc.alloc_memory(size, label="AllocMem(%06x)" % 0x1234) for size in sizes
+        ]
+        for mb in mbs:
+            alloc.free_memory(mb)
+
+    def fast_run():
+        addrs = [alloc.alloc_fast(size, "AllocMem(%06x)", 0x1234) for size in sizes]
+        for addr in addrs:
+            alloc.free_fast(addr)
+
+    if mode == "label":
+        benchmark(label_run)
+    else:
+        benchmark(fast_run)
+    assert alloc.is_all_free()
@@ -0,0 +1,30 @@
+import os
+import pytest
+from amitools.vamos.path import VolumeManager
+
+NUM_FILES = 1000
+OLD_TIME = 1000000000
+
+
+@pytest.fixture(scope="module")
+def include_vol(tmp_path_factory):
+    path = tmp_path_factory.mktemp("vol")
+    inc = path / "Include" / "Exec"
+    inc.mkdir(parents=True)
+    for i in range(NUM_FILES):
+        (inc / ("Types%04d.h" % i)).write_bytes(b"")
+    for p in (inc, inc.parent, path):
+        os.utime(p, (OLD_TIME, OLD_TIME))
+    v = VolumeManager()
+    assert v.add_volume("Work:" + str(path))
+    return v
+
+
+def path_volume_ami_to_sys_benchmark(benchmark, include_vol):
+    names = ["work:include/exec/types%04d.h" % i for i in range(0, NUM_FILES, 10)]
+
+    def lookup():
+        for name in names:
+            assert include_vol.ami_to_sys_path(name)
+
+    benchmark(lookup)
@@ -1,2 +1,7 @@
 def run_test(vamos):
     vamos.run_prog_checked("exec_copymem")
+
+
+def run_native_funcs_test(vamos):
+    vargs = ["-O", "exec.library=native_funcs:true"]
+    vamos.run_prog_checked("exec_copymem", vargs=vargs)
@@ -60,7 +60,7 @@ def test_execpy_vamos_ctx_func_test(vamos):
     assert stdout == [
         "hello, world!",
         "<class 'amitools.vamos.libcore.ctx.LibCtx'>",
-        "['cpu', 'machine', 'mem', 'proxies', 'vlib']",
+        "['cpu', 'machine', 'mem', 'proxies', 'regs', 'vlib']",
     ]
     assert stderr == []
 
@@ -68,7 +68,14 @@ def test_execpy_vamos_ctx_func_test(vamos):
 def test_execpy_vamos_ctx_func_checked_test(vamos):
     def test(ctx):
         """the nested test ctx_func without return"""
-        assert sorted(ctx.__dict__) == ["cpu", "machine", "mem", "proxies", "vlib"]
+        assert sorted(ctx.__dict__) == [
+            "cpu",
+            "machine",
+            "mem",
+            "proxies",
+            "regs",
+            "vlib",
+        ]
 
     vamos.run_ctx_func_checked(test)
 
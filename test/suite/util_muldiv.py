@@ -1,2 +1,7 @@
 def run_test(vamos):
     vamos.run_prog_check_data("util_muldiv")
+
+
+def run_native_funcs_test(vamos):
+    vargs = ["-O", "utility.library=native_funcs:true"]
+    vamos.run_prog_check_data("util_muldiv", vargs=vargs)
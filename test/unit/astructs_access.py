@@ -84,3 +84,58 @@ def mem_access_bptr_test():
     assert a.r_s("bs_TestBptr") == 44
     # check auto converted baddr
     assert mem.r32(0x42) == 11
+
+
+def mem_access_alias_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyTaskStruct, 0x42)
+    a.w_s("tc_Node.succ", 42)
+    assert a.r_s("tc_Node.ln_Succ") == 42
+    assert a.r_s("node.pri") == 0
+    assert a.s_get_addr("node.pri") == 0x42 + 9
+    assert a.s_get_addr("tc_Node") == 0x42
+
+
+def mem_access_read_all_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyTaskStruct, 0x40)
+    a.w_s("tc_Node.ln_Succ", 0x100)
+    a.w_s("tc_Node.ln_Pri", -3)
+    a.w_s("tc_Node.ln_Name", 0x200)
+    assert a.read_all() == {
+        "tc_Node.ln_Succ": 0x100,
+        "tc_Node.ln_Pred": 0,
+        "tc_Node.ln_Type": 0,
+        "tc_Node.ln_Pri": -3,
+        "tc_Node.ln_Name": 0x200,
+    }
+
+
+def mem_access_write_many_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyNodeStruct, 0x40)
+    a.w_s("ln_Pred", 21)
+    a.write_many({"ln_Succ": 42, "ln_Pri": -27, "type": 3})
+    assert a.r_s("ln_Succ") == 42
+    assert a.r_s("ln_Pred") == 21
+    assert a.r_s("ln_Type") == 3
+    assert a.r_s("ln_Pri") == -27
+    # clear other fields
+    a.write_many({"ln_Name": 0x100}, clear=True)
+    assert a.read_all() == {
+        "ln_Succ": 0,
+        "ln_Pred": 0,
+        "ln_Type": 0,
+        "ln_Pri": 0,
+        "ln_Name": 0x100,
+    }
+    with pytest.raises(KeyError):
+        a.write_many({"bla": 1})
+
+
+def mem_access_bptr_many_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyBCPLStruct, 0x40)
+    a.write_many({"bs_TestBptr": 0x100})
+    assert mem.r32(0x40) == 0x40
+    assert a.read_all() == {"bs_TestBptr": 0x100}
@@ -0,0 +1,129 @@
+import struct
+import pytest
+from machine68k import CPUType
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImage import (
+    BinImage,
+    Segment,
+    Relocations,
+    Reloc,
+    BIN_IMAGE_TYPE_HUNK,
+    BIN_IMAGE_RELOC_32,
+    BIN_IMAGE_RELOC_PC32,
+    SEGMENT_TYPE_CODE,
+    SEGMENT_TYPE_DATA,
+)
+from amitools.binfmt.Relocate import Relocate, numpy
+from amitools.vamos.machine import Machine, MockMemory
+
+BINS = ("dos_examine_gcc_dbg", "dos_examine_sc", "math_double_trans_gcc_dbg")
+USE_NUMPY = [False]
+if numpy is not None:
+    USE_NUMPY.append(True)
+
+
+def ref_relocate(bin_img, addrs, padding=0, one_block=False):
+    """relocate each entry separately"""
+    segs = bin_img.get_segments()
+    datas = []
+    for seg in segs:
+        data = bytearray(seg.size)
+        if seg.data is not None:
+            data[: len(seg.data)] = seg.data
+        for to_seg in seg.get_reloc_to_segs():
+            to_addr = addrs[to_seg.id]
+            for r in seg.get_reloc(to_seg).get_relocs():
+                val = struct.unpack_from(">I", data, r.offset)[0] + r.addend
+                if r.type == BIN_IMAGE_RELOC_32:
+                    val += to_addr
+                else:
+                    val += to_addr - addrs[seg.id] - r.offset
+                struct.pack_into(">I", data, r.offset, val & 0xFFFFFFFF)
+        datas.append(data)
+    return datas
+
+
+def create_bin_img():
+    bin_img = BinImage(BIN_IMAGE_TYPE_HUNK)
+    code = Segment(SEGMENT_TYPE_CODE, 64, bytes(range(64)))
+    data = Segment(SEGMENT_TYPE_DATA, 32, b"\xff" * 32)
+    bin_img.add_segment(code)
+    bin_img.add_segment(data)
+    rl = Relocations(data)
+    rl.add_reloc(Reloc(0, addend=4))
+    rl.add_reloc(Reloc(6))
+    rl.add_reloc(Reloc(12, BIN_IMAGE_RELOC_PC32))
+    rl.add_reloc(Reloc(20, BIN_IMAGE_RELOC_PC32, addend=-8))
+    code.add_reloc(data, rl)
+    rl = Relocations(code)
+    # overflow wraps around
+    rl.add_reloc(Reloc(8))
+    data.add_reloc(code, rl)
+    return bin_img
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def binfmt_relocate_synthetic_test(use_numpy):
+    bin_img = create_bin_img()
+    addrs = [0x1000, 0x2000]
+    r = Relocate(bin_img, use_numpy=use_numpy)
+    r.numpy_min_relocs = 1
+    datas = r.relocate(addrs)
+    assert datas == ref_relocate(bin_img, addrs)
+    assert datas[0][0:4] == bytes.fromhex("00012207")
+    assert datas[1][8:12] == bytes.fromhex("00000fff")
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def binfmt_relocate_batches_test(use_numpy):
+    bin_img = create_bin_img()
+    code = bin_img.get_segments()[0]
+    rl = code.get_reloc(bin_img.get_segments()[1])
+    batches = rl.get_batches()
+    assert list(batches[BIN_IMAGE_RELOC_32][0]) == [0, 6]
+    assert list(batches[BIN_IMAGE_RELOC_PC32][1]) == [0, -8]
+    # adding a reloc updates batches
+    rl.add_reloc(Reloc(30))
+    assert list(rl.get_batches()[BIN_IMAGE_RELOC_32][0]) == [0, 6, 30]
+    r = Relocate(bin_img, use_numpy=use_numpy)
+    assert r.relocate([0, 0x100]) == ref_relocate(bin_img, [0, 0x100])
+
+
+def binfmt_relocate_bad_type_test():
+    bin_img = create_bin_img()
+    code, data = bin_img.get_segments()
+    code.get_reloc(data).add_reloc(Reloc(40, 2))
+    with pytest.raises(Exception):
+        Relocate(bin_img).relocate([0, 0x100])
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+@pytest.mark.parametrize("name", BINS)
+def binfmt_relocate_bin_test(name, use_numpy):
+    bin_img = BinFmt().load_image("bin/" + name)
+    r = Relocate(bin_img, use_numpy=use_numpy)
+    addrs = r.get_seq_addrs(0x20000, 8)
+    assert r.relocate(addrs) == ref_relocate(bin_img, addrs)
+    # one block is the concatenation of the segments
+    block = r.relocate_one_block(0x20000, 8)
+    verbose = Relocate(bin_img, verbose=True)
+    assert block == verbose.relocate_one_block(0x20000, 8)
+
+
+@pytest.mark.parametrize("name", BINS)
+def binfmt_relocate_to_mem_test(name):
+    bin_img = BinFmt().load_image("bin/" + name)
+    r = Relocate(bin_img)
+    addrs = r.get_seq_addrs(0x1000, 8)
+    datas = r.relocate(addrs)
+    # machine memory with long access
+    machine = Machine(CPUType.M68000, raise_on_main_run=False)
+    mem = machine.get_mem()
+    # mock memory with buffer access
+    mock_mem = MockMemory(size_kib=1024, fill=0xAA)
+    for m in (mem, mock_mem):
+        m.clear_block(0x1000, r.get_total_size(8), 0x55)
+        r.relocate_to_mem(m, addrs)
+        for addr, data in zip(addrs, datas):
+            assert m.r_block(addr, len(data)) == data
+    machine.cleanup()
@@ -11,12 +11,14 @@ def cfg_libs_dict_test():
                 "version": 42,
                 "expunge": "last_close",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
         },
         "devs": {
@@ -25,12 +27,14 @@ def cfg_libs_dict_test():
                 "version": 0,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
             "test.device": {
                 "mode": "off",
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
         },
     }
@@ -46,24 +50,28 @@ def cfg_libs_ini_test():
             "version": 42,
             "expunge": "no_mem",
             "num_fake_funcs": 1,
+            "native_funcs": False,
         },
         "test.library": {
             "mode": "amiga",
             "version": 0,
             "expunge": "shutdown",
             "num_fake_funcs": 2,
+            "native_funcs": False,
         },
         "*.device": {
             "mode": "fake",
             "version": 0,
             "expunge": "last_close",
             "num_fake_funcs": 3,
+            "native_funcs": False,
         },
         "test.device": {
             "mode": "off",
             "version": 42,
             "expunge": "shutdown",
             "num_fake_funcs": 4,
+            "native_funcs": False,
         },
     }
     lp.parse_config(ini_dict, "ini")
@@ -74,12 +82,14 @@ def cfg_libs_ini_test():
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 1,
+                "native_funcs": False,
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 2,
+                "native_funcs": False,
             },
         },
         "devs": {
@@ -88,12 +98,14 @@ def cfg_libs_ini_test():
                 "version": 0,
                 "expunge": "last_close",
                 "num_fake_funcs": 3,
+                "native_funcs": False,
             },
             "test.device": {
                 "mode": "off",
                 "version": 42,
                 "expunge": "shutdown",
                 "num_fake_funcs": 4,
+                "native_funcs": False,
             },
         },
     }
@@ -121,12 +133,14 @@ def cfg_libs_args_test():
                 "version": 42,
                 "expunge": "last_close",
                 "num_fake_funcs": 1,
+                "native_funcs": False,
             },
             "test.library": {
                 "mode": "amiga",
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
         },
         "devs": {
@@ -135,12 +149,14 @@ def cfg_libs_args_test():
                 "version": 0,
                 "expunge": "shutdown",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
             "test.device": {
                 "mode": "fake",
                 "version": 42,
                 "expunge": "no_mem",
                 "num_fake_funcs": 0,
+                "native_funcs": False,
             },
         },
     }
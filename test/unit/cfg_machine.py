@@ -9,9 +9,14 @@ def cfg_machine_dict_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_cycles": True,
             "ram_size": 512,
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "alloc_engine": "size_bins",
+        },
     }
     lp.parse_config(input_dict, "dict")
     assert lp.get_cfg_dict() == input_dict
@@ -24,9 +29,11 @@ def cfg_machine_ini_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_cycles": True,
             "ram_size": 512,
             "hw_access": "abort",
             "old_dos_guard": True,
+            "alloc_engine": "size_bins",
         }
     }
     lp.parse_config(ini_dict, "ini")
@@ -35,9 +42,14 @@ def cfg_machine_ini_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_cycles": True,
             "ram_size": 512,
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "alloc_engine": "size_bins",
+        },
     }
 
 
@@ -53,11 +65,14 @@ def cfg_machine_args_test():
             "23",
             "--cycles-per-block",
             "42",
+            "--adaptive-cycles",
             "--old-dos-guard",
             "-m",
             "512",
             "-H",
             "abort",
+            "--alloc-engine",
+            "size_bins",
         ]
     )
     lp.parse_args(args)
@@ -66,7 +81,12 @@ def cfg_machine_args_test():
             "cpu": "68020",
             "max_cycles": 23,
             "cycles_per_run": 42,
+            "adaptive_cycles": True,
             "ram_size": 512,
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {
+            "hw_access": "abort",
+            "old_dos_guard": True,
+            "alloc_engine": "size_bins",
+        },
     }
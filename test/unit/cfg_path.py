@@ -15,6 +15,7 @@ def cfg_path_ini_empty_test():
             "vols_base_dir": "~/.vamos/volumes",
             "auto_assigns": None,
             "auto_volumes": None,
+            "bin_cache_dir": None,
         },
     }
 
@@ -43,6 +44,7 @@ def cfg_path_ini_test():
             "command": ["c:", "work:c"],
             "cwd": "~/amiga",
             "vols_base_dir": "~/.vamos/volumes",
+            "bin_cache_dir": None,
             "auto_volumes": ["a", "b"],
             "auto_assigns": ["c", "d"],
         },
@@ -85,6 +87,7 @@ def cfg_path_args_test():
             "command": ["c:", "work:c"],
             "cwd": "~/amiga",
             "vols_base_dir": "/bla",
+            "bin_cache_dir": None,
             "auto_volumes": ["a", "b"],
             "auto_assigns": ["c", "d"],
         },
@@ -147,6 +150,7 @@ def cfg_path_ini_args_test():
             "command": ["c:", "work:c", "sys:t"],
             "cwd": "~/amiga",
             "vols_base_dir": "/bla",
+            "bin_cache_dir": None,
             "auto_volumes": ["a", "b", "c"],
             "auto_assigns": ["x", "y", "z"],
         },
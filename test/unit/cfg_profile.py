@@ -8,6 +8,14 @@ def cfg_profile_dict_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "mem_access": {"enabled": True, "num_hot": 10},
+            "pc_sample": {
+                "enabled": True,
+                "interval": 500,
+                "num_hot": 5,
+                "stacks_file": "stacks.txt",
+            },
+            "path_cache": {"enabled": True},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
@@ -25,6 +33,17 @@ def cfg_profile_args_test():
             "--profile-libs",
             "exec.library,dos.library",
             "--profile-lib-calls",
+            "--profile-mem-access",
+            "--profile-mem-hot",
+            "10",
+            "--profile-pc-sample",
+            "--profile-pc-interval",
+            "500",
+            "--profile-pc-hot",
+            "5",
+            "--profile-pc-stacks",
+            "stacks.txt",
+            "--profile-path-cache",
             "--profile-file",
             "foo/bar",
             "--profile-file-append",
@@ -36,6 +55,14 @@ def cfg_profile_args_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "mem_access": {"enabled": True, "num_hot": 10},
+            "pc_sample": {
+                "enabled": True,
+                "interval": 500,
+                "num_hot": 5,
+                "stacks_file": "stacks.txt",
+            },
+            "path_cache": {"enabled": True},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
@@ -7,6 +7,7 @@ def cfg_trace_dict_test():
     input_dict = {
         "trace": {
             "instr": True,
+            "instr_file": "trace.bin",
             "memory": True,
             "vamos_ram": True,
             "reg_dump": True,
@@ -22,6 +23,7 @@ def cfg_trace_ini_test():
     ini_dict = {
         "vamos": {
             "instr_trace": True,
+            "instr_trace_file": "trace.bin",
             "memory_trace": True,
             "internal_memory_trace": True,
             "reg_dump": True,
@@ -32,6 +34,7 @@ def cfg_trace_ini_test():
     assert lp.get_cfg_dict() == {
         "trace": {
             "instr": True,
+            "instr_file": "trace.bin",
             "memory": True,
             "vamos_ram": True,
             "reg_dump": True,
@@ -44,11 +47,14 @@ def cfg_trace_args_test():
     lp = TraceParser()
     ap = argparse.ArgumentParser()
     lp.setup_args(ap)
-    args = ap.parse_args(["-I", "-t", "-T", "-r", "-B"])
+    args = ap.parse_args(
+        ["-I", "--instr-trace-file", "trace.bin", "-t", "-T", "-r", "-B"]
+    )
     lp.parse_args(args)
     assert lp.get_cfg_dict() == {
         "trace": {
             "instr": True,
+            "instr_file": "trace.bin",
             "memory": True,
             "vamos_ram": True,
             "reg_dump": True,
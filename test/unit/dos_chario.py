@@ -0,0 +1,225 @@
+import io
+from machine68k import CPUType
+from amitools.fd import read_lib_fd
+from amitools.vamos.machine import Machine
+from amitools.vamos.machine.regs import REG_D0, REG_D1, REG_D2
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.libcore import LibJumpTable
+from amitools.vamos.lib.dos.FileHandle import FileHandle, FH_BUF_SIZE
+from amitools.vamos.lib.dos.CharIO import CharIOCode
+
+
+class CharIOEnv:
+    """a fake dos jump table with Python FGetC/FPutC/UnGetC and CharIO"""
+
+    def __init__(self, data=b""):
+        self.machine = Machine(CPUType.M68000, raise_on_main_run=False)
+        self.cpu = self.machine.get_cpu()
+        self.mem = self.machine.get_mem()
+        self.alloc = MemoryAlloc.for_machine(self.machine)
+        self.stack = self.machine.get_scratch_top()
+        self.obj = io.BytesIO(data)
+        self.fh = FileHandle(self.obj, "ram:test", "/tmp/test")
+        self.write_bufs = set()
+        self.b_addr = self.fh.alloc_fh(self.alloc, 0, self.write_bufs)
+        self.traps = []
+        # setup jump table
+        fd = read_lib_fd("dos.library")
+        neg_size = fd.get_neg_size()
+        self.lib_mem = self.alloc.alloc_memory(neg_size)
+        self.base_addr = self.lib_mem.addr + neg_size
+        jt = LibJumpTable(self.mem, self.base_addr, neg_size, fd=fd, create=True)
+        jt.FGetC = self.machine.setup_quick_trap(self._fgetc)
+        jt.FPutC = self.machine.setup_quick_trap(self._fputc)
+        jt.UnGetC = self.machine.setup_quick_trap(self._ungetc)
+        self.fd = fd
+        self.char_io = CharIOCode(self.alloc, FH_BUF_SIZE)
+        self.char_io.patch_jump_table(self.base_addr)
+
+    def _fgetc(self, op, pc):
+        self.traps.append("FGetC")
+        assert self.cpu.r_reg(REG_D1) == self.b_addr
+        self.cpu.w_reg(REG_D0, self.fh.buf_getc() & 0xFFFFFFFF)
+
+    def _fputc(self, op, pc):
+        self.traps.append("FPutC")
+        val = self.fh.buf_putc(self.cpu.r_reg(REG_D2))
+        self.cpu.w_reg(REG_D0, val)
+
+    def _ungetc(self, op, pc):
+        self.traps.append("UnGetC")
+        val = self.fh.buf_ungetc(self.cpu.r_reg(REG_D2))
+        self.cpu.w_reg(REG_D0, val & 0xFFFFFFFF)
+
+    def call(self, name, *args):
+        bias = self.fd.get_func_by_name(name).get_bias()
+        regs = {REG_D1: self.b_addr}
+        if args:
+            regs[REG_D2] = args[0] & 0xFFFFFFFF
+        rs = self.machine.run(
+            self.base_addr - bias, self.stack, set_regs=regs, get_regs=[REG_D0]
+        )
+        assert rs.error is None
+        d0 = rs.regs[REG_D0]
+        if d0 >= 0x80000000:
+            d0 -= 0x100000000
+        return d0
+
+    def cleanup(self):
+        self.char_io.cleanup()
+        self.fh.free_fh(self.alloc)
+        self.machine.cleanup()
+
+
+def dos_chario_fgetc_test():
+    data = b"hello\nworld!"
+    env = CharIOEnv(data)
+    got = []
+    while True:
+        ch = env.call("FGetC")
+        if ch == -1:
+            break
+        got.append(ch)
+    assert bytes(got) == data
+    # one refill and the final EOF
+    assert env.traps == ["FGetC", "FGetC"]
+    env.cleanup()
+
+
+def dos_chario_ungetc_test():
+    env = CharIOEnv(b"abc")
+    assert env.call("FGetC") == ord("a")
+    assert env.call("FGetC") == ord("b")
+    assert env.call("UnGetC", -1) == ord("b")
+    assert env.call("FGetC") == ord("b")
+    assert env.call("UnGetC", ord("b")) == ord("b")
+    assert env.call("FGetC") == ord("b")
+    assert env.traps == ["FGetC"]
+    # other char is pushed back by Python
+    assert env.call("UnGetC", ord("x")) == ord("x")
+    assert env.traps == ["FGetC", "UnGetC"]
+    assert env.call("FGetC") == ord("x")
+    assert env.call("FGetC") == ord("c")
+    assert env.call("FGetC") == -1
+    env.cleanup()
+
+
+def dos_chario_fputc_test():
+    env = CharIOEnv()
+    for ch in b"hello\nworld":
+        assert env.call("FPutC", ch) == ch
+    # first char and newline flush
+    assert env.traps == ["FPutC", "FPutC"]
+    assert env.obj.getvalue() == b"hello\n"
+    # other file ops flush the buffer
+    env.fh.flush()
+    assert env.obj.getvalue() == b"hello\nworld"
+    env.cleanup()
+
+
+def dos_chario_write_bufs_test():
+    env = CharIOEnv(b"abc")
+    # only handles in write state are tracked for flushing
+    assert env.call("FGetC") == ord("a")
+    assert env.write_bufs == set()
+    assert env.call("FPutC", ord("x")) == ord("x")
+    assert env.write_bufs == {env.fh}
+    env.fh.flush_buf()
+    assert env.write_bufs == set()
+    env.call("FPutC", ord("y"))
+    assert env.write_bufs == {env.fh}
+    env.cleanup()
+    assert env.write_bufs == set()
+
+
+def dos_chario_fputc_full_test():
+    env = CharIOEnv()
+    data = b"a" * (FH_BUF_SIZE * 2)
+    for ch in data:
+        env.call("FPutC", ch)
+    # enter write mode and flush of the full buffer
+    assert env.traps == ["FPutC", "FPutC"]
+    env.fh.sync_buf()
+    assert env.obj.getvalue() == data
+    env.cleanup()
+
+
+def dos_chario_seek_test():
+    env = CharIOEnv(b"0123456789")
+    assert env.call("FGetC") == ord("0")
+    assert env.call("FGetC") == ord("1")
+    # the file position reflects the chars read
+    assert env.fh.tell() == 2
+    assert env.fh.read(3) == b"234"
+    env.fh.seek(8, 0)
+    assert env.call("FGetC") == ord("8")
+    assert env.call("FGetC") == ord("9")
+    assert env.call("FGetC") == -1
+    env.cleanup()
+
+
+def dos_chario_read_write_test():
+    env = CharIOEnv(b"abcdef")
+    assert env.call("FGetC") == ord("a")
+    # switch to writing drops the read buffer
+    assert env.call("FPutC", ord("X")) == ord("X")
+    assert env.call("FPutC", ord("Y")) == ord("Y")
+    # switch back to reading writes pending data
+    assert env.call("FGetC") == ord("d")
+    assert env.obj.getvalue() == b"aXYdef"
+    env.cleanup()
+
+
+def dos_chario_eof_hack_test():
+    env = CharIOEnv(b"abc")
+    assert env.call("FGetC") == ord("a")
+    # 'endcli' fakes EOF by setting fh_End to zero
+    env.fh.mem.access.w_s("fh_End", 0)
+    # buffered data is not lost
+    assert env.call("FGetC") == ord("b")
+    assert env.call("UnGetC", -1) == ord("b")
+    assert env.call("FGetC") == ord("b")
+    assert env.call("FGetC") == ord("c")
+    assert env.call("FGetC") == -1
+    assert env.call("FPutC", ord("x")) == ord("x")
+    # the buffer is not used anymore
+    assert env.fh.mem.access.r_s("fh_End") == 0
+    assert env.traps == ["FGetC"] * 2 + ["UnGetC"] + ["FGetC"] * 3 + ["FPutC"]
+    assert env.obj.getvalue() == b"abcx"
+    env.cleanup()
+
+
+def dos_chario_eof_hack_idle_test():
+    env = CharIOEnv(b"abc")
+    # 'endcli' fakes EOF on an idle buffer (fh_Pos = -1)
+    env.fh.mem.access.w_s("fh_End", 0)
+    assert env.call("FGetC") == ord("a")
+    assert env.call("FGetC") == ord("b")
+    assert env.traps == ["FGetC", "FGetC"]
+    assert env.fh.mem.access.r_s("fh_End") == 0
+    env.cleanup()
+
+
+def dos_chario_eof_hack_write_test():
+    env = CharIOEnv()
+    assert env.call("FPutC", ord("a")) == ord("a")
+    assert env.call("FPutC", ord("b")) == ord("b")
+    assert env.obj.getvalue() == b"a"
+    env.fh.mem.access.w_s("fh_End", 0)
+    # pending data is written
+    assert env.call("FPutC", ord("c")) == ord("c")
+    assert env.obj.getvalue() == b"abc"
+    env.cleanup()
+
+
+def dos_chario_setbuf_test():
+    env = CharIOEnv(b"file")
+    env.fh.setbuf("args\n")
+    got = []
+    while True:
+        ch = env.call("FGetC")
+        if ch == -1:
+            break
+        got.append(ch)
+    assert bytes(got) == b"args\nfile"
+    env.cleanup()
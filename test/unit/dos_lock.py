@@ -0,0 +1,184 @@
+import os
+from amitools.vamos.astructs import AccessStruct
+from amitools.vamos.libstructs import (
+    FileInfoBlockStruct,
+    DateStampStruct,
+    ExAllDataStruct,
+)
+from amitools.vamos.lib.dos.Lock import Lock, ED_NAME, ED_SIZE, ED_OWNER
+from amitools.vamos.lib.dos.AmiTime import sys_to_ami_time
+from amitools.vamos.lib.dos.Error import (
+    NO_ERROR,
+    ERROR_NO_MORE_ENTRIES,
+    ERROR_NO_FREE_STORE,
+    ERROR_BAD_NUMBER,
+)
+from amitools.vamos.lib.dos.PatternMatch import pattern_parse, pattern_match
+from amitools.vamos.machine import MockMemory
+
+
+def create_fib():
+    mem = MockMemory(fill=0xAA)
+    fib = AccessStruct(mem, FileInfoBlockStruct, 0x100)
+    return mem, fib
+
+
+def read_fib(mem, fib):
+    name = mem.r_cstr(fib.s_get_addr("fib_FileName"))
+    date = AccessStruct(mem, DateStampStruct, fib.s_get_addr("fib_Date"))
+    return {
+        "key": fib.r_s("fib_DiskKey"),
+        "type": fib.r_s("fib_DirEntryType"),
+        "entry_type": fib.r_s("fib_EntryType"),
+        "name": name,
+        "comment": mem.r_cstr(fib.s_get_addr("fib_Comment")),
+        "size": fib.r_s("fib_Size"),
+        "blocks": fib.r_s("fib_NumBlocks"),
+        "date": (date.r_s("ds_Days"), date.r_s("ds_Minute"), date.r_s("ds_Tick")),
+        "uid": fib.r_s("fib_OwnerUID"),
+        "gid": fib.r_s("fib_OwnerGID"),
+    }
+
+
+def dos_lock_examine_file_test(tmpdir):
+    path = tmpdir.join("file.txt")
+    path.write_binary(b"a" * 1000)
+    lock = Lock("file.txt", "t:file.txt", str(path))
+    lock.key = 42
+    mem, fib = create_fib()
+    assert lock.examine_lock(fib) == NO_ERROR
+    at = sys_to_ami_time(os.path.getmtime(str(path)))
+    assert read_fib(mem, fib) == {
+        "key": 42,
+        "type": -3,
+        "entry_type": -3,
+        "name": "file.txt",
+        "comment": "",
+        "size": 1000,
+        "blocks": 2,
+        "date": (at.tday, at.tmin, at.tick),
+        "uid": 0,
+        "gid": 0,
+    }
+    # reserved fields are kept
+    assert mem.r8(fib.s_get_addr("fib_Reserved")) == 0xAA
+
+
+def dos_lock_examine_next_test(tmpdir):
+    names = ["a.c", "b.h", "sub"]
+    tmpdir.join("a.c").write_binary(b"abc")
+    tmpdir.join("b.h").write_binary(b"")
+    tmpdir.mkdir("sub")
+    lock = Lock("t", "t:", str(tmpdir))
+    lock.key = 7
+    mem, fib = create_fib()
+    assert lock.examine_lock(fib) == NO_ERROR
+    assert fib.r_s("fib_DirEntryType") == 2
+    assert fib.r_s("fib_NumBlocks") == 1
+    found = {}
+    while lock.examine_next(fib) == NO_ERROR:
+        entry = read_fib(mem, fib)
+        found[entry["name"]] = entry
+    assert sorted(found) == names
+    assert found["a.c"]["size"] == 3
+    assert found["b.h"]["blocks"] == 0
+    assert found["sub"]["type"] == 2
+    assert found["sub"]["size"] == 0
+    # scan is restarted
+    assert lock.dirent is None
+    fib.w_s("fib_DiskKey", 7)
+    assert lock.examine_next(fib) == NO_ERROR
+
+
+def setup_exall_dir(tmpdir, num=10):
+    for i in range(num):
+        tmpdir.join("file%02d.c" % i).write_binary(b"a" * i)
+    tmpdir.mkdir("sub")
+    return Lock("t", "t:", str(tmpdir))
+
+
+def read_exall(mem, addr, num):
+    res = []
+    while addr:
+        ed = AccessStruct(mem, ExAllDataStruct, addr)
+        res.append((mem.r_cstr(ed.r_s("ed_Name")), ed))
+        addr = ed.r_s("ed_Next")
+    assert len(res) == num
+    return res
+
+
+def dos_lock_examine_all_test(tmpdir):
+    lock = setup_exall_dir(tmpdir)
+    mem = MockMemory()
+    err, num, key = lock.examine_all(mem, 0x100, 4096, ED_OWNER, 0)
+    assert err == ERROR_NO_MORE_ENTRIES
+    assert key == 0
+    entries = dict(read_exall(mem, 0x100, num))
+    assert len(entries) == 11
+    assert entries["file05.c"].r_s("ed_Size") == 5
+    assert entries["file05.c"].r_s("ed_Type") == -3
+    assert entries["sub"].r_s("ed_Type") == 2
+    assert mem.r_cstr(entries["sub"].r_s("ed_Comment")) == ""
+
+
+def dos_lock_examine_all_continue_test(tmpdir):
+    lock = setup_exall_dir(tmpdir)
+    mem = MockMemory()
+    names = []
+    key = 0
+    calls = 0
+    while True:
+        # ED_NAME records of 8 bytes and a name of 9 bytes need 20 bytes
+        err, num, key = lock.examine_all(mem, 0x100, 64, ED_NAME, key)
+        calls += 1
+        names += [name for name, _ in read_exall(mem, 0x100, num)]
+        if err != NO_ERROR:
+            break
+    assert err == ERROR_NO_MORE_ENTRIES
+    assert calls == 4
+    assert sorted(names) == ["file%02d.c" % i for i in range(10)] + ["sub"]
+    # scan starts again
+    err, num, key = lock.examine_all(mem, 0x100, 64, ED_NAME, 0)
+    assert err == NO_ERROR
+    assert num == 3
+    lock.examine_all_end()
+    assert lock.exall_dirent is None
+    # continuing an ended scan does not repeat the entries
+    assert lock.examine_all(mem, 0x100, 64, ED_NAME, 3) == (
+        ERROR_NO_MORE_ENTRIES,
+        0,
+        0,
+    )
+    assert lock.exall_dirent is None
+
+
+def dos_lock_examine_all_match_test(tmpdir):
+    lock = setup_exall_dir(tmpdir)
+    mem = MockMemory()
+    pattern = pattern_parse("FILE0#?.C", ignore_case=True)
+    match = lambda name: pattern_match(pattern, name)
+    err, num, key = lock.examine_all(mem, 0x100, 4096, ED_SIZE, 0, match)
+    assert err == ERROR_NO_MORE_ENTRIES
+    assert len(read_exall(mem, 0x100, num)) == 10
+    # hook sees the record in memory
+    seen = []
+
+    def hook(addr):
+        ed = AccessStruct(mem, ExAllDataStruct, addr)
+        seen.append(addr)
+        return ed.r_s("ed_Size") > 7
+
+    err, num, key = lock.examine_all(mem, 0x100, 4096, ED_SIZE, 0, match, hook)
+    assert len(seen) == 10
+    assert sorted(n for n, _ in read_exall(mem, 0x100, num)) == [
+        "file08.c",
+        "file09.c",
+    ]
+
+
+def dos_lock_examine_all_error_test(tmpdir):
+    lock = setup_exall_dir(tmpdir)
+    mem = MockMemory()
+    assert lock.examine_all(mem, 0x100, 4096, 0, 0) == (ERROR_BAD_NUMBER, 0, 0)
+    assert lock.examine_all(mem, 0x100, 4096, ED_OWNER + 1, 0)[0] == ERROR_BAD_NUMBER
+    assert lock.examine_all(mem, 0x100, 8, ED_NAME, 0) == (ERROR_NO_FREE_STORE, 0, 0)
@@ -0,0 +1,129 @@
+import io
+import pytest
+from amitools.fs.blkdev.ADFBlockDevice import ADFBlockDevice
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+from amitools.fs.FSError import FSError
+from amitools.fs.validate.Validator import Validator
+from amitools.fs.validate.Log import Log
+
+DATA = bytes(x % 251 for x in range(100 * 1024 + 123))
+
+
+def create_volume(tmpdir, is_ffs):
+    blkdev = ADFBlockDevice(str(tmpdir / "test.adf"))
+    blkdev.create()
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Test"), is_ffs=is_ffs)
+    vol.write_file(DATA, FSString("data"))
+    vol.write_file(b"hello", FSString("small"))
+    vol.write_file(b"", FSString("empty"))
+    return vol
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+def fs_adfsfile_read_test(tmpdir, is_ffs):
+    vol = create_volume(tmpdir, is_ffs)
+    assert vol.read_file(FSString("data")) == DATA
+    assert vol.read_file(FSString("small")) == b"hello"
+    assert vol.read_file(FSString("empty")) == b""
+    vol.close()
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+def fs_adfsfile_iter_chunks_test(tmpdir, is_ffs):
+    vol = create_volume(tmpdir, is_ffs)
+    node = vol.get_path_name(FSString("data"))
+    chunks = list(node.iter_chunks(max_blks=16))
+    assert b"".join(chunks) == DATA
+    num_blks = len(node.data_blk_nums)
+    if is_ffs:
+        # data blocks are contiguous (apart from the file list blocks)
+        assert len(chunks) < num_blks // 8
+        assert max(len(c) for c in chunks) <= 16 * 512
+    else:
+        assert len(chunks) == num_blks
+    # no data is kept
+    assert node.data is None
+    node = vol.get_path_name(FSString("empty"))
+    assert list(node.iter_chunks()) == []
+    vol.close()
+
+
+def fs_adfsfile_ffs_runs_test(tmpdir):
+    vol = create_volume(tmpdir, True)
+    node = vol.get_path_name(FSString("data"))
+    node.data_blk_nums = [10, 11, 12, 20, 21, 5, 6, 7, 8]
+    assert node._get_data_blk_runs(3) == [(10, 3), (20, 2), (5, 3), (8, 1)]
+    assert node._get_data_blk_runs(128) == [(10, 3), (20, 2), (5, 4)]
+    # devices without multi block support read single blocks
+    vol.blkdev.multi_block = False
+    assert node._get_data_blk_runs(128) == [(b, 1) for b in node.data_blk_nums]
+    vol.close()
+
+
+def gen_chunks(data, size):
+    for off in range(0, len(data), size):
+        yield data[off : off + size]
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+@pytest.mark.parametrize("chunk_size", [1000, 512, 64 * 1024])
+def fs_adfsfile_create_stream_test(tmpdir, is_ffs, chunk_size):
+    vol = create_volume(tmpdir, is_ffs)
+    root = vol.get_root_dir()
+    stream = gen_chunks(DATA, chunk_size)
+    node = root.create_file_stream(FSString("stream"), stream, len(DATA))
+    # nothing is kept
+    assert node.data is None
+    assert node.data_blks == []
+    assert node.get_size() == len(DATA)
+    node.flush()
+    assert vol.read_file(FSString("stream")) == DATA
+    vol.close()
+
+
+def fs_adfsfile_create_stream_fobj_test(tmpdir):
+    path = tmpdir / "data"
+    path.write_binary(DATA)
+    vol = create_volume(tmpdir, True)
+    with open(str(path), "rb") as fh:
+        vol.write_file_stream(fh, len(DATA), FSString("stream"))
+    with open(str(path), "rb") as fh:
+        with pytest.raises(FSError):
+            vol.write_file_stream(fh, 1000, FSString("part"))
+    vol.write_file_stream(iter([]), 0, FSString("empty2"))
+    assert vol.read_file(FSString("stream")) == DATA
+    assert vol.read_file(FSString("empty2")) == b""
+    vol.close()
+
+
+def validate(blkdev):
+    v = Validator(blkdev, min_level=Log.ERROR)
+    v.scan_boot()
+    v.scan_root()
+    v.scan_dir_tree()
+    v.scan_files()
+    v.scan_bitmap()
+    return v.get_summary()
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+@pytest.mark.parametrize("fobj", [False, True])
+@pytest.mark.parametrize("size", [len(DATA) - 1, len(DATA) + 1])
+def fs_adfsfile_create_stream_size_mismatch_test(tmpdir, size, fobj, is_ffs):
+    vol = create_volume(tmpdir, is_ffs)
+    root = vol.get_root_dir()
+    num_free = vol.bitmap.get_num_free()
+    if fobj:
+        stream = io.BytesIO(DATA)
+    else:
+        stream = gen_chunks(DATA, 1000)
+    with pytest.raises(FSError):
+        root.create_file_stream(FSString("bad"), stream, size)
+    # blocks are released and no entry is created
+    assert vol.bitmap.get_num_free() == num_free
+    assert len(root.get_entries()) == 3
+    blkdev = vol.blkdev
+    vol.close()
+    assert validate(blkdev) == (0, 0)
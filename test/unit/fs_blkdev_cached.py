@@ -0,0 +1,230 @@
+import pytest
+from amitools.fs.blkdev.BlockDevice import BlockDevice
+from amitools.fs.blkdev.CachedBlockDevice import CachedBlockDevice
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+
+
+class MyBlockDevice(BlockDevice):
+    def __init__(self, multi_block=False):
+        self._set_geometry(cyls=2, heads=1, sectors=8)
+        self.multi_block = multi_block
+        self.data = bytearray(self.num_bytes)
+        self.reads = []
+        self.writes = []
+        self.flushed = False
+        self.closed = False
+
+    def flush(self):
+        self.flushed = True
+
+    def close(self):
+        self.closed = True
+
+    def read_block(self, blk_num, num_blks=1):
+        self.reads.append(blk_num)
+        off = blk_num * self.block_bytes
+        return self.data[off : off + self.block_bytes * num_blks]
+
+    def write_block(self, blk_num, data, num_blks=1):
+        self.writes.append((blk_num, num_blks))
+        off = blk_num * self.block_bytes
+        self.data[off : off + self.block_bytes * num_blks] = data
+
+
+def blk(val):
+    return bytes([val]) * 512
+
+
+def fs_blkdev_cached_read_test():
+    dev = MyBlockDevice()
+    dev.data[512:1024] = blk(1)
+    cdev = CachedBlockDevice(dev, 4)
+    assert cdev.num_blocks == 16
+    assert cdev.block_bytes == 512
+    assert cdev.read_block(1) == blk(1)
+    assert cdev.read_block(1) == blk(1)
+    assert dev.reads == [1]
+    assert cdev.hits == 1
+    assert cdev.misses == 1
+
+
+def fs_blkdev_cached_lru_test():
+    dev = MyBlockDevice()
+    cdev = CachedBlockDevice(dev, 2)
+    cdev.read_block(0)
+    cdev.read_block(1)
+    cdev.read_block(0)
+    # evicts 1
+    cdev.read_block(2)
+    assert list(cdev.blocks) == [0, 2]
+    assert cdev.evictions == 1
+    cdev.read_block(1)
+    assert dev.reads == [0, 1, 2, 1]
+
+
+def fs_blkdev_cached_write_back_test():
+    dev = MyBlockDevice()
+    cdev = CachedBlockDevice(dev, 8)
+    cdev.write_block(3, blk(3))
+    assert cdev.read_block(3) == blk(3)
+    assert dev.writes == []
+    assert dev.data[3 * 512 : 4 * 512] == bytes(512)
+    cdev.flush()
+    assert dev.writes == [(3, 1)]
+    assert dev.flushed
+    assert dev.data[3 * 512 : 4 * 512] == blk(3)
+    # nothing dirty anymore
+    cdev.flush()
+    assert dev.writes == [(3, 1)]
+
+
+@pytest.mark.parametrize("multi_block", [False, True])
+def fs_blkdev_cached_write_runs_test(multi_block):
+    dev = MyBlockDevice(multi_block)
+    cdev = CachedBlockDevice(dev, 16)
+    for blk_num in (7, 5, 6, 1, 9, 2):
+        cdev.write_block(blk_num, blk(blk_num))
+    # write again
+    cdev.write_block(6, blk(0x66))
+    cdev.close()
+    assert dev.closed
+    if multi_block:
+        assert dev.writes == [(1, 2), (5, 3), (9, 1)]
+    else:
+        assert dev.writes == [(1, 1), (2, 1), (5, 1), (6, 1), (7, 1), (9, 1)]
+    assert cdev.write_runs == 3
+    assert cdev.write_blocks == 6
+    for blk_num in (7, 5, 1, 9, 2):
+        off = blk_num * 512
+        assert dev.data[off : off + 512] == blk(blk_num)
+    assert dev.data[6 * 512 : 7 * 512] == blk(0x66)
+
+
+def fs_blkdev_cached_evict_dirty_test():
+    dev = MyBlockDevice(True)
+    cdev = CachedBlockDevice(dev, 2)
+    cdev.write_block(0, blk(1))
+    cdev.write_block(1, blk(2))
+    assert dev.writes == []
+    # evicting dirty block 0 writes back all dirty blocks
+    cdev.read_block(4)
+    assert dev.writes == [(0, 2)]
+    assert not cdev.dirty
+    assert cdev.read_block(0) == blk(1)
+
+
+def fs_blkdev_cached_invalid_write_test():
+    cdev = CachedBlockDevice(MyBlockDevice(), 2)
+    with pytest.raises(ValueError):
+        cdev.write_block(16, blk(0))
+    with pytest.raises(ValueError):
+        cdev.write_block(0, b"foo")
+
+
+def fs_blkdev_cached_factory_test(tmpdir):
+    path = str(tmpdir / "test.hdf")
+    f = BlkDevFactory()
+    blkdev = f.create(path, options={"chs": "10,1,32"})
+    assert isinstance(blkdev, CachedBlockDevice)
+    assert blkdev.max_blocks == BlkDevFactory.DEFAULT_CACHE_BLOCKS
+    blkdev.write_block(5, blk(5))
+    blkdev.close()
+    blkdev = f.open(path, options={"chs": "10,1,32", "cache": 16})
+    assert isinstance(blkdev, CachedBlockDevice)
+    assert blkdev.max_blocks == 16
+    assert blkdev.read_block(5) == blk(5)
+    blkdev.close()
+    blkdev = f.open(path, options={"chs": "10,1,32", "cache": False})
+    assert not isinstance(blkdev, CachedBlockDevice)
+    blkdev.close()
+    with pytest.raises(ValueError):
+        f.open(path, options={"chs": "10,1,32", "cache": "bla"})
+
+
+def fs_blkdev_cached_read_multi_test():
+    dev = MyBlockDevice(True)
+    for i in range(4):
+        dev.data[i * 512 : (i + 1) * 512] = blk(i)
+    cdev = CachedBlockDevice(dev, 8)
+    cdev.write_block(2, blk(0x22))
+    data = cdev.read_block(0, num_blks=4)
+    assert data == blk(0) + blk(1) + blk(0x22) + blk(3)
+    assert dev.reads == [0]
+    # multi block reads are not cached
+    assert list(cdev.blocks) == [2]
+    assert cdev.hits == 1
+    assert cdev.misses == 3
+
+
+@pytest.mark.parametrize("multi_block", [False, True])
+def fs_blkdev_cached_write_multi_test(multi_block):
+    dev = MyBlockDevice(multi_block)
+    cdev = CachedBlockDevice(dev, 8)
+    cdev.write_block(1, blk(0x11))
+    cdev.read_block(5)
+    cdev.write_block(0, blk(1) + blk(2) + blk(3), num_blks=3)
+    # cached as dirty blocks and written back in a single run
+    assert dev.writes == []
+    assert sorted(cdev.dirty) == [0, 1, 2]
+    assert cdev.read_block(1) == blk(2)
+    cdev.flush()
+    assert dev.data[: 3 * 512] == blk(1) + blk(2) + blk(3)
+    assert not cdev.dirty
+    # written back blocks of multi block writes are not kept
+    assert list(cdev.blocks) == [5]
+    if multi_block:
+        assert dev.writes == [(0, 3)]
+    else:
+        assert dev.writes == [(0, 1), (1, 1), (2, 1)]
+    with pytest.raises(ValueError):
+        cdev.write_block(14, blk(0) * 3, num_blks=3)
+
+
+def fs_blkdev_cached_write_multi_bulk_test():
+    dev = MyBlockDevice(True)
+    cdev = CachedBlockDevice(dev, 8)
+    cdev.max_bulk_blks = 4
+    cdev.write_block(0, blk(1) * 4, num_blks=4)
+    assert dev.writes == []
+    cdev.write_block(4, blk(2) * 2, num_blks=2)
+    # too many bulk blocks: write back
+    assert dev.writes == [(0, 6)]
+    assert not cdev.dirty
+    assert not cdev.blocks
+
+
+def fs_blkdev_cached_read_only_test(tmpdir):
+    cdev = CachedBlockDevice(MyBlockDevice(), 2, read_only=True)
+    with pytest.raises(IOError):
+        cdev.write_block(0, blk(0))
+    assert not cdev.dirty
+    # factory passes read-only mode
+    path = str(tmpdir / "test.hdf")
+    f = BlkDevFactory()
+    f.create(path, options={"chs": "10,1,32"}).close()
+    blkdev = f.open(path, read_only=True, options={"chs": "10,1,32"})
+    assert isinstance(blkdev, CachedBlockDevice)
+    with pytest.raises(IOError):
+        blkdev.write_block(5, blk(5))
+    blkdev.close()
+
+
+class FailBlockDevice(MyBlockDevice):
+    def write_block(self, blk_num, data, num_blks=1):
+        if blk_num == 4:
+            raise IOError("write failed")
+        MyBlockDevice.write_block(self, blk_num, data, num_blks)
+
+
+def fs_blkdev_cached_write_back_fail_test():
+    dev = FailBlockDevice(True)
+    cdev = CachedBlockDevice(dev, 8)
+    cdev.write_block(0, blk(1))
+    cdev.write_block(1, blk(2))
+    cdev.write_block(4, blk(3))
+    with pytest.raises(IOError):
+        cdev.flush()
+    # only the written run is clean
+    assert dev.writes == [(0, 2)]
+    assert cdev.dirty == {4}
+    assert cdev.read_block(4) == blk(3)
@@ -0,0 +1,137 @@
+import gzip
+import pytest
+from amitools.fs.blkdev.ImageFile import ImageFile
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+
+
+def create_image(tmpdir, num_blocks=64, name="test.hdf"):
+    path = str(tmpdir / name)
+    with open(path, "wb") as fh:
+        for i in range(num_blocks):
+            fh.write(bytes([i & 0xFF]) * 512)
+    return path
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def fs_blkdev_imagefile_read_write_test(tmpdir, use_mmap):
+    path = create_image(tmpdir)
+    im = ImageFile(path, use_mmap=use_mmap)
+    im.open()
+    assert im.is_mapped() == use_mmap
+    assert im.num_blocks == 64
+    assert bytes(im.read_blk(3)) == b"\x03" * 512
+    assert bytes(im.read_blk(4, 2)) == b"\x04" * 512 + b"\x05" * 512
+    im.write_blk(7, b"\xaa" * 512)
+    assert bytes(im.read_blk(7)) == b"\xaa" * 512
+    im.write_blk(8, b"\xbb" * 1024, 2)
+    im.flush()
+    im.close()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    assert data[7 * 512 : 8 * 512] == b"\xaa" * 512
+    assert data[8 * 512 : 10 * 512] == b"\xbb" * 1024
+    assert data[10 * 512 : 11 * 512] == b"\x0a" * 512
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def fs_blkdev_imagefile_write_invalid_test(tmpdir, use_mmap):
+    path = create_image(tmpdir)
+    im = ImageFile(path, use_mmap=use_mmap)
+    im.open()
+    # multi block writes must not run past the end of the image
+    with pytest.raises(IOError, match="got 64 but max is 64"):
+        im.write_blk(63, b"\xaa" * 1024, 2)
+    with pytest.raises(IOError, match="got 512 but size is 1024"):
+        im.write_blk(8, b"\xbb" * 512, 2)
+    im.close()
+    assert ImageFile.get_image_size(path) == 64 * 512
+
+
+def fs_blkdev_imagefile_mmap_zero_copy_test(tmpdir):
+    path = create_image(tmpdir)
+    im = ImageFile(path, use_mmap=True)
+    im.open()
+    blk = im.read_blk(1)
+    assert isinstance(blk, memoryview)
+    im.write_blk(1, b"\x11" * 512)
+    # the view sees the write
+    assert bytes(blk) == b"\x11" * 512
+    # closing with a block still referenced is ok
+    im.close()
+    del blk
+
+
+def fs_blkdev_imagefile_mmap_auto_test(tmpdir, monkeypatch):
+    path = create_image(tmpdir)
+    im = ImageFile(path)
+    im.open()
+    assert not im.is_mapped()
+    im.close()
+    monkeypatch.setattr(ImageFile, "mmap_min_bytes", 64 * 512)
+    im = ImageFile(path)
+    im.open()
+    assert im.is_mapped()
+    im.close()
+
+
+def fs_blkdev_imagefile_mmap_read_only_test(tmpdir):
+    path = create_image(tmpdir)
+    im = ImageFile(path, read_only=True, use_mmap=True)
+    im.open()
+    assert im.is_mapped()
+    assert bytes(im.read_blk(2)) == b"\x02" * 512
+    with pytest.raises(IOError):
+        im.write_blk(2, b"\x00" * 512)
+    im.flush()
+    im.close()
+
+
+def fs_blkdev_imagefile_mmap_fobj_test(tmpdir):
+    path = create_image(tmpdir)
+    fobj = open(path, "r+b")
+    im = ImageFile(path, fobj=fobj, use_mmap=True)
+    im.open()
+    assert not im.is_mapped()
+    assert im.read_blk(5) == b"\x05" * 512
+    im.close()
+
+
+def fs_blkdev_imagefile_mmap_resize_test(tmpdir):
+    path = create_image(tmpdir)
+    im = ImageFile(path, use_mmap=True)
+    im.open()
+    im.resize(128)
+    im.open()
+    assert im.is_mapped()
+    assert im.num_blocks == 128
+    assert bytes(im.read_blk(63)) == b"\x3f" * 512
+    im.write_blk(127, b"\x7f" * 512)
+    im.close()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    assert len(data) == 128 * 512
+    assert data[-512:] == b"\x7f" * 512
+
+
+def fs_blkdev_imagefile_factory_mmap_test(tmpdir):
+    path = create_image(tmpdir, 10 * 1 * 32)
+    f = BlkDevFactory()
+    blkdev = f.open(path, options={"chs": "10,1,32", "mmap": True, "cache": False})
+    assert blkdev.img_file.is_mapped()
+    blkdev.close()
+    blkdev = f.open(path, options={"chs": "10,1,32", "mmap": False, "cache": False})
+    assert not blkdev.img_file.is_mapped()
+    blkdev.close()
+    with pytest.raises(ValueError):
+        f.open(path, options={"chs": "10,1,32", "mmap": "bla"})
+    # gzip streams are never mapped
+    gz_path = path + ".gz"
+    with open(path, "rb") as fh:
+        data = fh.read()
+    with gzip.open(gz_path, "wb") as fh:
+        fh.write(data)
+    opts = {"chs": "10,1,32", "mmap": True, "cache": False}
+    blkdev = f.open(gz_path, read_only=True, options=opts)
+    assert not blkdev.img_file.is_mapped()
+    assert blkdev.read_block(3) == b"\x03" * 512
+    blkdev.close()
@@ -0,0 +1,88 @@
+import random
+from amitools.vamos.label import LabelManager, LabelRange
+
+
+def _ref_get_label(labels, addr):
+    for r in labels:
+        if r.addr <= addr and addr < r.end:
+            return r
+
+
+def _ref_intersect(labels, addr, size):
+    return [r for r in labels if r.does_intersect(addr, size)]
+
+
+def label_mgr_add_remove_test():
+    lm = LabelManager()
+    a = LabelRange("a", 0x100, 0x100)
+    b = LabelRange("b", 0x200, 0x100)
+    lm.add_label(a)
+    lm.add_label(b)
+    assert lm.get_all_labels() == [a, b]
+    assert lm.get_label(0xFF) is None
+    assert lm.get_label(0x100) is a
+    assert lm.get_label(0x1FF) is a
+    assert lm.get_label(0x200) is b
+    assert lm.get_label(0x300) is None
+    assert lm.get_label_offset(0x210) == (b, 0x10)
+    lm.remove_label(a)
+    assert lm.get_all_labels() == [b]
+    assert lm.get_label(0x100) is None
+    # re-add
+    lm.add_label(a)
+    assert lm.get_all_labels() == [b, a]
+    assert lm.get_label(0x100) is a
+
+
+def label_mgr_overlap_test():
+    lm = LabelManager()
+    pool = LabelRange("pool", 0x1000, 0x1000)
+    a = LabelRange("a", 0x1100, 0x10)
+    b = LabelRange("b", 0x1110, 0x10)
+    lm.add_label(pool)
+    lm.add_label(a)
+    lm.add_label(b)
+    # first label added wins
+    assert lm.get_label(0x1100) is pool
+    assert lm.get_intersecting_labels(0x1108, 4) == [pool, a]
+    assert lm.get_intersecting_labels(0x1100, 0x10) == [pool, a, b]
+    # remove labels inside pool
+    lm.delete_labels_within(0x1000, 0x1000)
+    assert lm.get_all_labels() == []
+    assert lm.get_label(0x1100) is None
+
+
+def label_mgr_delete_within_test():
+    lm = LabelManager()
+    a = LabelRange("a", 0x100, 0x10)
+    b = LabelRange("b", 0x110, 0x10)
+    c = LabelRange("c", 0x118, 0x10)
+    lm.add_label(a)
+    lm.add_label(b)
+    lm.add_label(c)
+    lm.delete_labels_within(0x100, 0x20)
+    assert lm.get_all_labels() == [c]
+
+
+def label_mgr_random_test():
+    rng = random.Random(42)
+    lm = LabelManager()
+    labels = []
+    for i in range(500):
+        addr = rng.randrange(0, 0x10000)
+        size = rng.choice((0, 4, 16, 100, 0x400))
+        r = LabelRange("l%d" % i, addr, size)
+        lm.add_label(r)
+        labels.append(r)
+        # randomly remove a label
+        if rng.random() < 0.2:
+            r = labels.pop(rng.randrange(len(labels)))
+            lm.remove_label(r)
+    assert lm.get_all_labels() == labels
+    for i in range(1000):
+        addr = rng.randrange(0, 0x10400)
+        assert lm.get_label(addr) is _ref_get_label(labels, addr)
+        size = rng.randrange(0, 0x100)
+        assert lm.get_intersecting_labels(addr, size) == _ref_intersect(
+            labels, addr, size
+        )
@@ -1,5 +1,6 @@
 import datetime
 import collections
+import logging
 from amitools.vamos.libcore import LibCreator, LibInfo, LibCtx, LibProfiler
 from amitools.vamos.machine import MockMachine
 from amitools.vamos.label import LabelManager
@@ -125,3 +126,36 @@ def libcore_create_lib_profile_test():
     # free lib
     lib.free()
     assert alloc.is_all_free()
+
+
+class NativeTestLibrary(VamosTestLibrary):
+    def __init__(self):
+        VamosTestLibrary.__init__(self)
+        self.native = False
+
+    def setup_native(self, ctx, base_addr):
+        self.native = True
+
+
+def create_native_lib(native_funcs, log_valid=None, lib_profiler=None):
+    mem, traps, alloc, ctx = setup()
+    impl = NativeTestLibrary()
+    date = datetime.date(2012, 11, 12)
+    info = LibInfo("vamostest.library", 42, 3, date)
+    Cfg = collections.namedtuple("Cfg", ["num_fake_funcs", "native_funcs"])
+    lib_cfg = Cfg(0, native_funcs)
+    creator = LibCreator(alloc, traps, log_valid=log_valid, lib_profiler=lib_profiler)
+    if lib_profiler:
+        lib_profiler.setup()
+    lib = creator.create_lib(info, ctx, impl, lib_cfg)
+    lib.free()
+    assert alloc.is_all_free()
+    return impl.native
+
+
+def libcore_create_lib_native_test():
+    assert create_native_lib(True)
+    assert not create_native_lib(False)
+    # native code would bypass logging and profiling
+    assert not create_native_lib(True, log_valid=logging.getLogger("test"))
+    assert not create_native_lib(True, lib_profiler=LibProfiler(names=["all"]))
@@ -0,0 +1,50 @@
+from amitools.vamos.libcore import LibRegs, LibCtx
+from amitools.vamos.machine import MockMachine
+from amitools.vamos.machine.regs import *
+from amitools.fd import read_lib_fd
+
+
+def _create_regs():
+    machine = MockMachine()
+    cpu = machine.get_cpu()
+    for i in range(16):
+        cpu.w_reg(i, 0x100 + i)
+    return LibRegs(cpu), cpu
+
+
+def libcore_regs_read_test():
+    regs, cpu = _create_regs()
+    assert regs.read(REG_D1, REG_A0) == (0x101, 0x108)
+    assert regs.read(REG_D0) == (0x100,)
+    assert regs.read() == ()
+    assert regs.read_all() == tuple(range(0x100, 0x110))
+    # reader is cached
+    assert regs.get_reader((REG_D1, REG_A0)) is regs.get_reader([REG_D1, REG_A0])
+
+
+def libcore_regs_read_args_test():
+    regs, cpu = _create_regs()
+    fd = read_lib_fd("vamostest.library")
+    func = fd.get_func_by_name("Swap")
+    assert regs.get_fd_regs(func) == (REG_D0, REG_D1)
+    assert regs.read_args(func) == (0x100, 0x101)
+    func = fd.get_func_by_name("PrintHello")
+    assert regs.read_args(func) == ()
+
+
+def libcore_regs_write_test():
+    regs, cpu = _create_regs()
+    regs.write((REG_D2, REG_A3), (23, 42))
+    assert cpu.r_reg(REG_D2) == 23
+    assert cpu.r_reg(REG_A3) == 42
+    regs.set_result(-1)
+    assert cpu.r_reg(REG_D0) == 0xFFFFFFFF
+    regs.set_result(1, 2)
+    assert cpu.r_reg(REG_D0) == 1
+    assert cpu.r_reg(REG_D1) == 2
+
+
+def libcore_regs_ctx_test():
+    machine = MockMachine()
+    ctx = LibCtx(machine)
+    assert ctx.regs.cpu is ctx.cpu
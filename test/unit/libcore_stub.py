@@ -96,11 +96,12 @@ def _create_scan():
     return scanner.scan(name, impl, fd, True)
 
 
-def libcore_stub_gen_base_test(capsys):
+@pytest.mark.parametrize("compile_funcs", [True, False])
+def libcore_stub_gen_base_test(capsys, compile_funcs):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = LibStubGen(compile_funcs=compile_funcs)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -176,11 +177,12 @@ def libcore_stub_gen_log_profile_test(caplog):
     _check_profile(scan.get_fd(), profile)
 
 
-def libcore_stub_gen_exc_default_test():
+@pytest.mark.parametrize("compile_funcs", [True, False])
+def libcore_stub_gen_exc_default_test(compile_funcs):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = LibStubGen(compile_funcs=compile_funcs)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
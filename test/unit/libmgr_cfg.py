@@ -12,7 +12,7 @@ def libmgr_cfg_lib_default_test():
     txt = str(lc)
     assert (
         txt
-        == "LibCfg(create_mode=auto, force_version=None, expunge_mode=last_close, num_fake_funcs=0)"
+        == "LibCfg(create_mode=auto, force_version=None, expunge_mode=last_close, num_fake_funcs=0, native_funcs=False)"
     )
 
 
@@ -25,7 +25,7 @@ def libmgr_cfg_lib_custom_test():
     txt = str(lc)
     assert (
         txt
-        == "LibCfg(create_mode=off, force_version=1, expunge_mode=no_mem, num_fake_funcs=42)"
+        == "LibCfg(create_mode=off, force_version=1, expunge_mode=no_mem, num_fake_funcs=42, native_funcs=False)"
     )
 
 
@@ -281,11 +281,11 @@ def libmgr_cfg_dump_test(capsys):
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
         "libs config:",
-        "  default: LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=1)",
-        "  lib 'foo.library': LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=2)",
-        "  lib 'libs/foo.library': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=10)",
+        "  default: LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=1, native_funcs=False)",
+        "  lib 'foo.library': LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=2, native_funcs=False)",
+        "  lib 'libs/foo.library': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=10, native_funcs=False)",
         "devs config:",
-        "  default: LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=3)",
-        "  dev 'bar.device': LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=4)",
-        "  dev 'devs/bar.device': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=11)",
+        "  default: LibCfg(create_mode=amiga, force_version=42, expunge_mode=last_close, num_fake_funcs=3, native_funcs=False)",
+        "  dev 'bar.device': LibCfg(create_mode=fake, force_version=23, expunge_mode=shutdown, num_fake_funcs=4, native_funcs=False)",
+        "  dev 'devs/bar.device': LibCfg(create_mode=vamos, force_version=43, expunge_mode=last_close, num_fake_funcs=11, native_funcs=False)",
     ]
@@ -0,0 +1,166 @@
+import datetime
+import random
+import pytest
+from math import trunc
+from machine68k import CPUType
+from amitools.fd import read_lib_fd
+from amitools.vamos.machine import Machine, MockMachine
+from amitools.vamos.machine.regs import *
+from amitools.vamos.machine.opcodes import op_jmp
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.libcore import LibCreator, LibInfo, LibCtx
+from amitools.vamos.libmgr import LibCfg
+from amitools.vamos.libnative import NativeFastFuncs
+from amitools.vamos.libnative.fastfuncs import native_funcs
+from amitools.vamos.lib.UtilityLibrary import UtilityLibrary
+
+VALUES = (0, 1, 2, 3, 7, 0x7FFF, 0x8000, 0xFFFF, 0x10000, 0x12345678)
+VALUES += (0x7FFFFFFF, 0x80000000, 0x80000001, 0xFFFFFFFE, 0xFFFFFFFF)
+
+
+def get_values():
+    rng = random.Random(42)
+    vals = list(VALUES) + [rng.getrandbits(32) for _ in range(20)]
+    vals += [rng.getrandbits(16) for _ in range(10)]
+    return vals
+
+
+def signed(val):
+    if val >= 0x80000000:
+        return val - 0x100000000
+    return val
+
+
+def setup_func(lib_name, func_name):
+    machine = Machine(CPUType.M68000, raise_on_main_run=False)
+    code = native_funcs[lib_name][func_name]
+    addr = machine.get_ram_begin()
+    data = b"".join(w.to_bytes(2, "big") for w in code)
+    machine.get_mem().w_block(addr, data)
+    return machine, addr
+
+
+def run_func(machine, addr, regs):
+    regs = dict(regs)
+    regs[REG_D2] = 0x22222222
+    regs[REG_D3] = 0x33333333
+    regs[REG_D4] = 0x44444444
+    sp = machine.get_scratch_top()
+    rs = machine.run(
+        addr, sp, set_regs=regs, get_regs=[REG_D0, REG_D1, REG_D2, REG_D3, REG_D4]
+    )
+    assert rs.done
+    # callee saved regs are kept
+    assert rs.regs[REG_D2] == 0x22222222
+    assert rs.regs[REG_D3] == 0x33333333
+    assert rs.regs[REG_D4] == 0x44444444
+    return rs.regs[REG_D0], rs.regs[REG_D1]
+
+
+@pytest.mark.parametrize("func_name", ["UMult32", "SMult32"])
+def libnative_fastfuncs_mult32_test(func_name):
+    machine, addr = setup_func("utility.library", func_name)
+    vals = get_values()
+    for a in vals:
+        for b in vals[:12]:
+            d0, _ = run_func(machine, addr, {REG_D0: a, REG_D1: b})
+            assert d0 == (a * b) & 0xFFFFFFFF
+    machine.cleanup()
+
+
+def libnative_fastfuncs_udivmod32_test():
+    machine, addr = setup_func("utility.library", "UDivMod32")
+    vals = get_values()
+    for a in vals:
+        for b in vals:
+            if b == 0:
+                continue
+            res = run_func(machine, addr, {REG_D0: a, REG_D1: b})
+            assert res == (a // b, a % b)
+    machine.cleanup()
+
+
+def libnative_fastfuncs_sdivmod32_test():
+    machine, addr = setup_func("utility.library", "SDivMod32")
+    vals = get_values()
+    for a in vals:
+        for b in vals:
+            if b == 0:
+                continue
+            sa = signed(a)
+            sb = signed(b)
+            quot = trunc(sa / sb)
+            rem = sa - sb * quot
+            res = run_func(machine, addr, {REG_D0: a, REG_D1: b})
+            assert res == (quot & 0xFFFFFFFF, rem & 0xFFFFFFFF)
+    machine.cleanup()
+
+
+@pytest.mark.parametrize("func_name", ["CopyMem", "CopyMemQuick"])
+def libnative_fastfuncs_copymem_test(func_name):
+    machine, addr = setup_func("exec.library", func_name)
+    mem = machine.get_mem()
+    src = addr + 0x1000
+    data = bytes(range(256)) * 2
+    mem.w_block(src, data)
+    for src_off in (0, 1, 2):
+        for dst_off in (0, 1, 3):
+            for size in (0, 1, 3, 4, 5, 17, 100):
+                dst = addr + 0x2000 + dst_off
+                mem.clear_block(dst - 4, size + 8, 0xAA)
+                run_func(
+                    machine,
+                    addr,
+                    {REG_A0: src + src_off, REG_A1: dst, REG_D0: size},
+                )
+                assert mem.r_block(dst, size) == data[src_off : src_off + size]
+                # no overrun
+                assert mem.r_block(dst - 4, 4) == b"\xaa" * 4
+                assert mem.r_block(dst + size, 4) == b"\xaa" * 4
+    machine.cleanup()
+
+
+def libnative_fastfuncs_install_test():
+    machine = MockMachine()
+    alloc = MemoryAlloc.for_machine(machine)
+    mem = alloc.get_mem()
+    fd = read_lib_fd("utility.library")
+    lib_base = 0x4000
+    native = NativeFastFuncs(alloc)
+    names = native.install("utility.library", lib_base, fd)
+    assert sorted(names) == ["SDivMod32", "SMult32", "UDivMod32", "UMult32"]
+    code_addr = native.mem_obj.addr
+    for name in names:
+        bias = fd.get_func_by_name(name).get_bias()
+        assert mem.r16(lib_base - bias) == op_jmp
+        addr = mem.r32(lib_base - bias + 2)
+        code = native_funcs["utility.library"][name]
+        assert mem.r16(addr) == code[0]
+    # shared code is only installed once
+    smult = mem.r32(lib_base - fd.get_func_by_name("SMult32").get_bias() + 2)
+    umult = mem.r32(lib_base - fd.get_func_by_name("UMult32").get_bias() + 2)
+    assert smult == umult
+    native.cleanup()
+    assert alloc.is_all_free()
+    # unknown lib installs nothing
+    assert native.install("foo.library", lib_base, fd) == []
+    assert native.mem_obj is None
+
+
+def libnative_fastfuncs_create_lib_test():
+    machine = MockMachine(fill=23)
+    alloc = MemoryAlloc.for_machine(machine)
+    mem = alloc.get_mem()
+    ctx = LibCtx(machine)
+    info = LibInfo("utility.library", 40, 0, datetime.date(2012, 11, 12))
+    creator = LibCreator(alloc, machine.get_traps())
+    vlib = creator.create_lib(
+        info, ctx, UtilityLibrary(), lib_cfg=LibCfg(native_funcs=True)
+    )
+    fd = vlib.get_fd()
+    lib_base = vlib.get_addr()
+    bias = fd.get_func_by_name("UMult32").get_bias()
+    addr = mem.r32(lib_base - bias + 2)
+    assert addr == vlib.native_funcs.mem_obj.addr
+    vlib.free()
+    assert alloc.is_all_free()
@@ -47,3 +47,12 @@ def make_functions_ptr_test():
         assert mem.r16(ptr) == op_jmp
         assert mem.r32(ptr + 2) == fptr
         ptr -= 6
+
+
+def make_functions_set_function_test():
+    mem = MockMemory()
+    lib_base = 0x800
+    mf = MakeFuncs(mem)
+    mf.set_function(lib_base, 30, 0x1234)
+    assert mem.r16(lib_base - 30) == op_jmp
+    assert mem.r32(lib_base - 28) == 0x1234
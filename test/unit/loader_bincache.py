@@ -0,0 +1,107 @@
+import os
+import shutil
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.Relocate import Relocate
+from amitools.vamos.loader import BinImageCache, SegmentLoader
+from amitools.vamos.loader.bincache import BinImageWriter, BinImageReader
+
+BIN_DIR = os.path.join(os.path.dirname(__file__), "..", "bin")
+
+
+def get_bin(tmpdir, name="dos_examine_gcc_dbg"):
+    path = str(tmpdir.join(name))
+    shutil.copy(os.path.join(BIN_DIR, name), path)
+    return path
+
+
+def dump_img(bin_img):
+    res = []
+    for seg in bin_img.get_segments():
+        relocs = []
+        for to_seg in seg.get_reloc_to_segs():
+            for r in seg.get_reloc(to_seg).get_relocs():
+                relocs.append((to_seg.id, r.offset, r.type, r.width, r.addend))
+        syms = None
+        if seg.get_symtab():
+            syms = [(s.offset, s.name) for s in seg.get_symtab().get_symbols()]
+        lines = None
+        if seg.get_debug_line():
+            lines = [
+                (f.src_file, f.dir_name, [(e.offset, e.src_line) for e in f.entries])
+                for f in seg.get_debug_line().get_files()
+            ]
+        data = seg.get_data()
+        if data is not None:
+            data = bytes(data)
+        res.append((seg.get_type(), seg.get_size(), data, relocs, syms, lines))
+    return bin_img.file_type, res
+
+
+def loader_bincache_format_test(tmpdir):
+    for name in ("dos_examine_gcc_dbg", "dos_examine_sc_dbg", "dos_examine_vc"):
+        path = get_bin(tmpdir, name)
+        bin_img = BinFmt().load_image(path)
+        data = BinImageWriter().write(bin_img, "key")
+        img2 = BinImageReader(data).read("key")
+        assert dump_img(img2) == dump_img(bin_img)
+        # relocated data is the same
+        addrs = [0x1000 * (i + 1) for i in range(len(bin_img.get_segments()))]
+        assert Relocate(img2).relocate(addrs) == Relocate(bin_img).relocate(addrs)
+
+
+def loader_bincache_mem_test(tmpdir):
+    path = get_bin(tmpdir)
+    cache = BinImageCache()
+    img = cache.load_image(path)
+    assert img
+    assert cache.load_image(path) is img
+    assert (cache.hits, cache.misses) == (1, 1)
+    # binary changed
+    os.utime(path, ns=(0, 0))
+    assert cache.load_image(path) is not img
+    assert cache.misses == 2
+    # no file
+    assert cache.load_image(str(tmpdir.join("foo"))) is None
+
+
+def loader_bincache_lru_test(tmpdir):
+    cache = BinImageCache(max_images=1)
+    a = get_bin(tmpdir, "dos_examine_gcc")
+    b = get_bin(tmpdir, "dos_examine_vc")
+    img_a = cache.load_image(a)
+    cache.load_image(b)
+    assert cache.load_image(a) is not img_a
+    assert cache.misses == 3
+
+
+def loader_bincache_disk_test(tmpdir):
+    path = get_bin(tmpdir)
+    cache_dir = str(tmpdir.join("cache"))
+    cache = BinImageCache(cache_dir=cache_dir)
+    img = cache.load_image(path)
+    assert len(os.listdir(cache_dir)) == 1
+    # a new process uses the disk cache
+    cache2 = BinImageCache(cache_dir=cache_dir)
+    img2 = cache2.load_image(path)
+    assert (cache2.disk_hits, cache2.misses) == (1, 0)
+    assert dump_img(img2) == dump_img(img)
+    # broken cache file is ignored
+    cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    with open(cache_file, "r+b") as fh:
+        fh.truncate(100)
+    cache3 = BinImageCache(cache_dir=cache_dir)
+    assert dump_img(cache3.load_image(path)) == dump_img(img)
+    assert (cache3.disk_hits, cache3.misses) == (0, 1)
+
+
+def loader_bincache_segload_test(tmpdir, mem_alloc):
+    mem, alloc = mem_alloc
+    path = get_bin(tmpdir)
+    loader = SegmentLoader(alloc)
+    baddrs = [loader.load_sys_seglist(path) for _ in range(2)]
+    assert loader.bin_cache.hits == 1
+    infos = [loader.get_info(baddr) for baddr in baddrs]
+    assert infos[0].bin_img is infos[1].bin_img
+    for baddr in baddrs:
+        assert loader.unload_seglist(baddr)
+    assert alloc.is_all_free()
@@ -0,0 +1,143 @@
+import io
+from machine68k import CPUType
+from amitools.binfmt.BinImage import (
+    BinImage,
+    Segment,
+    SymbolTable,
+    Symbol,
+    DebugLine,
+    DebugLineFile,
+    DebugLineEntry,
+    BIN_IMAGE_TYPE_HUNK,
+    SEGMENT_TYPE_CODE,
+)
+from amitools.vamos.machine import Machine
+from amitools.vamos.machine.regs import REG_A5, REG_A7
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.loader import SegmentLoader, SegList, PCSampleProfiler
+
+# main: link a5,#0 ; bsr.w func ; unlk a5 ; rts
+# func: link a5,#0 ; moveq #100,d0 ; loop: subq.l #1,d0 ; bne loop
+#       unlk a5 ; rts
+code_words = (
+    0x4E55,
+    0x0000,
+    0x6100,
+    0x0006,
+    0x4E5D,
+    0x4E75,
+    0x4E55,
+    0x0000,
+    0x7064,
+    0x5380,
+    0x66FC,
+    0x4E5D,
+    0x4E75,
+)
+
+
+def create_bin_img():
+    bin_img = BinImage(BIN_IMAGE_TYPE_HUNK)
+    data = b"".join(w.to_bytes(2, "big") for w in code_words)
+    seg = Segment(SEGMENT_TYPE_CODE, len(data), data)
+    symtab = SymbolTable()
+    symtab.add_symbol(Symbol(0, "_main"))
+    symtab.add_symbol(Symbol(12, "_func"))
+    seg.set_symtab(symtab)
+    debug_line = DebugLine()
+    src_file = DebugLineFile("test.c")
+    src_file.add_entry(DebugLineEntry(0, 1))
+    src_file.add_entry(DebugLineEntry(16, 5))
+    debug_line.add_file(src_file)
+    seg.set_debug_line(debug_line)
+    bin_img.add_segment(seg)
+    return bin_img, data
+
+
+def setup_prog():
+    machine = Machine(CPUType.M68000, raise_on_main_run=False)
+    alloc = MemoryAlloc.for_machine(machine)
+    loader = SegmentLoader(alloc)
+    bin_img, data = create_bin_img()
+    seg_list = SegList.alloc(alloc, [len(data)])
+    addr = seg_list.get_segment().get_addr()
+    machine.get_mem().w_block(addr, data)
+    baddr = seg_list.get_baddr()
+    loader.register_seglist(baddr)
+    info = loader.get_info(baddr)
+    info.bin_img = bin_img
+    info.sys_file = "/path/prog"
+    return machine, loader, addr
+
+
+def loader_profile_resolve_test():
+    machine, loader, addr = setup_prog()
+    prof = PCSampleProfiler(machine, loader)
+    resolver = prof.resolver
+    assert resolver.resolve(addr) == ("prog", "_main", "test.c:1", True)
+    assert resolver.resolve(addr + 14) == ("prog", "_func", "test.c:1", True)
+    assert resolver.resolve(addr + 20) == ("prog", "_func", "test.c:5", True)
+    assert resolver.resolve(addr - 2) is None
+    # size is padded to longs
+    assert resolver.resolve(addr + 28) is None
+    # seglists change
+    loader.unregister_seglist(loader.infos.copy().popitem()[0])
+    assert resolver.resolve(addr) is None
+    machine.cleanup()
+
+
+def loader_profile_sample_test():
+    machine, loader, addr = setup_prog()
+    prof = PCSampleProfiler(machine, loader, enabled=True, interval=20)
+    prof.setup()
+    rs = machine.run(addr, machine.get_scratch_top(), set_regs={REG_A5: 0})
+    assert rs.done
+    prof.shutdown()
+    assert prof.num_samples > 10
+    # almost all cycles are spent in the loop of func
+    flat = prof.get_flat()
+    assert flat[0][0] == "prog:_func"
+    cum = dict(prof.get_cumulative())
+    assert cum["prog:_main"] >= cum["prog:_func"]
+    assert "prog:_main;prog:_func" in prof.stacks
+    assert prof.get_hot_lines()[0][0] == "test.c:5"
+    # collapsed stacks
+    out = io.StringIO()
+    prof.write_stacks(out)
+    lines = out.getvalue().splitlines()
+    stack, cycles = lines[-1].rsplit(" ", 1)
+    assert stack == "prog:_main;prog:_func"
+    assert int(cycles) == prof.stacks[stack]
+    machine.cleanup()
+
+
+def loader_profile_ret_addr_no_caller_test():
+    machine, loader, addr = setup_prog()
+    prof = PCSampleProfiler(machine, loader, enabled=True, interval=20)
+    prof.setup()
+    mem = machine.get_mem()
+    cpu = machine.get_cpu()
+    # top of stack looks like a return address but its call is outside of
+    # the segment: fake a jsr (a0) in front of the segment
+    mem.w16(addr - 2, 0x4E90)
+    sp = machine.get_scratch_top() - 16
+    mem.w32(sp, addr)
+    cpu.w_reg(REG_A7, sp)
+    cpu.w_reg(REG_A5, 0)
+    assert prof._get_ret_addrs(addr + 16) == [addr]
+    prof.shutdown()
+    machine.cleanup()
+
+
+def loader_profile_data_test():
+    machine, loader, addr = setup_prog()
+    prof = PCSampleProfiler(machine, loader, enabled=True, interval=20)
+    prof.setup()
+    machine.run(addr, machine.get_scratch_top(), set_regs={REG_A5: 0})
+    prof.shutdown()
+    data = prof.get_data()
+    # load into a new profiler
+    prof2 = PCSampleProfiler(machine, loader, enabled=True)
+    prof2.set_data(data)
+    assert prof2.get_data() == data
+    machine.cleanup()
@@ -219,7 +219,13 @@ def machine_machine_run_addr_exc_test():
 
 def machine_machine_cfg_test():
     cfg = ConfigDict(
-        {"cpu": "68020", "ram_size": 2048, "max_cycles": 128, "cycles_per_run": 2000}
+        {
+            "cpu": "68020",
+            "ram_size": 2048,
+            "max_cycles": 128,
+            "cycles_per_run": 2000,
+            "adaptive_cycles": True,
+        }
     )
     m = Machine.from_cfg(cfg, True)
     assert m
@@ -228,4 +234,41 @@ def machine_machine_cfg_test():
     assert m.get_ram_total_kib() == 2048
     assert m.max_cycles == 128
     assert m.cycles_per_run == 2000
+    assert m.adaptive_cycles
     assert m.get_label_mgr()
+
+
+def run_loop(m, mem, code, stack, count=100000, max_cycles=0):
+    # move.l #count,d0 ; loop: subq.l #1,d0 ; bne loop ; rts
+    mem.w16(code, 0x203C)
+    mem.w32(code + 2, count)
+    mem.w16(code + 6, 0x5380)
+    mem.w16(code + 8, 0x66FC)
+    mem.w16(code + 10, op_rts)
+    return m.run(code, stack, max_cycles=max_cycles)
+
+
+def machine_machine_run_slices_test():
+    m, cpu, mem, code, stack = create_machine()
+    rs = run_loop(m, mem, code, stack)
+    assert rs.done
+    fixed_slices = rs.slices
+    # a slice may end a few cycles late
+    assert fixed_slices > rs.cycles // (m.cycles_per_run + 20)
+    # adaptive mode needs far less slices
+    m.set_adaptive_cycles(True)
+    rs = run_loop(m, mem, code, stack)
+    assert rs.done
+    assert rs.slices < fixed_slices // 10
+    assert rs.get_slices_per_sec() > 0
+    m.cleanup()
+
+
+def machine_machine_run_adaptive_max_cycles_test():
+    m, cpu, mem, code, stack = create_machine()
+    m.set_adaptive_cycles(True)
+    rs = run_loop(m, mem, code, stack, max_cycles=5000)
+    assert not rs.done
+    # slices never exceed the max cycles
+    assert 5000 <= rs.cycles < 5000 + 20
+    m.cleanup()
@@ -1,20 +1,105 @@
+import random
+import pytest
 from amitools.vamos.machine import MockMemory
 from amitools.vamos.mem import MemoryAlloc
 
+ENGINES = ("first_fit", "size_bins")
 
-def mem_alloc_base_test():
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_base_test(engine):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, engine=engine)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1024)
     alloc.free_mem(addr, 1024)
     assert alloc.is_all_free()
 
 
-def mem_alloc_nonbase4_test():
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_nonbase4_test(engine):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, engine=engine)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1021)
     alloc.free_mem(addr, 1021)
     assert alloc.is_all_free()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_out_of_mem_test(engine):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, addr=0x1000, size=0x1000, engine=engine)
+    addr = alloc.alloc_mem(0x800)
+    assert addr == 0x1000
+    assert alloc.largest_chunk() == 0x800
+    assert alloc.alloc_mem(0x1000, except_on_fail=False) == 0
+    alloc.free_mem(addr, 0x800)
+    assert alloc.largest_chunk() == 0x1000
+    assert alloc.is_all_free()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_merge_test(engine):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, addr=0x1000, size=0x1000, engine=engine)
+    addrs = [alloc.alloc_mem(0x100) for _ in range(16)]
+    assert alloc.get_free_bytes() == 0
+    assert alloc.get_engine().get_num_chunks() == 0
+    # free every other block: no merge possible
+    for addr in addrs[::2]:
+        alloc.free_mem(addr, 0x100)
+    assert alloc.get_engine().get_num_chunks() == 8
+    assert alloc.largest_chunk() == 0x100
+    # free the rest: all merge into a single chunk
+    for addr in addrs[1::2]:
+        alloc.free_mem(addr, 0x100)
+    assert alloc.get_engine().get_num_chunks() == 1
+    assert alloc.is_all_free()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def mem_alloc_random_test(engine):
+    rng = random.Random(23)
+    mem = MockMemory(size_kib=512)
+    alloc = MemoryAlloc(mem, addr=0x1000, size=0x40000, engine=engine)
+    blocks = {}
+    for _ in range(2000):
+        if blocks and rng.random() < 0.45:
+            addr = rng.choice(list(blocks))
+            alloc.free_mem(addr, blocks.pop(addr))
+        else:
+            size = rng.choice((4, 12, 16, 40, 100, 1000, 4000))
+            addr = alloc.alloc_mem(size, except_on_fail=False)
+            if addr:
+                # no overlap with other blocks
+                for a, s in blocks.items():
+                    assert addr + size <= a or a + s <= addr
+                blocks[addr] = size
+        chunks = alloc.get_engine().get_chunks()
+        assert sum(c.size for c in chunks) == alloc.get_free_bytes()
+    for addr, size in blocks.items():
+        alloc.free_mem(addr, size)
+    assert alloc.is_all_free()
+    assert alloc.get_engine().get_num_chunks() == 1
+
+
+def mem_alloc_fast_test(caplog):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem)
+    addr = alloc.alloc_fast(100, "AllocMem(%06x)", 0x1234)
+    assert alloc.get_range_by_addr(addr) == 100
+    assert alloc.get_memory(addr) is None
+    assert alloc.get_fast_name(addr) == "AllocMem(001234)"
+    # orphans are named
+    alloc.dump_orphans()
+    assert "AllocMem(001234)" in caplog.text
+    assert alloc.free_fast(addr) == 100
+    assert alloc.get_fast_name(addr) is None
+    assert alloc.is_all_free()
+    # no fast alloc
+    assert alloc.free_fast(addr) is None
+    mb = alloc.alloc_memory(16)
+    assert alloc.free_fast(mb.addr) is None
+    alloc.free_memory(mb)
+    assert alloc.is_all_free()
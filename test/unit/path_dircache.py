@@ -0,0 +1,97 @@
+import os
+from amitools.vamos.path import DirCache, VolumeManager
+
+OLD_TIME = 1000000000
+
+
+def make_old(path):
+    os.utime(str(path), (OLD_TIME, OLD_TIME))
+
+
+def path_dircache_names_test(tmpdir):
+    tmpdir.join("Foo.c").write("")
+    tmpdir.mkdir("BAR")
+    make_old(tmpdir)
+    dc = DirCache()
+    p = str(tmpdir)
+    assert dc.get_names(p) == {"foo.c": "Foo.c", "bar": "BAR"}
+    assert dc.get_stats() == {"dirs": 1, "hits": 0, "misses": 1, "evictions": 0}
+    assert dc.get_names(p) == {"foo.c": "Foo.c", "bar": "BAR"}
+    assert dc.hits == 1
+    # no dir
+    assert dc.get_names(os.path.join(p, "Foo.c")) is None
+    assert dc.get_names(os.path.join(p, "baz")) is None
+
+
+def path_dircache_mtime_test(tmpdir):
+    make_old(tmpdir)
+    dc = DirCache()
+    p = str(tmpdir)
+    assert dc.get_names(p) == {}
+    # changed outside of vamos
+    tmpdir.join("NEW").write("")
+    make_old(tmpdir)
+    assert dc.get_names(p) == {}
+    os.utime(p, (OLD_TIME + 1, OLD_TIME + 1))
+    assert dc.get_names(p) == {"new": "NEW"}
+    assert dc.misses == 2
+
+
+def path_dircache_racy_test(tmpdir):
+    dc = DirCache()
+    p = str(tmpdir)
+    # dir was just modified: do not trust mtime
+    assert dc.get_names(p) == {}
+    assert dc.get_names(p) == {}
+    assert dc.misses == 2
+    assert dc.get_stats()["dirs"] == 0
+
+
+def path_dircache_lru_test(tmpdir):
+    dc = DirCache(max_dirs=2)
+    dirs = []
+    for name in ("a", "b", "c"):
+        d = tmpdir.mkdir(name)
+        make_old(d)
+        dirs.append(str(d))
+    dc.get_names(dirs[0])
+    dc.get_names(dirs[1])
+    dc.get_names(dirs[0])
+    dc.get_names(dirs[2])
+    assert list(dc.dirs) == [dirs[0], dirs[2]]
+    assert dc.evictions == 1
+
+
+def path_dircache_invalidate_test(tmpdir):
+    sub = tmpdir.mkdir("sub")
+    subsub = sub.mkdir("subsub")
+    other = tmpdir.mkdir("other")
+    for d in (tmpdir, sub, subsub, other):
+        make_old(d)
+    dc = DirCache()
+    for d in (tmpdir, sub, subsub, other):
+        dc.get_names(str(d))
+    dc.invalidate(str(sub))
+    assert list(dc.dirs) == [str(other)]
+
+
+def path_dircache_volume_test(tmpdir):
+    v = VolumeManager()
+    my_path = str(tmpdir)
+    assert v.add_volume("My:" + my_path)
+    tmpdir.mkdir("Foo").mkdir("BAR")
+    make_old(tmpdir.join("Foo"))
+    make_old(tmpdir)
+    a2s = v.ami_to_sys_path
+    bar = os.path.join(my_path, "Foo", "BAR")
+    assert a2s("my:foo/bar") == bar
+    assert a2s("my:foo/bar") == bar
+    assert v.dir_cache.hits == 2
+    # vamos creates a new file
+    new_path = os.path.join(my_path, "Foo", "New")
+    assert a2s("my:foo/New") == new_path
+    open(new_path, "w").close()
+    make_old(tmpdir.join("Foo"))
+    assert a2s("my:foo/NEW") == os.path.join(my_path, "Foo", "NEW")
+    v.invalidate_sys_path(new_path)
+    assert a2s("my:foo/NEW") == new_path
@@ -1,4 +1,7 @@
-from amitools.vamos.path import VamosPathManager
+import os
+from amitools.vamos.path import VamosPathManager, PathCacheProfiler
+from amitools.vamos.profiler import MainProfiler
+from amitools.vamos.cfgcore import ConfigDict
 
 
 def path_vamos_mgr_test(tmpdir):
@@ -17,3 +20,93 @@ def path_vamos_mgr_test(tmpdir):
     assert am.is_assign("devs")
     assert am.is_assign("libs")
     vpm.shutdown()
+
+
+class FakeLock:
+    def __init__(self, ami_path):
+        self.ami_path = ami_path
+
+
+def setup_cmd_cache(tmpdir):
+    path = str(tmpdir)
+    vpm = VamosPathManager(vols_base_dir=path)
+    assert vpm.setup()
+    sys_path = vpm.to_sys_path("c:dir")
+    open(sys_path, "w").close()
+    return vpm, sys_path
+
+
+def path_vamos_cmd_cache_test(tmpdir):
+    vpm, sys_path = setup_cmd_cache(tmpdir)
+    lock = FakeLock("sys:")
+    res = vpm.ami_command_to_sys_path(lock, "dir")
+    assert res[0] == sys_path
+    assert str(res[1]) == "system:c/dir"
+    assert vpm.ami_command_to_sys_path(lock, "dir") == res
+    assert vpm.get_cmd_cache_stats() == {"entries": 1, "hits": 1, "misses": 1}
+    # other cwd
+    assert vpm.ami_command_to_sys_path(FakeLock("ram:"), "dir")[0] == sys_path
+    assert vpm.cmd_cache_misses == 2
+    # not found is not cached
+    assert vpm.ami_command_to_sys_path(lock, "foo") == (None, None)
+    assert vpm.ami_command_to_sys_path(lock, "foo") == (None, None)
+    assert vpm.cmd_cache_misses == 4
+    # file removed
+    os.remove(sys_path)
+    assert vpm.ami_command_to_sys_path(lock, "dir") == (None, None)
+    vpm.shutdown()
+
+
+def path_vamos_cmd_cache_assign_test(tmpdir):
+    vpm, sys_path = setup_cmd_cache(tmpdir)
+    lock = FakeLock("sys:")
+    assert vpm.ami_command_to_sys_path(lock, "dir")[0] == sys_path
+    # a new assign in front of the command path hides the command
+    am = vpm.get_assign_mgr()
+    assert am.del_assign("c")
+    other = tmpdir.mkdir("other")
+    other.join("dir").write("")
+    assert am.add_assign("c:root:" + str(other)[1:])
+    res = vpm.ami_command_to_sys_path(lock, "dir")
+    assert res[0] == str(other.join("dir"))
+    assert vpm.cmd_cache_hits == 0
+    vpm.shutdown()
+
+
+def path_vamos_load_cache_test(tmpdir):
+    vpm, sys_path = setup_cmd_cache(tmpdir)
+    assert vpm.ami_load_to_sys_path(None, "c:dir") == sys_path
+    assert vpm.ami_load_to_sys_path(None, "c:dir") == sys_path
+    assert vpm.cmd_cache_hits == 1
+    assert vpm.ami_load_to_sys_path(None, "c:foo") is None
+    # vamos changes another file
+    vpm.invalidate_sys_path(os.path.join(os.path.dirname(sys_path), "foo"))
+    assert vpm.get_cmd_cache_stats()["entries"] == 1
+    # vamos changes a file
+    vpm.invalidate_sys_path(sys_path.upper())
+    assert vpm.get_cmd_cache_stats()["entries"] == 0
+    vpm.shutdown()
+
+
+def path_vamos_profiler_test(tmpdir):
+    vpm, sys_path = setup_cmd_cache(tmpdir)
+    mp = MainProfiler()
+    cfg = ConfigDict(
+        {
+            "enabled": True,
+            "output": {"dump": False, "file": None, "append": False},
+            "path_cache": {"enabled": True},
+        }
+    )
+    assert mp.parse_config(cfg)
+    assert vpm.add_profiler(mp)
+    vpm.ami_command_to_sys_path(None, "dir")
+    vpm.ami_command_to_sys_path(None, "dir")
+    data = vpm.profiler.get_data()
+    assert data.cmd == {"hits": 1, "misses": 1}
+    assert data.dir["misses"] > 0
+    # merge old data
+    prof = PathCacheProfiler(vpm, enabled=True)
+    prof.set_data(data)
+    assert prof.get_data().cmd == {"hits": 2, "misses": 2}
+    vpm.shutdown()
@@ -131,6 +131,34 @@ def path_volume_ami_to_sys_test(tmpdir):
         assert a2s("my:foo", True) == os.path.join(my_path, "Foo")
 
 
+def path_volume_ami_to_sys_fast_no_listdir_test(tmpdir, monkeypatch):
+    v = VolumeManager()
+    mp = tmpdir.mkdir("bla")
+    my_path = str(mp)
+    # a recently modified dir is never cached
+    mp.mkdir("out").join("file").write("hello")
+    assert v.add_volume("My:" + my_path)
+    num_lists = []
+    listdir = os.listdir
+    scandir = os.scandir
+
+    def count_listdir(*args):
+        num_lists.append(args)
+        return listdir(*args)
+
+    def count_scandir(*args):
+        num_lists.append(args)
+        return scandir(*args)
+
+    monkeypatch.setattr(os, "listdir", count_listdir)
+    monkeypatch.setattr(os, "scandir", count_scandir)
+    for _ in range(3):
+        path = v.ami_to_sys_path("my:out/file", True)
+        assert path == os.path.join(my_path, "out", "file")
+    # existing paths are found without listing a dir
+    assert num_lists == []
+
+
 def path_volume_cfg_test(tmpdir):
     my_path = str(tmpdir.mkdir("bla"))
     v = VolumeManager()
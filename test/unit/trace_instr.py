@@ -0,0 +1,126 @@
+from machine68k import CPUType
+from amitools.vamos.machine import Machine
+from amitools.vamos.machine.opcodes import op_rts
+from amitools.vamos.machine.regs import REG_D0
+from amitools.vamos.trace import TraceManager, InstrTraceReader
+from amitools.vamos.tools import TraceTool
+
+
+def run_trace(file_name, with_regs=False):
+    m = Machine(CPUType.M68000, raise_on_main_run=False)
+    mem = m.get_mem()
+    code = m.get_ram_begin()
+    stack = m.get_scratch_top()
+    # moveq #3,d0 ; loop: subq.l #1,d0 ; bne loop ; rts
+    mem.w16(code, 0x7003)
+    mem.w16(code + 2, 0x5380)
+    mem.w16(code + 4, 0x66FC)
+    mem.w16(code + 6, op_rts)
+    tm = TraceManager(m)
+    tm.setup_cpu_instr_record(str(file_name), with_regs)
+    rs = m.run(code, stack)
+    assert rs.done
+    tm.shutdown()
+    m.cleanup()
+    return code
+
+
+def get_pcs(reader):
+    pcs = []
+    for pc, count, _ in reader.get_records():
+        pcs += list(reader.get_instrs(pc, count))
+    return pcs
+
+
+def trace_instr_record_test(tmpdir):
+    file_name = tmpdir / "trace.bin"
+    code = run_trace(file_name)
+    reader = InstrTraceReader(str(file_name))
+    reader.load()
+    assert not reader.has_regs()
+    assert reader.get_cpu_name() == "68000"
+    pcs = get_pcs(reader)
+    loop = [code + 2, code + 4]
+    assert pcs[:8] == [code] + loop * 3 + [code + 6]
+    # basic blocks
+    recs = [(pc, count) for pc, count, _ in reader.get_records()]
+    assert recs[:4] == [(code, 3), (code + 2, 2), (code + 2, 3), (0x400, 1)]
+    # code bytes are kept
+    assert reader.get_code(code)[0] == bytes((0x70, 0x03))
+
+
+def trace_instr_record_regs_test(tmpdir):
+    file_name = tmpdir / "trace.bin"
+    code = run_trace(file_name, True)
+    reader = InstrTraceReader(str(file_name))
+    reader.load()
+    assert reader.has_regs()
+    recs = list(reader.get_records())
+    # first record has all regs
+    assert len(recs[0][2]) == 16
+    # regs before an instr: moveq and subq changed d0
+    assert recs[1] == (code + 2, 1, [(REG_D0, 3)])
+    assert recs[2] == (code + 4, 1, [(REG_D0, 2)])
+
+
+class MockSegLoader:
+    def __init__(self):
+        self.generation = 0
+
+
+def trace_instr_record_code_change_test(tmpdir):
+    file_name = tmpdir / "trace.bin"
+    m = Machine(CPUType.M68000, raise_on_main_run=False)
+    mem = m.get_mem()
+    code = m.get_ram_begin()
+    stack = m.get_scratch_top()
+    seg_loader = MockSegLoader()
+    tm = TraceManager(m)
+    tm.setup_cpu_instr_record(str(file_name), False)
+    tm.set_seg_loader(seg_loader)
+    # moveq #1,d0 ; rts
+    mem.w16(code, 0x7001)
+    mem.w16(code + 2, op_rts)
+    assert m.run(code, stack).done
+    # a new seglist reuses the memory: moveq #2,d0 ; nop ; rts
+    seg_loader.generation += 1
+    mem.w16(code, 0x7002)
+    mem.w16(code + 2, 0x4E71)
+    mem.w16(code + 4, op_rts)
+    assert m.run(code, stack).done
+    tm.shutdown()
+    m.cleanup()
+    reader = InstrTraceReader(str(file_name))
+    reader.load()
+    codes = []
+    for pc, count, _ in reader.get_records():
+        for instr_pc in reader.get_instrs(pc, count):
+            if code <= instr_pc < code + 6:
+                codes.append(reader.get_code(instr_pc)[0])
+    assert codes == [
+        bytes((0x70, 0x01)),
+        bytes((0x4E, 0x75)),
+        bytes((0x70, 0x02)),
+        bytes((0x4E, 0x71)),
+        bytes((0x4E, 0x75)),
+    ]
+
+
+def trace_instr_tool_test(tmpdir, capsys):
+    file_name = tmpdir / "trace.bin"
+    code = run_trace(file_name)
+    tool = TraceTool()
+    assert tool.run(MockArgs("hot", str(file_name), num=1)) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "total instructions: %d" % 9
+    assert out[1].startswith("%06x           5" % (code + 2))
+    assert tool.run(MockArgs("dump", str(file_name))) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert "moveq   #$3, D0" in out[0]
+
+
+class MockArgs:
+    def __init__(self, cmd, input, num=20):
+        self.trace_cmd = cmd
+        self.input = input
+        self.num = num
@@ -0,0 +1,121 @@
+import logging
+from machine68k import CPUType
+from amitools.vamos.machine import Machine
+from amitools.vamos.machine.opcodes import op_rts
+from amitools.vamos.machine.regs import REG_A0, REG_A1
+from amitools.vamos.libstructs import NodeStruct
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.profiler import MainProfiler
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.vamos.trace import TraceManager
+from amitools.vamos.trace.profile import MemAccessProfiler
+
+
+def setup_machine():
+    m = Machine(CPUType.M68000, raise_on_main_run=False, use_labels=True)
+    mem = m.get_mem()
+    alloc = MemoryAlloc.for_machine(m)
+    code = alloc.alloc_memory(8, label="code").addr
+    # move.l d0,(a0) ; move.w (a1),d1 ; move.b (a1),d1 ; rts
+    mem.w16(code, 0x2080)
+    mem.w16(code + 2, 0x3211)
+    mem.w16(code + 4, 0x1211)
+    mem.w16(code + 6, op_rts)
+    return m, alloc, code
+
+
+def setup_profiler(m, path=None, dump=False):
+    mp = MainProfiler()
+    cfg = ConfigDict(
+        {
+            "enabled": True,
+            "output": {"dump": dump, "file": path, "append": True},
+            "mem_access": {"enabled": True, "num_hot": 16},
+        }
+    )
+    assert mp.parse_config(cfg)
+    tm = TraceManager(m)
+    assert tm.add_mem_profiler(mp)
+    mp.setup()
+    return mp, tm.mem_profiler
+
+
+def run_code(m, alloc, code):
+    node = alloc.alloc_struct(NodeStruct, label="node")
+    buf = alloc.alloc_memory(16, label="buf")
+    rs = m.run(
+        code,
+        m.get_scratch_top(),
+        set_regs={REG_A0: node.addr, REG_A1: buf.addr},
+    )
+    assert rs.done
+    alloc.free_struct(node)
+    alloc.free_memory(buf)
+    return node.addr, buf.addr
+
+
+def trace_profile_count_test():
+    m, alloc, code = setup_machine()
+    mp, prof = setup_profiler(m)
+    node_addr, buf_addr = run_code(m, alloc, code)
+    mp.shutdown()
+    labels = {key: (r, w) for key, r, w in prof.get_label_counts()}
+    assert labels[("struct", "node(Node)")] == (0, 1)
+    assert labels[("range", "buf")] == (2, 0)
+    # code fetches are counted, too
+    assert labels[("range", "code")][0] > 0
+    data = prof.get_data()
+    assert data.widths["W32"] == 1
+    assert data.widths["R8"] == 1
+    hot = {addr: (r, w, name) for addr, r, w, name in prof.get_hot()}
+    assert hot[node_addr] == (0, 1, "node(Node)")
+    assert hot[buf_addr] == (2, 0, "buf")
+    # code fetches are hottest
+    assert prof.get_hot()[0][0] == code
+    m.cleanup()
+
+
+def trace_profile_disabled_test():
+    m, alloc, code = setup_machine()
+    prof = MemAccessProfiler(m)
+    prof.setup()
+    run_code(m, alloc, code)
+    prof.shutdown()
+    # no per granule counters are allocated
+    assert len(prof.addr_reads) == 0
+    assert prof.get_hot() == []
+    assert prof.get_data() is None
+    m.cleanup()
+
+
+def trace_profile_label_change_test():
+    m, alloc, code = setup_machine()
+    mp, prof = setup_profiler(m)
+    run_code(m, alloc, code)
+    # same addresses but new labels
+    buf = alloc.alloc_memory(16, label="other")
+    rs = m.run(code, m.get_scratch_top(), set_regs={REG_A0: buf.addr, REG_A1: 0})
+    assert rs.done
+    mp.shutdown()
+    labels = {key: (r, w) for key, r, w in prof.get_label_counts()}
+    assert labels[("range", "other")] == (0, 1)
+    m.cleanup()
+
+
+def trace_profile_file_test(tmpdir, caplog):
+    path = str(tmpdir.join("prof.json"))
+    for _ in range(2):
+        m, alloc, code = setup_machine()
+        mp, prof = setup_profiler(m, path)
+        run_code(m, alloc, code)
+        mp.shutdown()
+        m.cleanup()
+    # data of both runs is merged
+    data = prof.get_data()
+    assert data.labels["range:buf"] == [4, 0]
+    assert data.widths["W32"] == 2
+    # dump table
+    caplog.set_level(logging.INFO, "prof")
+    prof.dump(logging.getLogger("prof").info)
+    lines = [r[2] for r in caplog.record_tuples]
+    assert lines[0].startswith("total reads:")
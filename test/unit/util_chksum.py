@@ -0,0 +1,60 @@
+import struct
+import random
+from amitools.util.chksum import (
+    sum_longs,
+    fold_carry,
+    block_chksum,
+    carry_sum_longs,
+)
+
+
+def gen_data(num_longs, seed=42):
+    rng = random.Random(seed)
+    return bytes(rng.randrange(256) for _ in range(num_longs * 4))
+
+
+def ref_carry_sum(data, skip_loc=None):
+    chk_sum = 0
+    for i in range(len(data) // 4):
+        if i != skip_loc:
+            chk_sum += struct.unpack_from(">I", data, i * 4)[0]
+        if chk_sum > 0xFFFFFFFF:
+            chk_sum = (chk_sum & 0xFFFFFFFF) + 1
+    return chk_sum
+
+
+def util_chksum_sum_longs_test():
+    data = gen_data(128)
+    longs = struct.unpack(">128I", data)
+    assert sum_longs(data) == sum(longs)
+    assert sum_longs(data, 10) == sum(longs[:10])
+    assert sum_longs(bytearray(data)) == sum(longs)
+    assert sum_longs(b"") == 0
+
+
+def util_chksum_fold_carry_test():
+    assert fold_carry(0) == 0
+    assert fold_carry(0xFFFFFFFF) == 0xFFFFFFFF
+    assert fold_carry(0x100000000) == 1
+    assert fold_carry(0x1FFFFFFFF) == 0x1
+    assert ref_carry_sum(b"\xff\xff\xff\xff\x00\x00\x00\x01") == 1
+
+
+def util_chksum_block_chksum_test():
+    data = bytearray(gen_data(128))
+    chk = block_chksum(data, 5)
+    struct.pack_into(">I", data, 20, chk)
+    # a valid block sums up to zero
+    assert sum_longs(data) & 0xFFFFFFFF == 0
+    assert block_chksum(data, 5) == chk
+
+
+def util_chksum_carry_sum_test():
+    for seed in range(4):
+        data = gen_data(256, seed)
+        assert carry_sum_longs(data) == ref_carry_sum(data)
+        assert carry_sum_longs(data, skip_loc=7) == ref_carry_sum(data, 7)
+    # all ones
+    data = b"\xff" * 64
+    assert carry_sum_longs(data) == ref_carry_sum(data)
+    assert carry_sum_longs(data, 4) == ref_carry_sum(data[:16])
@@ -1,4 +1,7 @@
+import ast
 import logging
+import os
+import amitools.vamos.lib
 from amitools.vamos.cfgcore import ConfigDict
 from amitools.vamos.log import *
 
@@ -121,3 +124,47 @@ def vamos_log_setup_levels_fail2_test(caplog):
     )
     assert not log_setup(log_cfg)
     assert caplog.record_tuples == [("config", logging.ERROR, "invalid log level: foo")]
+
+
+LOG_METHODS = ("debug", "info", "warning", "warn", "error", "critical", "exception")
+
+
+def _is_eager_format(node):
+    # "..." % args
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mod):
+        return isinstance(node.left, (ast.Constant, ast.JoinedStr))
+    # f"..."
+    if isinstance(node, ast.JoinedStr):
+        return True
+    # "...".format(args)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        return node.func.attr == "format"
+    return False
+
+
+def _find_eager_log_calls(path):
+    with open(path) as fh:
+        tree = ast.parse(fh.read(), path)
+    result = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        func = node.func
+        if not isinstance(func, ast.Attribute) or func.attr not in LOG_METHODS:
+            continue
+        if not isinstance(func.value, ast.Name) or not func.value.id.startswith("log"):
+            continue
+        if _is_eager_format(node.args[0]):
+            result.append("%s:%d" % (path, node.lineno))
+    return result
+
+
+def vamos_log_lib_lazy_format_test():
+    """library trap handlers must pass log args and not format eagerly"""
+    lib_dir = os.path.dirname(amitools.vamos.lib.__file__)
+    eager = []
+    for root, dirs, files in os.walk(lib_dir):
+        for name in sorted(files):
+            if name.endswith(".py"):
+                eager += _find_eager_log_calls(os.path.join(root, name))
+    assert eager == []